@@ -0,0 +1,204 @@
+import logging
+from datetime import timedelta
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import CohortHistogram, CohortRollup, Response
+from archive import ARCHIVE_COLUMNS, iter_archived_rows
+from scoring import COMPILED_SPEC
+from create_app import db
+
+# Agregados institucionais pré-calculados.
+#
+# Cada submissão soma sua contribuição às linhas da semana em CohortRollup e
+# CohortHistogram (UPSERT incremental, na mesma transação da resposta). As
+# consultas da equipe leem só essas tabelas, que crescem uma linha por semana,
+# em vez de percorrer Response. rebuild_rollups recalcula tudo a partir de
+# Response e do arquivo de respostas antigas, por exemplo após uma mudança na
+# fórmula.
+
+# Limite inferior da faixa vermelha em createBurnoutScoreChart
+HIGH_RISK_SCORE = 70
+
+HISTOGRAM_BUCKETS = 10
+
+ROLLUP_SUMS = ('responses', 'score_sum', 'high_risk', 'ee_sum', 'dp_sum', 'pa_sum',
+               'ee_count', 'dp_count', 'pa_count')
+
+
+def week_start(timestamp):
+    """Segunda-feira da semana do timestamp"""
+    return (timestamp - timedelta(days=timestamp.weekday())).date()
+
+
+def score_bucket(score):
+    """Faixa de 10 pontos da pontuação (100 fica na última faixa)"""
+    return min(int(score // 10), HISTOGRAM_BUCKETS - 1)
+
+
+def accumulate(rollups, histogram, timestamp, score, ee, dp, pa):
+    """Soma uma avaliação aos agregados em memória (dicionários por semana)"""
+    week = week_start(timestamp)
+    totals = rollups.setdefault(week, dict.fromkeys(ROLLUP_SUMS, 0))
+    totals['responses'] += 1
+    totals['score_sum'] += score
+    totals['high_risk'] += score >= HIGH_RISK_SCORE
+    # Respostas antigas ainda sem as somas das dimensões (ou pontuadas com o
+    # valor de falha) ficam fora da média de cada dimensão
+    for name, value in (('ee', ee), ('dp', dp), ('pa', pa)):
+        if value is not None:
+            totals[f'{name}_sum'] += value
+            totals[f'{name}_count'] += 1
+    key = (week, score_bucket(score))
+    histogram[key] = histogram.get(key, 0) + 1
+
+
+def _upsert(model, rows, key_columns, sum_columns):
+    """INSERT ... ON CONFLICT DO UPDATE somando os valores (SQLite e PostgreSQL)"""
+    if not rows:
+        return
+    insert = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    statement = insert(model.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={column: model.__table__.c[column] + statement.excluded[column]
+              for column in sum_columns})
+    db.session.execute(statement, rows)
+
+
+def apply_rollups(rollups, histogram):
+    """Grava os agregados em memória somando-os às linhas existentes"""
+    _upsert(CohortRollup,
+            [{'week_start': week, **totals} for week, totals in rollups.items()],
+            ['week_start'], ROLLUP_SUMS)
+    _upsert(CohortHistogram,
+            [{'week_start': week, 'bucket': bucket, 'responses': count}
+             for (week, bucket), count in histogram.items()],
+            ['week_start', 'bucket'], ['responses'])
+
+
+def update_rollups(submissions):
+    """Atualiza os agregados com um lote de submissões (sem fazer commit)"""
+    rollups, histogram = {}, {}
+    for submission in submissions:
+        if submission.get('timestamp') is not None:
+            accumulate(rollups, histogram, submission['timestamp'],
+                       submission['burnout_score'], submission['ee_score'],
+                       submission['dp_score'], submission['pa_score'])
+    apply_rollups(rollups, histogram)
+
+
+def _accumulate_responses(rollups, histogram, after_id, chunk_size):
+    """
+    Soma aos agregados em memória as respostas de Response com id maior que
+    `after_id`, em blocos. Retorna (maior id lido, respostas lidas)
+    """
+    total = 0
+    while True:
+        rows = db.session.execute(
+            select(Response.id, Response.timestamp, Response.burnout_score,
+                   Response.ee_score, Response.dp_score, Response.pa_score)
+            .where(Response.id > after_id, Response.timestamp.isnot(None))
+            .order_by(Response.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return after_id, total
+        after_id = rows[-1][0]
+        for row in rows:
+            accumulate(rollups, histogram, *row[1:])
+        total += len(rows)
+        logging.info(f"Agregados: {total} respostas processadas")
+
+
+def rebuild_rollups(chunk_size=10000):
+    """
+    Recalcula os agregados percorrendo Response em blocos e as respostas
+    arquivadas. Retorna o total
+
+    A leitura é feita fora da transação de escrita: no SQLite, apagar os
+    agregados antes abriria uma transação que seguraria o lock de escrita
+    durante toda a leitura, e as submissões concorrentes (que também
+    atualizam os agregados) falhariam com "database is locked". Os
+    agregados são trocados no fim, em uma transação curta que também soma as
+    respostas gravadas durante a leitura.
+    """
+    rollups, histogram = {}, {}
+    last_id, total = _accumulate_responses(rollups, histogram, 0, chunk_size)
+
+    # Respostas movidas para o arquivo (archive.py)
+    timestamp_index = ARCHIVE_COLUMNS.index('timestamp')
+    score_indexes = [ARCHIVE_COLUMNS.index(name)
+                     for name in ('burnout_score', 'ee_score', 'dp_score', 'pa_score')]
+    for rows in iter_archived_rows(chunk_size):
+        for row in rows:
+            accumulate(rollups, histogram, row[timestamp_index],
+                       *[row[index] for index in score_indexes])
+        total += len(rows)
+        logging.info(f"Agregados: {total} respostas processadas")
+    # Encerra a transação de leitura antes de gravar
+    db.session.commit()
+
+    # Os agregados têm uma linha por semana, então cabem em memória. O DELETE
+    # obtém o lock de escrita; a partir dele nenhuma submissão é gravada até
+    # o commit, então as lidas a seguir completam a reconstrução
+    db.session.execute(delete(CohortHistogram))
+    db.session.execute(delete(CohortRollup))
+    _, late = _accumulate_responses(rollups, histogram, last_id, chunk_size)
+    apply_rollups(rollups, histogram)
+    db.session.commit()
+    return total + late
+
+
+def _dimension_mean(rollup, name, size):
+    """Média por questão da dimensão na semana (None sem respostas com ela)"""
+    count = getattr(rollup, f'{name}_count')
+    if count is None:
+        # Semana agregada antes das contagens por dimensão
+        count = rollup.responses
+    if not count:
+        return None
+    return round(getattr(rollup, f'{name}_sum') / count / size, 2)
+
+
+def cohort_summary(weeks=None):
+    """
+    Resumo institucional a partir dos agregados: totais, distribuição das
+    pontuações e tendência semanal (opcionalmente só as últimas `weeks`).
+    """
+    query = select(CohortRollup).order_by(CohortRollup.week_start.desc())
+    if weeks:
+        query = query.limit(weeks)
+    rollups = list(reversed(db.session.scalars(query).all()))
+    if not rollups:
+        return {'responses': 0, 'mean_score': None, 'high_risk_share': None,
+                'distribution': [0] * HISTOGRAM_BUCKETS, 'weeks': []}
+
+    histogram_rows = db.session.execute(
+        select(CohortHistogram.bucket, db.func.sum(CohortHistogram.responses))
+        .where(CohortHistogram.week_start >= rollups[0].week_start)
+        .group_by(CohortHistogram.bucket)).all()
+    distribution = [0] * HISTOGRAM_BUCKETS
+    for bucket, count in histogram_rows:
+        distribution[bucket] = int(count)
+
+    responses = sum(r.responses for r in rollups)
+    dimension_sizes = dict(zip(COMPILED_SPEC.dimension_names, COMPILED_SPEC.dimension_sizes))
+    return {
+        'responses': responses,
+        'mean_score': round(sum(r.score_sum for r in rollups) / responses, 1),
+        'high_risk_share': round(sum(r.high_risk for r in rollups) / responses, 4),
+        'distribution': distribution,
+        'weeks': [
+            {
+                'week_start': r.week_start.isoformat(),
+                'responses': r.responses,
+                'mean_score': round(r.score_sum / r.responses, 1),
+                'high_risk_share': round(r.high_risk / r.responses, 4),
+                # Média por questão de cada dimensão (escala de 0 a 4)
+                **{f'{name}_mean': _dimension_mean(r, name, size)
+                   for name, size in dimension_sizes.items()},
+            }
+            for r in rollups if r.responses
+        ],
+    }
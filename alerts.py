@@ -0,0 +1,214 @@
+import json
+import logging
+import time
+import urllib.request
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm.util import identity_key
+from models import User, RiskAlert
+from create_app import db
+
+# Detecção incremental de estudantes em risco.
+#
+# A cada lote gravado por write_submissions, detect_risk_events compara a nova
+# pontuação com o estado já guardado no próprio usuário: a pontuação mais
+# recente (latest_burnout_score) e uma janela com as últimas pontuações
+# (recent_scores). Nenhuma consulta percorre Response. Os eventos vão para a
+# tabela RiskAlert na mesma transação da resposta, então um alerta nunca se
+# perde nem é criado para uma resposta que não foi gravada.
+#
+# dispatch_alerts esvazia essa caixa de saída em lotes, fora do caminho das
+# requisições (comando flask dispatch-alerts).
+
+THRESHOLD = 'threshold'
+WORSENING = 'worsening'
+
+
+def _load_users(user_ids):
+    """
+    Estado de risco dos usuários do lote. Usuários já carregados na sessão
+    (o current_user da requisição) não geram consulta; os demais são lidos
+    com uma única consulta pela chave primária.
+    """
+    state = {}
+    missing = []
+    for user_id in user_ids:
+        user = db.session.identity_map.get(identity_key(User, user_id))
+        if user is not None:
+            state[user_id] = (user.latest_burnout_score, user.last_assessment,
+                              user.recent_scores)
+        else:
+            missing.append(user_id)
+    if missing:
+        for user_id, *values in db.session.execute(
+                select(User.id, User.latest_burnout_score, User.last_assessment,
+                       User.recent_scores).where(User.id.in_(missing))):
+            state[user_id] = tuple(values)
+    return state
+
+
+def parse_window(recent_scores):
+    """Converte User.recent_scores em uma lista de pontuações"""
+    return [float(score) for score in recent_scores.split(',')] if recent_scores else []
+
+
+def format_window(scores):
+    """Converte a janela de pontuações no formato de User.recent_scores"""
+    return ','.join(f'{score:g}' for score in scores)
+
+
+def detect_risk_events(submissions):
+    """
+    Detecta os eventos de risco de um lote de submissões e grava os alertas na
+    sessão atual, sem fazer commit. Retorna {user_id: recent_scores} com a
+    janela atualizada de cada usuário do lote.
+
+    Gera um alerta 'threshold' quando a pontuação passa a ser maior ou igual a
+    RISK_THRESHOLD (ou já começa acima dele) e 'worsening' quando sobe em
+    relação à avaliação anterior e supera a média da janela em
+    RISK_WORSENING_DELTA pontos ou mais.
+    """
+    config = current_app.config
+    threshold = config.get('RISK_THRESHOLD', 70)
+    delta = config.get('RISK_WORSENING_DELTA', 15)
+    window_size = config.get('RISK_WINDOW_SIZE', 5)
+
+    by_user = {}
+    for submission in submissions:
+        by_user.setdefault(submission['user_id'], []).append(submission)
+    state = _load_users(by_user)
+
+    windows = {}
+    alerts = []
+    for user_id, user_submissions in by_user.items():
+        previous, last_assessment, recent_scores = state.get(user_id, (None, None, None))
+        window = parse_window(recent_scores)
+        for submission in sorted(user_submissions, key=lambda s: s['timestamp']):
+            assessed_at = submission['timestamp']
+            # Respostas mais antigas que a avaliação atual (importações) não
+            # mudam o estado do usuário
+            if last_assessment is not None and assessed_at < last_assessment:
+                continue
+            score = submission['burnout_score']
+            window_mean = sum(window) / len(window) if window else None
+
+            events = []
+            if score >= threshold and (previous is None or previous < threshold):
+                events.append(THRESHOLD)
+            if (window_mean is not None and score - window_mean >= delta
+                    and score > previous):
+                events.append(WORSENING)
+            for kind in events:
+                alerts.append({
+                    'user_id': user_id, 'kind': kind, 'burnout_score': score,
+                    'previous_score': previous, 'window_mean': window_mean,
+                    'assessed_at': assessed_at, 'created_at': datetime.now(),
+                    'attempts': 0,
+                })
+
+            window = (window + [score])[-window_size:]
+            previous, last_assessment = score, assessed_at
+        windows[user_id] = format_window(window)
+
+    if alerts:
+        db.session.execute(insert(RiskAlert.__table__), alerts)
+    return windows
+
+
+# Envio dos alertas
+
+
+def log_handler(alerts):
+    """Destino padrão: registra os alertas no log da aplicação"""
+    for alert in alerts:
+        logging.warning(
+            f"Alerta de risco ({alert['kind']}): usuário {alert['user_id']} "
+            f"com pontuação {alert['burnout_score']}")
+
+
+def webhook_handler(url, timeout=10):
+    """Destino que envia cada lote de alertas como JSON para um webhook"""
+    def send(alerts):
+        body = json.dumps({'alerts': alerts}, default=str).encode('utf-8')
+        request = urllib.request.Request(
+            url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    return send
+
+
+def create_handler(config):
+    """Destino dos alertas conforme ALERT_WEBHOOK_URL (vazio: apenas log)"""
+    url = config.get('ALERT_WEBHOOK_URL')
+    return webhook_handler(url) if url else log_handler
+
+
+def _pending_batch(batch_size, max_attempts):
+    query = (
+        select(RiskAlert)
+        .where(RiskAlert.dispatched_at.is_(None),
+               RiskAlert.attempts < max_attempts)
+        .order_by(RiskAlert.id)
+        .limit(batch_size)
+    )
+    # Permite vários despachantes no PostgreSQL sem enviar o mesmo alerta
+    if db.engine.dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+    return db.session.scalars(query).all()
+
+
+def dispatch_alerts(handler, batch_size=100, max_attempts=5):
+    """
+    Envia os alertas pendentes em lotes de `batch_size`, chamando
+    handler(lista de dicionários). Lotes entregues são marcados como
+    despachados; em caso de falha o lote volta para a fila com mais uma
+    tentativa, até `max_attempts`. Retorna (enviados, falhas).
+    """
+    sent = failed = 0
+    while True:
+        batch = _pending_batch(batch_size, max_attempts)
+        if not batch:
+            break
+        ids = [alert.id for alert in batch]
+        payload = [
+            {
+                'id': alert.id,
+                'user_id': alert.user_id,
+                'kind': alert.kind,
+                'burnout_score': alert.burnout_score,
+                'previous_score': alert.previous_score,
+                'window_mean': alert.window_mean,
+                'assessed_at': alert.assessed_at.isoformat(),
+            }
+            for alert in batch
+        ]
+        try:
+            handler(payload)
+        except Exception as e:
+            logging.error(f"Erro ao enviar {len(ids)} alertas de risco: {e}")
+            db.session.execute(
+                update(RiskAlert).where(RiskAlert.id.in_(ids))
+                .values(attempts=RiskAlert.attempts + 1, last_error=str(e)[:500])
+                .execution_options(synchronize_session=False))
+            db.session.commit()
+            failed += len(ids)
+            # Tenta novamente na próxima execução
+            break
+
+        db.session.execute(
+            update(RiskAlert).where(RiskAlert.id.in_(ids))
+            .values(dispatched_at=datetime.now(), attempts=RiskAlert.attempts + 1)
+            .execution_options(synchronize_session=False))
+        db.session.commit()
+        sent += len(ids)
+    return sent, failed
+
+
+def run_dispatcher(handler, interval=5.0, batch_size=100, max_attempts=5):
+    """Despacha os alertas continuamente, verificando a fila a cada `interval`"""
+    while True:
+        sent, failed = dispatch_alerts(handler, batch_size, max_attempts)
+        if sent or failed:
+            logging.info(f"Alertas de risco: {sent} enviados, {failed} com falha")
+        time.sleep(interval)
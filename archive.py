@@ -0,0 +1,333 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, select
+from models import Response, ResponseArchiveSummary
+from scoring import QUESTION_COLUMNS, SUBSCORE_COLUMNS
+from create_app import db
+
+# Arquivamento das respostas antigas.
+#
+# As respostas com mais de ARCHIVE_HORIZON_DAYS dias saem de Response e vão
+# para um arquivo SQLite separado (ARCHIVE_PATH), só de inserção: cada lote
+# arquivado grava, por usuário, um bloco com as colunas da resposta (e, à
+# parte, só as usadas no gráfico) em JSON colunar comprimido com zlib. No
+# banco principal fica, por usuário, uma linha de resumo
+# (ResponseArchiveSummary). Assim a tabela e os índices usados pelas páginas
+# ficam restritos às respostas recentes.
+#
+# Os dois bancos não compartilham transação. Cada lote é gravado no arquivo
+# como pendente, depois removido de Response junto com a atualização dos
+# resumos (que guardam o último lote de cada usuário) e só então marcado como
+# confirmado. A leitura usa apenas os blocos com lote até o do resumo, então
+# nunca vê um bloco cuja remoção de Response não foi confirmada. No início de
+# cada execução, os lotes pendentes de uma execução interrompida são
+# confirmados ou descartados (reconcile_archive).
+
+ARCHIVE_COLUMNS = ('id', 'user_id', 'timestamp', 'burnout_score', 'scoring_version',
+                   *SUBSCORE_COLUMNS, 'answers_version', *QUESTION_COLUMNS)
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive_batch (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    cutoff TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    committed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS archive_chunk (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER NOT NULL REFERENCES archive_batch (id),
+    user_id INTEGER NOT NULL,
+    first_timestamp TEXT NOT NULL,
+    last_timestamp TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    -- Todas as colunas (exportação, agregados) e só as do histórico (gráfico)
+    data BLOB NOT NULL,
+    history BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_archive_chunk_user ON archive_chunk (user_id, batch_id);
+"""
+
+
+def archive_path():
+    return current_app.config['ARCHIVE_PATH']
+
+
+def connect_archive(path=None):
+    """Abre o arquivo para gravação, criando-o se necessário"""
+    path = path or archive_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=30)
+    # WAL: os workers continuam lendo enquanto um lote é gravado
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.executescript(ARCHIVE_SCHEMA)
+    return connection
+
+
+def _connect_readonly(path):
+    """Abre o arquivo só para leitura (None se ele ainda não existir)"""
+    if not os.path.exists(path):
+        return None
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+
+
+# Colunas do histórico do usuário, gravadas também à parte em cada bloco
+HISTORY_COLUMNS = ('timestamp', 'id', 'burnout_score')
+
+
+def encode_chunk(rows, names=ARCHIVE_COLUMNS):
+    """
+    Bloco comprimido com as colunas `names` das linhas (tuplas na ordem de
+    ARCHIVE_COLUMNS)
+    """
+    columns = {name: list(values) for name, values in zip(ARCHIVE_COLUMNS, zip(*rows))
+               if name in names}
+    columns['timestamp'] = [timestamp.isoformat() for timestamp in columns['timestamp']]
+    return zlib.compress(json.dumps(columns, separators=(',', ':')).encode('utf-8'), 9)
+
+
+def decode_chunk(data):
+    """Colunas de um bloco, com os timestamps já convertidos"""
+    columns = json.loads(zlib.decompress(data))
+    columns['timestamp'] = [datetime.fromisoformat(value) for value in columns['timestamp']]
+    return columns
+
+
+def reconcile_archive(connection):
+    """
+    Resolve os lotes pendentes de uma execução interrompida: confirma os que
+    chegaram a ser removidos de Response (algum resumo aponta para o lote) e
+    descarta os demais, cujas respostas continuam em Response.
+    """
+    pending = [batch_id for (batch_id,) in connection.execute(
+        'SELECT id FROM archive_batch WHERE committed = 0 ORDER BY id')]
+    for batch_id in pending:
+        applied = db.session.scalar(
+            select(ResponseArchiveSummary.user_id)
+            .where(ResponseArchiveSummary.last_batch == batch_id).limit(1))
+        with connection:
+            if applied is not None:
+                connection.execute(
+                    'UPDATE archive_batch SET committed = 1 WHERE id = ?', (batch_id,))
+            else:
+                connection.execute('DELETE FROM archive_chunk WHERE batch_id = ?', (batch_id,))
+                connection.execute('DELETE FROM archive_batch WHERE id = ?', (batch_id,))
+        logging.warning(f"Lote {batch_id} do arquivo pendente: "
+                        f"{'confirmado' if applied is not None else 'descartado'}")
+    return len(pending)
+
+
+def _write_batch(connection, cutoff, rows):
+    """Grava um lote pendente, um bloco por usuário. Retorna o id do lote"""
+    by_user = defaultdict(list)
+    for row in rows:
+        by_user[row[1]].append(row)
+    with connection:
+        batch_id = connection.execute(
+            'INSERT INTO archive_batch (created_at, cutoff, rows) VALUES (?, ?, ?)',
+            (datetime.now().isoformat(), cutoff.isoformat(), len(rows))).lastrowid
+        connection.executemany(
+            'INSERT INTO archive_chunk (batch_id, user_id, first_timestamp, '
+            'last_timestamp, rows, data, history) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(batch_id, user_id,
+              min(row[2] for row in user_rows).isoformat(),
+              max(row[2] for row in user_rows).isoformat(),
+              len(user_rows), encode_chunk(user_rows),
+              encode_chunk(user_rows, HISTORY_COLUMNS))
+             for user_id, user_rows in by_user.items()])
+    return batch_id
+
+
+def _retire(rows, batch_id):
+    """Remove as linhas de Response e atualiza os resumos (uma transação)"""
+    totals = {}
+    for row in rows:
+        user_id, timestamp, score = row[1], row[2], row[3]
+        summary = totals.get(user_id)
+        if summary is None:
+            totals[user_id] = [1, score, score, score, timestamp, timestamp]
+        else:
+            summary[0] += 1
+            summary[1] += score
+            summary[2] = min(summary[2], score)
+            summary[3] = max(summary[3], score)
+            summary[4] = min(summary[4], timestamp)
+            summary[5] = max(summary[5], timestamp)
+
+    db.session.execute(
+        delete(Response).where(Response.id.in_([row[0] for row in rows]))
+        .execution_options(synchronize_session=False))
+    existing = {summary.user_id: summary for summary in db.session.scalars(
+        select(ResponseArchiveSummary)
+        .where(ResponseArchiveSummary.user_id.in_(list(totals))))}
+    for user_id, (count, score_sum, low, high, first, last) in totals.items():
+        summary = existing.get(user_id)
+        if summary is None:
+            db.session.add(ResponseArchiveSummary(
+                user_id=user_id, responses=count, score_sum=score_sum,
+                min_score=low, max_score=high, first_assessment=first,
+                last_assessment=last, last_batch=batch_id))
+        else:
+            summary.responses += count
+            summary.score_sum += score_sum
+            summary.min_score = min(summary.min_score, low)
+            summary.max_score = max(summary.max_score, high)
+            summary.first_assessment = min(summary.first_assessment, first)
+            summary.last_assessment = max(summary.last_assessment, last)
+            summary.last_batch = batch_id
+    db.session.commit()
+
+
+def _lock(path):
+    """Impede duas execuções simultâneas sobre o mesmo arquivo (Unix)"""
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    handle = open(f"{path}.lock", 'w')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        raise RuntimeError(f"Outro arquivamento está em execução ({path})")
+    return handle
+
+
+def archive_responses(horizon_days=None, chunk_size=5000, path=None):
+    """
+    Move para o arquivo as respostas anteriores ao horizonte, em lotes de
+    `chunk_size`. Retorna as estatísticas da execução.
+    """
+    if horizon_days is None:
+        horizon_days = current_app.config.get('ARCHIVE_HORIZON_DAYS', 365)
+    path = path or archive_path()
+    cutoff = datetime.now() - timedelta(days=horizon_days)
+    stats = {'archived': 0, 'batches': 0, 'bytes': 0, 'reconciled': 0,
+             'cutoff': cutoff, 'seconds': 0.0}
+    started = time.perf_counter()
+
+    connection = connect_archive(path)
+    lock = None
+    try:
+        lock = _lock(path)
+        stats['reconciled'] = reconcile_archive(connection)
+        columns = [Response.__table__.c[name] for name in ARCHIVE_COLUMNS]
+        while True:
+            # As linhas arquivadas saem de Response: a próxima consulta já
+            # começa no bloco seguinte
+            rows = db.session.execute(
+                select(*columns)
+                .where(Response.timestamp < cutoff)
+                .order_by(Response.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            batch_id = _write_batch(connection, cutoff, rows)
+            try:
+                _retire(rows, batch_id)
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Erro ao remover o lote {batch_id} de Response: {e}")
+                raise
+            with connection:
+                connection.execute(
+                    'UPDATE archive_batch SET committed = 1 WHERE id = ?', (batch_id,))
+            stats['archived'] += len(rows)
+            stats['batches'] += 1
+            logging.info(f"Arquivamento: {stats['archived']} respostas arquivadas")
+        stats['bytes'] = connection.execute(
+            'SELECT COALESCE(SUM(LENGTH(data) + LENGTH(history)), 0) '
+            'FROM archive_chunk').fetchone()[0]
+    finally:
+        connection.close()
+        if lock is not None:
+            lock.close()
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def archived_history(user_id, since=None):
+    """
+    Avaliações arquivadas do usuário como tuplas (timestamp, id, pontuação)
+    em ordem cronológica, opcionalmente só as posteriores a `since`. Consulta
+    o arquivo apenas se o usuário tiver um resumo de respostas arquivadas.
+    """
+    summary = db.session.get(ResponseArchiveSummary, user_id)
+    if summary is None or (since is not None and summary.last_assessment <= since):
+        return []
+    connection = _connect_readonly(archive_path())
+    if connection is None:
+        logging.error(f"Arquivo de respostas não encontrado: {archive_path()}")
+        return []
+    try:
+        query = 'SELECT history FROM archive_chunk WHERE user_id = ? AND batch_id <= ?'
+        parameters = [user_id, summary.last_batch]
+        if since is not None:
+            query += ' AND last_timestamp > ?'
+            parameters.append(since.isoformat())
+        points = []
+        for (data,) in connection.execute(query, parameters):
+            columns = decode_chunk(data)
+            points.extend(
+                (timestamp, response_id, score)
+                for timestamp, response_id, score in zip(
+                    columns['timestamp'], columns['id'], columns['burnout_score'])
+                if since is None or timestamp > since)
+    finally:
+        connection.close()
+    points.sort()
+    return points
+
+
+def _readable_batches(connection):
+    """
+    Ids dos lotes legíveis: os confirmados e os pendentes já removidos de
+    Response (execução interrompida entre a remoção e a confirmação)
+    """
+    batches = {batch_id for (batch_id,) in connection.execute(
+        'SELECT id FROM archive_batch WHERE committed = 1')}
+    pending = [batch_id for (batch_id,) in connection.execute(
+        'SELECT id FROM archive_batch WHERE committed = 0')]
+    if pending:
+        batches.update(db.session.scalars(
+            select(ResponseArchiveSummary.last_batch).distinct()
+            .where(ResponseArchiveSummary.last_batch.in_(pending))))
+    return batches
+
+
+def iter_archived_rows(chunk_size=5000, path=None):
+    """
+    Percorre as linhas arquivadas (tuplas na ordem de ARCHIVE_COLUMNS) em
+    listas de cerca de `chunk_size` linhas. Só lê o arquivo: pode rodar
+    durante um arquivamento.
+    """
+    path = path or archive_path()
+    connection = _connect_readonly(path)
+    if connection is None:
+        return
+    try:
+        batches = _readable_batches(connection)
+        rows = []
+        for batch_id, data in connection.execute(
+                'SELECT batch_id, data FROM archive_chunk ORDER BY id'):
+            if batch_id not in batches:
+                continue
+            columns = decode_chunk(data)
+            rows.extend(zip(*(columns[name] for name in ARCHIVE_COLUMNS)))
+            if len(rows) >= chunk_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+    finally:
+        connection.close()
@@ -0,0 +1,268 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+from contextlib import contextmanager
+from flask import request, send_from_directory
+
+# Arquivos estáticos com impressão digital e pré-comprimidos.
+#
+# build_assets copia cada CSS/JS de static/ para static/dist/ com o hash do
+# conteúdo no nome (js/chart-config.3f2a9c1b0d4e.js) e grava as versões gzip
+# e brotli ao lado, além de um manifest.json com o nome original -> nome com
+# hash. Com ASSETS_FINGERPRINT ativo, url_for('static', filename=...) passa a
+# apontar para o nome com hash (os templates não mudam) e esses arquivos são
+# servidos com Cache-Control immutable e na codificação aceita pelo navegador.
+# Como o nome muda quando o conteúdo muda, o navegador nunca precisa
+# revalidá-los.
+#
+# No boot o manifesto é comparado com o hash atual das fontes e gerado de novo
+# se estiver desatualizado (ex.: deploy que atualizou static/ sem rodar
+# "flask build-assets"). A geração é serializada por um lock de arquivo e
+# cada arquivo é gravado por renomeação atômica, então workers que sobem ao
+# mesmo tempo sem preload não geram nem leem arquivos pela metade.
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+BUILD_LOCK = '.build.lock'
+
+# Extensões processadas
+ASSET_EXTENSIONS = ('.css', '.js')
+
+# Um ano: o máximo recomendado para recursos imutáveis
+IMMUTABLE_MAX_AGE = 31536000
+
+
+def _brotli():
+    """Importa o brotli sob demanda; sem ele apenas o gzip é gerado"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _source_files(static_folder):
+    """Arquivos CSS/JS de static/, relativos a ele (sem a própria dist/)"""
+    for directory, subdirectories, files in os.walk(static_folder):
+        if directory == static_folder:
+            subdirectories[:] = [d for d in subdirectories if d != DIST_DIR]
+        for name in sorted(files):
+            if name.endswith(ASSET_EXTENSIONS):
+                path = os.path.join(directory, name)
+                yield os.path.relpath(path, static_folder).replace(os.sep, '/')
+
+
+def fingerprint_name(filename, content):
+    """Nome com o hash do conteúdo: css/style.css -> css/style.<hash>.css"""
+    stem, extension = os.path.splitext(filename)
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return f"{stem}.{digest}{extension}"
+
+
+def source_manifest(static_folder):
+    """Manifesto correspondente ao conteúdo atual das fontes em static/"""
+    manifest = {}
+    for filename in _source_files(static_folder):
+        with open(os.path.join(static_folder, filename), 'rb') as f:
+            manifest[filename] = fingerprint_name(filename, f.read())
+    return manifest
+
+
+def is_stale(static_folder, manifest):
+    """
+    Indica se o manifesto não corresponde às fontes atuais ou se falta em
+    static/dist algum dos arquivos que ele aponta
+    """
+    if manifest != source_manifest(static_folder):
+        return True
+    dist = os.path.join(static_folder, DIST_DIR)
+    return not all(os.path.exists(os.path.join(dist, hashed)) for hashed in manifest.values())
+
+
+@contextmanager
+def _build_lock(static_folder):
+    """Lock exclusivo entre processos para gerar static/dist"""
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:
+        # Sem fcntl (Windows) a geração não é serializada
+        yield
+        return
+    with open(os.path.join(dist, BUILD_LOCK), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_atomic(path, data):
+    """Grava o arquivo por renomeação: quem lê nunca vê o arquivo pela metade"""
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp cria o arquivo só com permissão do dono
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def build_assets(static_folder):
+    """
+    Gera static/dist com os arquivos renomeados pelo hash e suas versões
+    .gz e .br. Mantém os arquivos da geração anterior (páginas já abertas
+    ainda podem pedi-los) e remove os mais antigos. Retorna o manifesto.
+    """
+    with _build_lock(static_folder):
+        return _build_assets(static_folder)
+
+
+def ensure_assets(static_folder, rebuild=False):
+    """
+    Retorna o manifesto atual, gerando static/dist se o manifesto não existir,
+    estiver desatualizado ou se `rebuild` for verdadeiro. A verificação é
+    repetida sob o lock: só o primeiro worker a obtê-lo gera os arquivos.
+    """
+    with _build_lock(static_folder):
+        manifest = None if rebuild else load_manifest(static_folder)
+        if manifest is None or is_stale(static_folder, manifest):
+            if manifest is not None:
+                logging.warning("Manifesto dos arquivos estáticos desatualizado: gerando de novo")
+            manifest = _build_assets(static_folder)
+    return manifest
+
+
+def _build_assets(static_folder):
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    brotli = _brotli()
+    if brotli is None:
+        logging.warning("brotli não instalado: gerando apenas as versões gzip")
+
+    previous = load_manifest(static_folder) or {}
+    manifest = {}
+    for filename in _source_files(static_folder):
+        with open(os.path.join(static_folder, filename), 'rb') as f:
+            content = f.read()
+        hashed = fingerprint_name(filename, content)
+        manifest[filename] = hashed
+
+        target = os.path.join(dist, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        variants = {target: content,
+                    # mtime=0: o mesmo conteúdo gera sempre o mesmo arquivo
+                    f"{target}.gz": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[f"{target}.br"] = brotli.compress(content, quality=11)
+        for path, data in variants.items():
+            if not os.path.exists(path):
+                _write_atomic(path, data)
+
+    # Remove o que não pertence à geração atual nem à anterior
+    keep = set(manifest.values()) | set(previous.values())
+    for directory, _, files in os.walk(dist):
+        for name in files:
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, dist).replace(os.sep, '/')
+            base = relative[:-3] if relative.endswith(('.gz', '.br')) else relative
+            if relative not in (MANIFEST, BUILD_LOCK) and base not in keep:
+                os.remove(path)
+
+    _write_atomic(os.path.join(dist, MANIFEST),
+                  json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(static_folder):
+    """Manifesto gerado por build_assets (None se não existir ou for inválido)"""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def send_asset(dist, filename):
+    """Envia um arquivo com hash na melhor codificação aceita, como imutável"""
+    accepted = request.accept_encodings
+    encoding = None
+    for candidate, extension in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[candidate] and os.path.exists(os.path.join(dist, filename + extension)):
+            encoding = candidate
+            break
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if encoding is None:
+        response = send_from_directory(dist, filename, mimetype=mimetype,
+                                       max_age=IMMUTABLE_MAX_AGE)
+    else:
+        extension = '.br' if encoding == 'br' else '.gz'
+        response = send_from_directory(dist, filename + extension, mimetype=mimetype,
+                                       max_age=IMMUTABLE_MAX_AGE)
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _static_session_interface(base):
+    """
+    Interface de sessão que não grava a sessão nas respostas de arquivos
+    estáticos. O Flask-Login lê a sessão em toda requisição, o que acrescenta
+    "Vary: Cookie" à resposta e faria o navegador descartar os arquivos
+    imutáveis do cache sempre que o cookie de sessão mudasse.
+    """
+    class StaticSessionInterface(base):
+        def save_session(self, app, session, response):
+            if request.endpoint == 'static' and not session.modified:
+                return
+            super().save_session(app, session, response)
+
+    return StaticSessionInterface
+
+
+def init_app(app):
+    """
+    Com ASSETS_FINGERPRINT, carrega o manifesto (gerando-o se ainda não
+    existir, se não corresponder às fontes atuais ou se
+    ASSETS_BUILD_ON_STARTUP estiver ativo), reescreve os
+    url_for('static', ...) para os nomes com hash e serve esses arquivos
+    pré-comprimidos e imutáveis. Os demais arquivos estáticos seguem como antes.
+    """
+    if not app.config.get('ASSETS_FINGERPRINT') or not app.static_folder:
+        return
+
+    rebuild = app.config.get('ASSETS_BUILD_ON_STARTUP')
+    manifest = None if rebuild else load_manifest(app.static_folder)
+    if manifest is None or is_stale(app.static_folder, manifest):
+        manifest = ensure_assets(app.static_folder, rebuild=rebuild)
+    app.extensions['asset_manifest'] = manifest
+
+    dist = os.path.join(app.static_folder, DIST_DIR)
+    hashed_files = {f"{DIST_DIR}/{hashed}" for hashed in manifest.values()}
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static':
+            hashed = manifest.get(values.get('filename'))
+            if hashed is not None:
+                values['filename'] = f"{DIST_DIR}/{hashed}"
+
+    serve_static = app.view_functions['static']
+
+    def static(filename):
+        if filename in hashed_files:
+            return send_asset(dist, filename[len(DIST_DIR) + 1:])
+        return serve_static(filename=filename)
+
+    app.view_functions['static'] = static
+    app.session_interface = _static_session_interface(type(app.session_interface))()
@@ -0,0 +1,138 @@
+"""
+Bytes e requisições dos arquivos estáticos por carregamento do dashboard.
+
+Simula um navegador com cache HTTP carregando o dashboard duas vezes (primeira
+visita e visita seguinte) com ASSETS_FINGERPRINT desativado e ativado. O
+navegador busca os arquivos de /static referenciados pelo HTML, guarda as
+respostas e, na visita seguinte, reutiliza sem requisição as que ainda estão
+frescas (max-age/immutable) e revalida as demais (If-None-Match /
+If-Modified-Since). Os recursos de CDNs externas e o /api/history ficam de
+fora: não mudam entre os dois modos.
+
+Usa o cliente de testes do Flask e um SQLite temporário.
+
+Uso: python benchmarks/bench_assets.py [--encoding "br, gzip"]
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STATIC_URL = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+
+class BrowserCache:
+    """Cache HTTP mínimo: validadores e frescor de cada URL"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def store(self, url, response):
+        cache_control = response.headers.get('Cache-Control', '')
+        match = re.search(r'max-age=(\d+)', cache_control)
+        fresh = ('no-cache' not in cache_control
+                 and ('immutable' in cache_control or (match and int(match.group(1)) > 0)))
+        self.entries[url] = {'etag': response.headers.get('ETag'),
+                             'last_modified': response.headers.get('Last-Modified'),
+                             'fresh': fresh}
+
+    def conditional_headers(self, url):
+        entry = self.entries.get(url)
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def is_fresh(self, url):
+        entry = self.entries.get(url)
+        return entry is not None and entry['fresh']
+
+
+def load_dashboard(client, cache, encoding):
+    """Carrega o dashboard e seus arquivos estáticos. Retorna as estatísticas"""
+    stats = {'requests': 1, 'revalidated': 0, 'from_cache': 0, 'bytes': 0}
+    page = client.get('/dashboard')
+    assert page.status_code == 200, page.status_code
+    for url in STATIC_URL.findall(page.get_data(as_text=True)):
+        if cache.is_fresh(url):
+            stats['from_cache'] += 1
+            continue
+        headers = {'Accept-Encoding': encoding, **cache.conditional_headers(url)}
+        response = client.get(url, headers=headers)
+        stats['requests'] += 1
+        if response.status_code == 304:
+            stats['revalidated'] += 1
+        else:
+            assert response.status_code == 200, (url, response.status_code)
+            stats['bytes'] += len(response.data)
+            cache.store(url, response)
+        response.close()
+    return stats
+
+
+def measure(fingerprint, encoding):
+    os.environ['ASSETS_FINGERPRINT'] = '1' if fingerprint else '0'
+    from create_app import create_app, db
+    from hashing import hasher
+    from models import User
+
+    app = create_app()
+    with app.app_context():
+        email = f"assets-{int(fingerprint)}@exemplo.com"
+        db.session.add(User(name='Assets', email=email,
+                            password_hash=hasher.hash('senha-de-teste')))
+        db.session.commit()
+
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': 'senha-de-teste'})
+    assert response.status_code == 302, response.status_code
+    cache = BrowserCache()
+    return load_dashboard(client, cache, encoding), load_dashboard(client, cache, encoding)
+
+
+def describe(label, stats):
+    return (f"  {label:<18} {stats['requests']:>4} requisições "
+            f"({stats['revalidated']} revalidadas/304, {stats['from_cache']} do cache), "
+            f"{stats['bytes']:>7,} bytes de estáticos")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--encoding', default='br, gzip',
+                        help='Accept-Encoding enviado pelo navegador simulado')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'assets.db')}"
+    os.environ['DB_AUTO_CREATE'] = '1'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    logging.disable(logging.WARNING)
+
+    results = {}
+    for fingerprint in (False, True):
+        results[fingerprint] = measure(fingerprint, args.encoding)
+        label = 'com hash' if fingerprint else 'sem hash'
+        print(f"{label} (Accept-Encoding: {args.encoding}):")
+        first, repeat = results[fingerprint]
+        print(describe('primeira visita', first))
+        print(describe('visita seguinte', repeat))
+
+    print("economia por carregamento do dashboard:")
+    for index, label in ((0, 'primeira visita'), (1, 'visita seguinte')):
+        before, after = results[False][index], results[True][index]
+        saved = before['bytes'] - after['bytes']
+        ratio = saved / before['bytes'] if before['bytes'] else 0
+        print(f"  {label:<18} {before['requests'] - after['requests']} requisições e "
+              f"{saved:,} bytes a menos ({ratio:.0%})")
+
+
+if __name__ == '__main__':
+    main()
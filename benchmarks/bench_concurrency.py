@@ -0,0 +1,121 @@
+"""
+Teste de concorrência das submissões do questionário.
+
+Vários processos (como os workers do gunicorn) enviam o questionário ao mesmo
+tempo contra o mesmo banco; ao final, conta as linhas de Response dos usuários
+criados na execução, confere se todas as respostas foram gravadas e relata
+submissões por segundo. Sem --database-url usa um SQLite
+temporário; passe uma URL postgresql://... para testar o PostgreSQL.
+
+Uso: python benchmarks/bench_concurrency.py [--processes 8] [--submissions 50]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FORM = {
+    'q1': '21-25 anos', 'q2': 'Feminino', 'q3': '2º ano', 'q4': 'Saúde',
+    **{f"q{i}": str(i % 5) for i in range(5, 16)},
+    'q16': '2-4 horas por dia', 'q17': 'Raramente', 'q18': '5-6 horas',
+    'q19': 'Diariamente', 'q20': 'Pouco apoio', 'q21': 'Boa',
+    'q22': 'Quase nunca', 'q23': 'Neutro', 'q24': 'Atividade física',
+    'q25': 'Nunca procurei',
+}
+
+
+def create_test_app():
+    import logging
+    from create_app import create_app
+    app = create_app()
+    logging.disable(logging.CRITICAL)
+    # Senhas baratas: o foco aqui é o banco, não o hash
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    import hashing
+    hashing.init_app(app)
+    return app
+
+
+def worker(run_id, index, submissions, barrier, results):
+    app = create_test_app()
+    client = app.test_client()
+    email = f"concorrencia-{run_id}-{index}@exemplo.com"
+    client.post('/register', data={'name': 'Teste', 'email': email, 'password': 'senha'})
+    response = client.post('/login', data={'email': email, 'password': 'senha'})
+    if response.status_code != 302:
+        barrier.abort()
+        raise SystemExit(f"falha no login de {email}")
+
+    # Todos os processos começam juntos, depois do cadastro e do login
+    barrier.wait()
+    failures = 0
+    for _ in range(submissions):
+        response = client.post('/questionnaire', data=FORM, follow_redirects=True)
+        if 'Erro ao salvar' in response.get_data(as_text=True):
+            failures += 1
+    results.put(failures)
+
+
+def count_responses(run_id):
+    """Respostas gravadas para os usuários criados nesta execução"""
+    from sqlalchemy import func, select
+    from create_app import db
+    from models import Response, User
+    app = create_test_app()
+    with app.app_context():
+        return db.session.scalar(
+            select(func.count(Response.id)).join(User, User.id == Response.user_id)
+            .where(User.email.like(f"concorrencia-{run_id}-%")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-url')
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--submissions', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        directory = tempfile.mkdtemp()
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'concorrencia.db')}"
+
+    # Cria o esquema antes de iniciar os processos
+    create_test_app()
+
+    run_id = uuid.uuid4().hex[:8]
+    barrier = multiprocessing.Barrier(args.processes + 1)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker,
+                                args=(run_id, i, args.submissions, barrier, results))
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    # Aguarda o cadastro e o login de todos os processos
+    barrier.wait(timeout=120)
+    start = time.perf_counter()
+    failures = sum(results.get(timeout=600) for _ in processes)
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    total = args.processes * args.submissions
+    stored = count_responses(run_id)
+    print(f"banco: {os.environ['DATABASE_URL'].split('@')[-1]}")
+    print(f"{total} submissões de {args.processes} processos em {elapsed:.2f}s "
+          f"({total / elapsed:.0f}/s), falhas: {failures}, gravadas: {stored}")
+    if failures or stored != total:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
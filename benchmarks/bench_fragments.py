@@ -0,0 +1,118 @@
+"""
+Benchmark do GET de /questionnaire e /tips com e sem o cache de páginas.
+
+Mede, no cliente de testes do Flask, a latência (mediana e p95), o tempo de
+CPU por requisição, o tempo no servidor (do before_request ao after_request,
+sem o custo do próprio cliente de testes) e o tamanho da resposta para:
+- FRAGMENT_CACHE desativado (render_template a cada requisição);
+- FRAGMENT_CACHE ativado, sem e com Accept-Encoding: gzip;
+- FRAGMENT_CACHE ativado, revalidação com If-None-Match (304).
+
+Usa um SQLite temporário.
+
+Uso: python benchmarks/bench_fragments.py [--requests 500]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'senha-de-teste'
+
+
+def create_client(fragment_cache, server_times):
+    os.environ['FRAGMENT_CACHE'] = '1' if fragment_cache else '0'
+    from flask import g
+    from create_app import create_app, db
+    from hashing import hasher
+    from models import User
+
+    app = create_app()
+
+    @app.before_request
+    def start_timer():
+        g.bench_start = time.perf_counter()
+
+    @app.after_request
+    def stop_timer(response):
+        server_times.append(time.perf_counter() - g.bench_start)
+        return response
+
+    email = f"paginas-{int(fragment_cache)}@exemplo.com"
+    with app.app_context():
+        db.session.add(User(name='Páginas', email=email,
+                            password_hash=hasher.hash(PASSWORD)))
+        db.session.commit()
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': PASSWORD})
+    assert response.status_code == 302, response.status_code
+    # Consome a mensagem de boas-vindas
+    client.get('/dashboard')
+    return client
+
+
+def run(client, server_times, path, requests, headers, expected=200):
+    latencies = []
+    server_times.clear()
+    size = 0
+    cpu_start = time.process_time()
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == expected, response.status_code
+        size = len(response.data)
+    cpu = (time.process_time() - cpu_start) / requests
+    latencies.sort()
+    return {
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        'cpu_ms': cpu * 1000,
+        'server_ms': statistics.median(server_times) * 1000,
+        'bytes': size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'paginas.db')}"
+    os.environ['DB_AUTO_CREATE'] = '1'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    logging.disable(logging.WARNING)
+
+    uncached_times, cached_times = [], []
+    uncached = create_client(False, uncached_times)
+    cached = create_client(True, cached_times)
+    for path in ('/questionnaire', '/tips'):
+        # Aquecimento (compilação do template / pré-renderização)
+        uncached.get(path)
+        etag = cached.get(path, headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+        scenarios = (
+            ('sem cache', run(uncached, uncached_times, path, args.requests, {})),
+            ('cache', run(cached, cached_times, path, args.requests, {})),
+            ('cache + gzip', run(cached, cached_times, path, args.requests,
+                                 {'Accept-Encoding': 'gzip'})),
+            ('cache + 304', run(cached, cached_times, path, args.requests,
+                                {'Accept-Encoding': 'gzip', 'If-None-Match': etag}, 304)),
+        )
+        print(f"GET {path} ({args.requests} requisições):")
+        print(f"  {'cenário':<14} {'p50 ms':>8} {'p95 ms':>8} {'CPU ms':>8} "
+              f"{'servidor':>9} {'bytes':>8}")
+        for label, stats in scenarios:
+            print(f"  {label:<14} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+                  f"{stats['cpu_ms']:>8.2f} {stats['server_ms']:>9.3f} {stats['bytes']:>8,}")
+
+
+if __name__ == '__main__':
+    main()
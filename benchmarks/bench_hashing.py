@@ -0,0 +1,54 @@
+"""
+Benchmark do serviço de hash de senhas: verificações de login por segundo
+conforme cresce o número de workers do pool.
+
+Simula uma rajada de logins com vários clientes simultâneos (threads), cada um
+chamando PasswordHasher.verify, como fariam as threads de um worker gthread.
+
+Uso: python benchmarks/bench_hashing.py [--workers 0 1 2 4 8] [--logins 64]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hashing import DEFAULT_METHOD, PasswordHasher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4, 8])
+    parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--method', default=DEFAULT_METHOD)
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--clients', type=int, default=16)
+    args = parser.parse_args()
+
+    password_hash = PasswordHasher(method=args.method).hash('senha-de-teste')
+    print(f"método: {args.method}, pool: {args.pool}, clientes: {args.clients}")
+    print(f"{'workers':>8} {'logins/s':>10} {'ms/login':>10}")
+
+    for workers in args.workers:
+        hasher = PasswordHasher(method=args.method, workers=workers, pool=args.pool)
+        # Aquece o pool (criação de threads/processos)
+        hasher.verify(password_hash, 'senha-de-teste')
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as clients:
+            results = list(clients.map(
+                lambda _: hasher.verify(password_hash, 'senha-de-teste'),
+                range(args.logins)))
+        elapsed = time.perf_counter() - start
+        hasher.shutdown()
+
+        if not all(results):
+            raise SystemExit("Verificação de senha falhou")
+        print(f"{workers:>8} {args.logins / elapsed:>10.1f} "
+              f"{elapsed / args.logins * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
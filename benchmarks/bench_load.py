@@ -0,0 +1,336 @@
+"""
+Teste de carga das rotas da aplicação contra um gunicorn local.
+
+Cria um banco com --users usuários e --responses respostas, inicia o gunicorn
+com --workers processos e dispara --clients clientes simultâneos por
+--duration segundos. Cada cliente entra com um usuário cadastrado e alterna
+entre /dashboard, o envio do questionário e, ocasionalmente, /register e
+/login. Ao final relata, por rota, requisições por segundo e as latências
+p50/p95/p99, e grava os resultados em JSON.
+
+Sem --database-url usa um SQLite temporário; passe uma URL postgresql://...
+(local) para testar o PostgreSQL. Tudo roda sem acesso à rede externa.
+
+Para comparar com uma execução anterior (ex.: de outro commit):
+    python benchmarks/bench_load.py --output atual.json --compare base.json
+O código de saída é 1 se o p95 de alguma rota piorar mais que --tolerance.
+
+Uso: python benchmarks/bench_load.py [--users 200] [--responses 5000]
+     [--clients 8] [--duration 30] [--workers 2]
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FORM = {
+    'q1': '21-25 anos', 'q2': 'Feminino', 'q3': '2º ano', 'q4': 'Saúde',
+    **{f"q{i}": str(i % 5) for i in range(5, 16)},
+    'q16': '2-4 horas por dia', 'q17': 'Raramente', 'q18': '5-6 horas',
+    'q19': 'Diariamente', 'q20': 'Pouco apoio', 'q21': 'Boa',
+    'q22': 'Quase nunca', 'q23': 'Neutro', 'q24': 'Atividade física',
+    'q25': 'Nunca procurei',
+}
+
+PASSWORD = 'senha-de-teste'
+
+# Proporção das operações de cada cliente (o login inicial é sempre medido)
+MIX = (('dashboard', 0.70), ('questionnaire', 0.25), ('register', 0.03),
+       ('login', 0.02))
+
+
+def seed(users, responses):
+    """Cria os usuários e as respostas de teste. Retorna os e-mails"""
+    import logging
+    from create_app import create_app, db
+    from hashing import hasher
+    from models import User
+    from scoring import evaluate_responses
+    from submissions import build_submission, write_submissions
+
+    app = create_app()
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(42)
+    with app.app_context():
+        # O mesmo hash para todos: o cadastro em massa não é o que se mede
+        password_hash = hasher.hash(PASSWORD)
+        emails = [f"carga-{i}@exemplo.com" for i in range(users)]
+        db.session.add_all(User(name=f"Carga {i}", email=email,
+                                password_hash=password_hash)
+                           for i, email in enumerate(emails))
+        db.session.commit()
+        user_ids = list(db.session.scalars(
+            db.select(User.id).where(User.email.in_(emails))))
+
+        start = datetime.now() - timedelta(days=365)
+        batch = []
+        for i in range(responses):
+            form = {**FORM, **{f"q{q}": str(rng.randint(0, 4)) for q in range(5, 16)}}
+            timestamp = start + timedelta(minutes=i * 365 * 24 * 60 // max(responses, 1))
+            batch.append(build_submission(
+                rng.choice(user_ids), form, evaluate_responses(form), timestamp))
+            if len(batch) == 1000:
+                write_submissions(batch)
+                db.session.commit()
+                batch = []
+        if batch:
+            write_submissions(batch)
+            db.session.commit()
+    logging.disable(logging.NOTSET)
+    return emails
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, workers, env):
+    """Inicia o gunicorn e espera até ele responder"""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--chdir', ROOT,
+         '--workers', str(workers), '--bind', f"127.0.0.1:{port}",
+         '--log-level', 'warning', 'main:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('O gunicorn terminou durante a inicialização')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit('O gunicorn não respondeu em 60s')
+
+
+class Client:
+    """Cliente HTTP com cookie de sessão; não segue redirecionamentos"""
+
+    def __init__(self, port):
+        self.port = port
+        self.connection = None
+        self.cookies = {}
+
+    def request(self, method, path, form=None):
+        body = urllib.parse.urlencode(form) if form is not None else None
+        headers = {}
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in self.cookies.items())
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    '127.0.0.1', self.port, timeout=30)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Conexão encerrada pelo servidor (workers síncronos)
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            name, _, rest = header.partition('=')
+            self.cookies[name.strip()] = rest.split(';', 1)[0]
+        return response.status, response.headers.get('Location', '')
+
+    def login(self, email):
+        """Entra com o usuário; sucesso é o redirecionamento para o dashboard"""
+        status, location = self.request(
+            'POST', '/login', {'email': email, 'password': PASSWORD})
+        return status == 302 and '/dashboard' in location
+
+
+def run_client(port, email, deadline, rng, results, lock):
+    client = Client(port)
+    samples = []
+
+    def timed(route, operation):
+        start = time.perf_counter()
+        try:
+            ok = operation()
+        except OSError:
+            ok = False
+        samples.append((route, time.perf_counter() - start, ok))
+
+    timed('login', lambda: client.login(email))
+    routes, weights = zip(*MIX)
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, weights)[0]
+        if route == 'dashboard':
+            timed(route, lambda: client.request('GET', '/dashboard')[0] == 200)
+        elif route == 'questionnaire':
+            # Sucesso e falha redirecionam para o dashboard; a falha só
+            # aparece na mensagem, então basta conferir o redirecionamento
+            timed(route, lambda: client.request('POST', '/questionnaire', FORM)[0] == 302)
+        elif route == 'register':
+            # Outro cliente, para não trocar a sessão deste
+            new_email = f"novo-{rng.getrandbits(48):x}@exemplo.com"
+            timed(route, lambda: Client(port).request('POST', '/register', {
+                'name': 'Novo', 'email': new_email, 'password': PASSWORD})[0] == 302)
+        else:
+            # Login completo (com verificação da senha) em uma sessão nova
+            timed(route, lambda: Client(port).login(email))
+    with lock:
+        results.extend(samples)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    routes = {}
+    for route in sorted({route for route, _, _ in samples}):
+        latencies = sorted(duration for r, duration, _ in samples if r == route)
+        errors = sum(1 for r, _, ok in samples if r == route and not ok)
+        routes[route] = {
+            'requests': len(latencies),
+            'errors': errors,
+            'rps': round(len(latencies) / elapsed, 2),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        }
+    return routes
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path, tolerance):
+    """Compara o p95 de cada rota com a execução base. Retorna as regressões"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = []
+    print(f"\ncomparação com {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for route, stats in current['routes'].items():
+        base = baseline['routes'].get(route)
+        if not base:
+            continue
+        change = (stats['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0
+        rps_change = (stats['rps'] - base['rps']) / base['rps'] if base['rps'] else 0
+        flag = ''
+        if change > tolerance:
+            regressions.append(route)
+            flag = '  <- regressão'
+        print(f"  {route:<14} p95 {base['p95_ms']:>8.1f} -> {stats['p95_ms']:>8.1f} ms "
+              f"({change:+.0%})  req/s {rps_change:+.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--responses', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='bench_load.json')
+    parser.add_argument('--compare', help='JSON de uma execução anterior')
+    parser.add_argument('--tolerance', type=float, default=0.20,
+                        help='Piora aceita no p95 antes de acusar regressão')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        directory = tempfile.mkdtemp()
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'carga.db')}"
+
+    started = time.perf_counter()
+    emails = seed(args.users, args.responses)
+    print(f"banco: {os.environ['DATABASE_URL'].split('@')[-1]} "
+          f"({args.users} usuários, {args.responses} respostas em "
+          f"{time.perf_counter() - started:.1f}s)")
+
+    port = free_port()
+    server = start_server(port, args.workers, dict(os.environ))
+    try:
+        rng = random.Random(args.seed)
+        results = []
+        lock = threading.Lock()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        threads = [
+            threading.Thread(target=run_client, args=(
+                port, rng.choice(emails), deadline, random.Random(rng.random()),
+                results, lock))
+            for _ in range(args.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'database': os.environ['DATABASE_URL'].split(':', 1)[0],
+            **{key: value for key, value in vars(args).items()
+               if key not in ('database_url', 'output', 'compare')},
+        },
+        'elapsed_s': round(elapsed, 2),
+        'total_rps': round(len(results) / elapsed, 2),
+        'routes': summarize(results, elapsed),
+    }
+
+    print(f"{len(results)} requisições em {elapsed:.1f}s ({report['total_rps']:.0f}/s)")
+    print(f"  {'rota':<14} {'req':>6} {'erros':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route, stats in report['routes'].items():
+        print(f"  {route:<14} {stats['requests']:>6} {stats['errors']:>6} "
+              f"{stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"resultados gravados em {args.output}")
+
+    if args.compare and compare(report, args.compare, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
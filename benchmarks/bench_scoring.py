@@ -0,0 +1,80 @@
+"""
+Benchmark da pontuação de Burnout: laço por linha (score_responses) contra a
+pontuação vetorizada em lote (score_batch).
+
+Uso: python benchmarks/bench_scoring.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from scoring import (COMPILED_SPEC, MISSING_CODE, QUESTION_COLUMNS,
+                     score_batch, score_responses)
+
+
+def random_codes(n_rows, seed=0):
+    """Gera uma matriz (n, 25) de códigos de respostas válidos, com faltantes"""
+    rng = np.random.default_rng(seed)
+    matrix = np.full((n_rows, len(QUESTION_COLUMNS)), MISSING_CODE, dtype=np.int64)
+    for i, q in enumerate(QUESTION_COLUMNS):
+        if q in COMPILED_SPEC.dimension_of:
+            n_options = COMPILED_SPEC.max_answer + 1
+        elif q in COMPILED_SPEC.lifestyle_options:
+            n_options = len(COMPILED_SPEC.lifestyle_options[q])
+        else:
+            continue
+        codes = rng.integers(0, n_options, n_rows)
+        # Cerca de 2% das questões ficam sem resposta
+        matrix[:, i] = np.where(rng.random(n_rows) < 0.02, MISSING_CODE, codes)
+    return matrix
+
+
+def rows_as_form_dicts(matrix):
+    """Converte a matriz de códigos em dicionários no formato do formulário"""
+    rows = []
+    for codes in matrix.tolist():
+        row = {}
+        for q, code in zip(QUESTION_COLUMNS, codes):
+            if code == MISSING_CODE:
+                continue
+            if q in COMPILED_SPEC.lifestyle_options:
+                row[q] = COMPILED_SPEC.lifestyle_options[q][code]
+            elif q in COMPILED_SPEC.dimension_of:
+                row[q] = str(code)
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'laço (linhas/s)':>18} {'lote (linhas/s)':>18} {'ganho':>8}")
+    for n_rows in args.sizes:
+        matrix = random_codes(n_rows)
+        rows = rows_as_form_dicts(matrix)
+
+        start = time.perf_counter()
+        loop_scores = [score_responses(row) for row in rows]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch_scores = score_batch(matrix)
+        batch_time = time.perf_counter() - start
+
+        if not np.array_equal(np.asarray(loop_scores), batch_scores):
+            raise SystemExit("Divergência entre score_responses e score_batch")
+
+        print(f"{n_rows:>10} {n_rows / loop_time:>18,.0f} "
+              f"{n_rows / batch_time:>18,.0f} {loop_time / batch_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
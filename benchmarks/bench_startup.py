@@ -0,0 +1,151 @@
+"""
+Benchmark da inicialização da aplicação.
+
+1. Importação de main (create_app) em um processo novo, no modo de
+   desenvolvimento (create_all e upgrade_schema a cada boot) e no de produção
+   (APP_ENV=production, esquema criado antes com init-db).
+2. Boot do gunicorn com e sem --preload: tempo até a primeira resposta e
+   tempo de inicialização de cada worker (do fork até a aplicação carregada),
+   que é o custo pago a cada worker novo ao escalar.
+
+Usa um SQLite temporário. O gunicorn precisa estar instalado para a parte 2.
+
+Uso: python benchmarks/bench_startup.py [--runs 5] [--workers 2]
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_import(env, runs):
+    """Tempos de `import main` em processos novos (segundos)"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_SNIPPET], cwd=ROOT, env=env,
+            capture_output=True, text=True, check=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def write_config(directory, log_path):
+    """Configuração que estende gunicorn.conf.py registrando o boot dos workers"""
+    path = os.path.join(directory, 'gunicorn_bench.conf.py')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"""
+import time
+exec(open({os.path.join(ROOT, 'gunicorn.conf.py')!r}).read())
+_post_fork = post_fork
+
+def post_fork(server, worker):
+    worker.bench_forked = time.perf_counter()
+    _post_fork(server, worker)
+
+def post_worker_init(worker):
+    with open({log_path!r}, 'a') as log:
+        log.write(f"{{time.perf_counter() - worker.bench_forked}}\\n")
+""")
+    return path
+
+
+def time_gunicorn(env, workers, preload, directory):
+    """Retorna (segundos até a primeira resposta, boot de cada worker)"""
+    log_path = os.path.join(directory, f"workers-{preload}.log")
+    if os.path.exists(log_path):
+        os.remove(log_path)
+    config = write_config(directory, log_path)
+    port = free_port()
+    env = {**env, 'GUNICORN_PRELOAD': '1' if preload else '0', 'PORT': str(port),
+           'WEB_CONCURRENCY': str(workers)}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', config, '--chdir', ROOT,
+         '--bind', f"127.0.0.1:{port}", 'main:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first_response = None
+        while time.perf_counter() - start < 60:
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+                connection.request('GET', '/login')
+                if connection.getresponse().status == 200:
+                    first_response = time.perf_counter() - start
+                    break
+            except OSError:
+                time.sleep(0.01)
+        # Aguarda todos os workers registrarem o boot
+        deadline = time.perf_counter() + 30
+        boots = []
+        while time.perf_counter() < deadline:
+            if os.path.exists(log_path):
+                with open(log_path, encoding='utf-8') as f:
+                    boots = [float(line) for line in f if line.strip()]
+                if len(boots) >= workers:
+                    break
+            time.sleep(0.05)
+        return first_response, boots
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def ms(values):
+    return f"{statistics.median(values) * 1000:7.1f} ms (mediana de {len(values)})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--skip-gunicorn', action='store_true')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    env = {**os.environ,
+           'DATABASE_URL': f"sqlite:///{os.path.join(directory, 'startup.db')}",
+           'LOG_LEVEL': 'WARNING'}
+    env.pop('APP_ENV', None)
+
+    # Cria o esquema uma vez, como na implantação
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'main', 'init-db'],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+
+    development = time_import(env, args.runs)
+    production = time_import({**env, 'APP_ENV': 'production'}, args.runs)
+    print("import main / create_app:")
+    print(f"  desenvolvimento: {ms(development)}")
+    print(f"  produção:        {ms(production)}")
+
+    if args.skip_gunicorn:
+        return
+    print(f"gunicorn ({args.workers} workers, produção):")
+    for preload in (False, True):
+        first, boots = time_gunicorn({**env, 'APP_ENV': 'production'},
+                                     args.workers, preload, directory)
+        label = 'com --preload' if preload else 'sem --preload'
+        first_text = f"{first * 1000:.0f} ms" if first is not None else "sem resposta"
+        boot_text = ms(boots) if boots else "não registrado"
+        print(f"  {label}: primeira resposta em {first_text}; boot por worker {boot_text}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark da gravação das submissões: gravação direta (uma transação por
+submissão) contra a fila de gravação (SUBMISSION_QUEUE), que agrupa as
+submissões simultâneas em uma transação.
+
+Várias threads, como as de um worker gthread do gunicorn, chamam
+save_questionnaire_responses ao mesmo tempo contra um SQLite temporário
+(ou --database-url).
+
+Uso: python benchmarks/bench_write_queue.py [--threads 32] [--submissions 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FORM = {
+    'q1': '21-25 anos', **{f"q{i}": str(i % 5) for i in range(5, 16)},
+    'q16': '2-4 horas por dia', 'q18': '5-6 horas', 'q25': 'Nunca procurei',
+}
+
+
+def run(queue_enabled, threads, submissions, database_url):
+    import logging
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['SUBMISSION_QUEUE'] = '1' if queue_enabled else '0'
+    from create_app import create_app, db
+    from models import User
+    from routes import save_questionnaire_responses
+    from scoring import evaluate_responses
+
+    app = create_app()
+    logging.disable(logging.CRITICAL)
+    with app.app_context():
+        users = [User(name='Bench', email=f"bench-{queue_enabled}-{i}@exemplo.com",
+                      password_hash='-') for i in range(threads)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+
+    result = evaluate_responses(FORM)
+
+    def client(user_id):
+        failures = 0
+        for _ in range(submissions):
+            with app.test_request_context():
+                if not save_questionnaire_responses(user_id, FORM, result):
+                    failures += 1
+        return failures
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        failures = sum(pool.map(client, user_ids))
+    elapsed = time.perf_counter() - start
+    return threads * submissions / elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-url')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--submissions', type=int, default=20)
+    args = parser.parse_args()
+
+    database_url = args.database_url or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'fila.db')}"
+    print(f"{'modo':>8} {'submissões/s':>14} {'falhas':>8}")
+    for queue_enabled in (False, True):
+        rate, failures = run(queue_enabled, args.threads, args.submissions, database_url)
+        print(f"{'fila' if queue_enabled else 'direta':>8} {rate:>14.0f} {failures:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# Camada de cache plugável para dados derivados do banco (ex.: o dashboard).
+#
+# MemoryCache é um LRU em memória do processo, com expiração (TTL) e limite de
+# memória. SharedCache guarda os valores serializados em um backend
+# compartilhado entre processos: RedisBackend em produção ou LocalBackend,
+# um substituto local com a mesma interface. Ambos expõem contadores em stats().
+
+
+class CacheStats:
+    """Contadores de uso de um cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'sets': self.sets,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+        }
+
+
+class MemoryCache:
+    """Cache LRU em memória com TTL e limite aproximado de bytes"""
+
+    def __init__(self, max_entries=10000, ttl=300, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.counters = CacheStats()
+        # chave -> (expira_em, tamanho, valor)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.counters.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters.hits += 1
+            return entry[2]
+
+    def set(self, key, value):
+        # O tamanho é estimado pela serialização do valor
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            self.counters.sets += 1
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.counters.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self.counters.invalidations += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters.as_dict(),
+                    'entries': len(self._entries),
+                    'bytes': self._bytes}
+
+
+class LocalBackend:
+    """Backend compartilhado local (dicionário em memória), com a interface do Redis"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return payload
+
+    def set(self, key, payload, ex):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ex, payload)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisBackend:
+    """Backend compartilhado em um servidor Redis (requer o pacote redis)"""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "O cache compartilhado requer o pacote redis (pip install redis)") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self._client.get(key)
+
+    def set(self, key, payload, ex):
+        self._client.set(key, payload, ex=ex)
+
+    def delete(self, key):
+        self._client.delete(key)
+
+
+class SharedCache:
+    """Cache em backend compartilhado; os valores são serializados com pickle"""
+
+    def __init__(self, backend, ttl=300, prefix='burnout:'):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.counters = CacheStats()
+
+    def get(self, key):
+        try:
+            payload = self.backend.get(self.prefix + key)
+        except Exception as e:
+            # Uma falha no backend não deve derrubar a página
+            logging.error(f"Erro ao ler do cache compartilhado: {e}")
+            payload = None
+        if payload is None:
+            self.counters.misses += 1
+            return None
+        self.counters.hits += 1
+        return pickle.loads(payload)
+
+    def set(self, key, value):
+        try:
+            self.backend.set(self.prefix + key,
+                             pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=self.ttl)
+            self.counters.sets += 1
+        except Exception as e:
+            logging.error(f"Erro ao gravar no cache compartilhado: {e}")
+
+    def delete(self, key):
+        try:
+            self.backend.delete(self.prefix + key)
+            self.counters.invalidations += 1
+        except Exception as e:
+            logging.error(f"Erro ao invalidar o cache compartilhado: {e}")
+
+    def stats(self):
+        return self.counters.as_dict()
+
+
+def create_cache(config, prefix='DASHBOARD_CACHE'):
+    """
+    Cria o cache descrito na configuração da aplicação:
+    <prefix> ('memory', 'shared' ou 'none'), <prefix>_TTL,
+    <prefix>_MAX_ENTRIES, <prefix>_MAX_BYTES e <prefix>_URL (backend
+    compartilhado; 'local://' usa o LocalBackend).
+    """
+    kind = config.get(prefix, 'memory')
+    ttl = config.get(f"{prefix}_TTL", 300)
+    if kind == 'none':
+        return None
+    if kind == 'shared':
+        url = config.get(f"{prefix}_URL", 'local://')
+        backend = LocalBackend() if url.startswith('local://') else RedisBackend(url)
+        return SharedCache(backend, ttl=ttl)
+    return MemoryCache(
+        max_entries=config.get(f"{prefix}_MAX_ENTRIES", 10000),
+        ttl=ttl,
+        max_bytes=config.get(f"{prefix}_MAX_BYTES", 32 * 1024 * 1024))
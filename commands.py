@@ -0,0 +1,166 @@
+import json
+import click
+import sys
+
+# Comandos de linha de comando da aplicação (flask --app main <comando>)
+#
+# Os módulos usados apenas pelos comandos são importados dentro de cada um,
+# para não pesar na inicialização dos workers.
+
+
+def init_app(app):
+    @app.cli.command('init-db')
+    def init_db():
+        """Cria as tabelas e aplica as colunas e índices novos do esquema."""
+        from create_app import init_schema
+        init_schema()
+        click.echo('Esquema do banco atualizado')
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Gera os arquivos estáticos com hash e as versões gzip/brotli."""
+        from assets import build_assets
+        manifest = build_assets(app.static_folder)
+        for filename, hashed in sorted(manifest.items()):
+            click.echo(f"{filename} -> {hashed}")
+
+    @app.cli.command('rescore')
+    @click.option('--chunk-size', default=5000, show_default=True,
+                  help='Respostas lidas e gravadas por transação.')
+    @click.option('--workers', type=int, default=None,
+                  help='Processos de pontuação (1 pontua no próprio processo).')
+    def rescore(chunk_size, workers):
+        """Recalcula as pontuações armazenadas com a versão atual da fórmula."""
+        from rescore import rescore_responses
+        stats = rescore_responses(chunk_size=chunk_size, workers=workers)
+        rate = stats['rescored'] / stats['seconds'] if stats['seconds'] else 0
+        click.echo(
+            f"{stats['rescored']} respostas recalculadas para a versão "
+            f"{stats['version']} em {stats['seconds']:.1f}s ({rate:,.0f} linhas/s)")
+        if stats['skipped_legacy']:
+            click.echo(
+                f"{stats['skipped_legacy']} respostas antigas ignoradas: "
+                "as respostas de estilo de vida não foram armazenadas")
+        if stats['backfilled_legacy']:
+            click.echo(
+                f"{stats['backfilled_legacy']} respostas antigas receberam as "
+                "somas das dimensões do MBI")
+
+    @app.cli.command('export')
+    @click.option('--format', 'file_format', default='csv', show_default=True,
+                  type=click.Choice(['csv', 'parquet', 'arrow']))
+    @click.option('--output', '-o', default='-', show_default=True,
+                  help='Arquivo de saída (- para a saída padrão, só CSV).')
+    @click.option('--chunk-size', default=10000, show_default=True,
+                  help='Linhas lidas do cursor por bloco.')
+    def export(file_format, output, chunk_size):
+        """Exporta as avaliações com os dados dos usuários."""
+        from export import ExportStats, iter_csv, write_columnar
+        stats = ExportStats()
+        if file_format == 'csv':
+            stream = sys.stdout if output == '-' else open(
+                output, 'w', newline='', encoding='utf-8')
+            try:
+                for text in iter_csv(chunk_size, stats):
+                    stream.write(text)
+            finally:
+                if stream is not sys.stdout:
+                    stream.close()
+        else:
+            if output == '-':
+                raise click.UsageError('Informe --output para Parquet/Arrow.')
+            write_columnar(output, file_format, chunk_size, stats)
+        click.echo(f"{stats.rows} linhas exportadas em {stats.seconds:.1f}s "
+                   f"({stats.rows_per_second:,.0f} linhas/s)", err=True)
+
+    @app.cli.command('import-responses')
+    @click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--rejects', 'reject_file', type=click.File('w', encoding='utf-8'),
+                  default=None, help='CSV onde gravar as linhas rejeitadas.')
+    @click.option('--chunk-size', default=5000, show_default=True,
+                  help='Linhas validadas e gravadas por transação.')
+    def import_responses_command(source, reject_file, chunk_size):
+        """Importa questionários de um CSV (email, q1..q25, timestamp)."""
+        from importer import import_responses
+        stats = import_responses(source, reject_file, chunk_size)
+        rate = stats.imported / stats.seconds if stats.seconds else 0
+        click.echo(f"{stats.imported} respostas importadas, {stats.rejected} "
+                   f"rejeitadas em {stats.seconds:.1f}s ({rate:,.0f} linhas/s)")
+
+    @app.cli.command('rebuild-aggregates')
+    @click.option('--chunk-size', default=10000, show_default=True,
+                  help='Respostas lidas por bloco.')
+    def rebuild_aggregates(chunk_size):
+        """Recalcula os agregados semanais a partir de todas as respostas."""
+        from aggregates import rebuild_rollups
+        total = rebuild_rollups(chunk_size)
+        click.echo(f"Agregados recalculados a partir de {total} respostas")
+
+    @app.cli.command('archive-responses')
+    @click.option('--horizon-days', type=int, default=None,
+                  help='Arquiva as respostas com mais de N dias (padrão: ARCHIVE_HORIZON_DAYS).')
+    @click.option('--chunk-size', default=5000, show_default=True,
+                  help='Respostas arquivadas por lote.')
+    def archive_responses_command(horizon_days, chunk_size):
+        """Move as respostas antigas para o arquivo comprimido."""
+        from archive import archive_responses
+        stats = archive_responses(horizon_days, chunk_size)
+        if stats['reconciled']:
+            click.echo(f"{stats['reconciled']} lotes pendentes de uma execução anterior resolvidos")
+        click.echo(
+            f"{stats['archived']} respostas anteriores a {stats['cutoff']:%Y-%m-%d} "
+            f"arquivadas em {stats['batches']} lotes ({stats['seconds']:.1f}s); "
+            f"arquivo com {stats['bytes'] / 1024 / 1024:.1f} MB comprimidos")
+
+    @app.cli.command('dispatch-alerts')
+    @click.option('--batch-size', default=100, show_default=True,
+                  help='Alertas enviados por lote.')
+    @click.option('--max-attempts', default=5, show_default=True,
+                  help='Tentativas antes de desistir de um alerta.')
+    @click.option('--loop', 'interval', type=float, default=None,
+                  help='Continua executando, verificando a fila a cada N segundos.')
+    def dispatch_alerts_command(batch_size, max_attempts, interval):
+        """Envia os alertas de risco pendentes na caixa de saída."""
+        from alerts import create_handler, dispatch_alerts, run_dispatcher
+        handler = create_handler(app.config)
+        if interval:
+            run_dispatcher(handler, interval, batch_size, max_attempts)
+        sent, failed = dispatch_alerts(handler, batch_size, max_attempts)
+        click.echo(f"{sent} alertas enviados, {failed} com falha")
+
+    @app.cli.command('profiling')
+    @click.option('--rate', type=float, default=None,
+                  help='Fração das requisições perfiladas (0 desativa o sorteio).')
+    @click.option('--only', 'endpoints', multiple=True,
+                  help='Perfila apenas este endpoint (repetível).')
+    @click.option('--all', 'all_endpoints', is_flag=True,
+                  help='Volta a perfilar todos os endpoints.')
+    @click.option('--enable', multiple=True,
+                  help='Retira o endpoint da lista de desativados (repetível).')
+    @click.option('--disable', multiple=True,
+                  help='Nunca perfila este endpoint (repetível).')
+    @click.option('--reset', is_flag=True,
+                  help='Remove os ajustes e volta à configuração da aplicação.')
+    def profiling_command(rate, endpoints, all_endpoints, enable, disable, reset):
+        """Ajusta o profiler dos workers em execução (sem reiniciá-los)."""
+        from profiling import profile_directory, read_control, write_control
+        directory = profile_directory(app)
+        settings = app.extensions.get('profiler')
+        if reset:
+            values = {}
+        else:
+            values = read_control(directory)
+            if settings is not None:
+                values = {**settings.defaults, **values}
+            if rate is not None:
+                values['rate'] = rate
+            if all_endpoints:
+                values['endpoints'] = []
+            if endpoints:
+                values['endpoints'] = sorted(set(values.get('endpoints', [])) | set(endpoints))
+            disabled = (set(values.get('disabled', [])) | set(disable)) - set(enable)
+            values['disabled'] = sorted(disabled)
+        write_control(directory, values)
+        if settings is None:
+            click.echo('Aviso: PROFILING_ENABLED está desativado neste ambiente.', err=True)
+        click.echo(json.dumps(values, indent=2))
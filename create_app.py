@@ -2,36 +2,207 @@ import os
 import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-
-# Configurar o logging
-logging.basicConfig(level=logging.DEBUG)
+import database
+from settings import env_bool
 
 # Inicializar o SQLAlchemy
 db = SQLAlchemy()
 
 
+def configure_logging():
+    """
+    Configura o logging a partir de LOG_LEVEL (padrão: DEBUG em
+    desenvolvimento e INFO em produção) e LOG_FORMAT
+    """
+    production = os.environ.get("APP_ENV", "development") == "production"
+    level = os.environ.get("LOG_LEVEL", "INFO" if production else "DEBUG").upper()
+    logging.basicConfig(
+        level=level,
+        format=os.environ.get(
+            "LOG_FORMAT", "%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s"))
+    logging.getLogger().setLevel(level)
+
+
 def create_app():
+    configure_logging()
+
     # Criar a aplicação Flask
     app = Flask(__name__)
 
+    # Modo de inicialização: em produção o esquema do banco não é criado nem
+    # atualizado a cada boot (use "flask init-db" na implantação)
+    app.config["APP_ENV"] = os.environ.get("APP_ENV", "development")
+    app.config["DB_AUTO_CREATE"] = env_bool(
+        "DB_AUTO_CREATE", app.config["APP_ENV"] != "production")
+
     # Configurar a aplicação
     app.secret_key = os.environ.get(
         "SESSION_SECRET", "burnout-prevention-secret-key")
 
-    # Configurar o banco de dados - usando SQLite
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///burnout_prevention.db"
+    # E-mails da equipe com acesso às rotas administrativas (separados por vírgula)
+    app.config["ADMIN_EMAILS"] = {
+        email.strip().lower()
+        for email in os.environ.get("ADMIN_EMAILS", "").split(",") if email.strip()
+    }
+
+    # Configurar o banco de dados - SQLite por padrão ou DATABASE_URL
+    # (ex.: postgresql://...), com as opções do engine de database.py
+    app.config["SQLALCHEMY_DATABASE_URI"] = database.database_url()
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = database.engine_options(
+        app.config["SQLALCHEMY_DATABASE_URI"])
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # Histórico do dashboard: limite de pontos do gráfico e modo de redução
+    # ('lttb', 'week' ou 'none')
+    app.config["HISTORY_MAX_POINTS"] = int(
+        os.environ.get("HISTORY_MAX_POINTS", 120))
+    app.config["HISTORY_DOWNSAMPLING"] = os.environ.get(
+        "HISTORY_DOWNSAMPLING", "lttb")
+
+    # Cache dos dados do dashboard ('memory', 'shared' ou 'none')
+    app.config["DASHBOARD_CACHE"] = os.environ.get("DASHBOARD_CACHE", "memory")
+    app.config["DASHBOARD_CACHE_TTL"] = int(
+        os.environ.get("DASHBOARD_CACHE_TTL", 300))
+    app.config["DASHBOARD_CACHE_MAX_ENTRIES"] = int(
+        os.environ.get("DASHBOARD_CACHE_MAX_ENTRIES", 10000))
+    app.config["DASHBOARD_CACHE_MAX_BYTES"] = int(
+        os.environ.get("DASHBOARD_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    app.config["DASHBOARD_CACHE_URL"] = os.environ.get(
+        "DASHBOARD_CACHE_URL", "local://")
+
+    # Hash de senhas: método/custo do werkzeug e pool de cálculo
+    # (PASSWORD_HASH_WORKERS=0 calcula na própria thread da requisição)
+    app.config["PASSWORD_HASH_METHOD"] = os.environ.get(
+        "PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    app.config["PASSWORD_HASH_WORKERS"] = int(
+        os.environ.get("PASSWORD_HASH_WORKERS", 0))
+    app.config["PASSWORD_HASH_POOL"] = os.environ.get(
+        "PASSWORD_HASH_POOL", "thread")
+    app.config["PASSWORD_HASH_MAX_PENDING"] = int(
+        os.environ.get("PASSWORD_HASH_MAX_PENDING", 64))
+
+    # Fila de gravação das submissões do questionário (desativada por padrão):
+    # agrupa até MAX_BATCH submissões ou MAX_WAIT_MS milissegundos por transação
+    app.config["SUBMISSION_QUEUE"] = env_bool("SUBMISSION_QUEUE", False)
+    app.config["SUBMISSION_QUEUE_MAX_BATCH"] = int(
+        os.environ.get("SUBMISSION_QUEUE_MAX_BATCH", 100))
+    app.config["SUBMISSION_QUEUE_MAX_WAIT_MS"] = int(
+        os.environ.get("SUBMISSION_QUEUE_MAX_WAIT_MS", 20))
+    app.config["SUBMISSION_QUEUE_TIMEOUT"] = float(
+        os.environ.get("SUBMISSION_QUEUE_TIMEOUT", 5))
+
+    # Detecção de risco: alerta quando a pontuação chega a RISK_THRESHOLD ou
+    # supera em RISK_WORSENING_DELTA a média das últimas RISK_WINDOW_SIZE
+    # avaliações; os alertas são enviados a ALERT_WEBHOOK_URL (vazio: log)
+    app.config["RISK_THRESHOLD"] = float(os.environ.get("RISK_THRESHOLD", 70))
+    app.config["RISK_WORSENING_DELTA"] = float(
+        os.environ.get("RISK_WORSENING_DELTA", 15))
+    app.config["RISK_WINDOW_SIZE"] = int(os.environ.get("RISK_WINDOW_SIZE", 5))
+    app.config["ALERT_WEBHOOK_URL"] = os.environ.get("ALERT_WEBHOOK_URL", "")
+
+    # Métricas de desempenho em /metrics (latência por endpoint, consultas SQL,
+    # templates e pontuação); METRICS_TOKEN protege o endpoint para coletores
+    # e METRICS_SERVER_TIMING acrescenta o cabeçalho Server-Timing
+    app.config["METRICS_ENABLED"] = env_bool("METRICS_ENABLED", False)
+    app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN", "")
+    app.config["METRICS_SERVER_TIMING"] = env_bool("METRICS_SERVER_TIMING", False)
+
+    # Profiler por amostragem (desativado por padrão): perfila a fração
+    # PROFILE_SAMPLE_RATE das requisições, ou as da equipe com o cabeçalho
+    # PROFILE_HEADER, gravando os PROFILE_MAX_FILES perfis mais recentes em
+    # PROFILE_DIR (padrão: instance/profiles) no formato PROFILE_FORMAT
+    # ('collapsed' ou 'speedscope'); ver também "flask profiling"
+    app.config["PROFILING_ENABLED"] = env_bool("PROFILING_ENABLED", False)
+    app.config["PROFILE_SAMPLE_RATE"] = float(
+        os.environ.get("PROFILE_SAMPLE_RATE", 0))
+    app.config["PROFILE_HEADER"] = os.environ.get("PROFILE_HEADER", "X-Profile")
+    app.config["PROFILE_INTERVAL_MS"] = float(
+        os.environ.get("PROFILE_INTERVAL_MS", 5))
+    app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR", "")
+    app.config["PROFILE_MAX_FILES"] = int(os.environ.get("PROFILE_MAX_FILES", 100))
+    app.config["PROFILE_FORMAT"] = os.environ.get("PROFILE_FORMAT", "collapsed")
+    # Endpoints perfilados (vazio: todos) e endpoints nunca perfilados
+    app.config["PROFILE_ENDPOINTS"] = os.environ.get("PROFILE_ENDPOINTS", "")
+    app.config["PROFILE_DISABLED_ENDPOINTS"] = os.environ.get(
+        "PROFILE_DISABLED_ENDPOINTS", "static,metrics")
+
+    # Arquivos estáticos com hash no nome, pré-comprimidos (gzip/brotli) e
+    # servidos como imutáveis (padrão: ativo em produção); o manifesto vem de
+    # "flask build-assets" ou é gerado no boot se não existir, se não
+    # corresponder às fontes atuais ou se ASSETS_BUILD_ON_STARTUP estiver ativo
+    app.config["ASSETS_FINGERPRINT"] = env_bool(
+        "ASSETS_FINGERPRINT", app.config["APP_ENV"] == "production")
+    app.config["ASSETS_BUILD_ON_STARTUP"] = env_bool("ASSETS_BUILD_ON_STARTUP", False)
+
+    # Páginas do questionário e das dicas renderizadas uma vez por processo e
+    # guardadas comprimidas (padrão: ativo em produção)
+    app.config["FRAGMENT_CACHE"] = env_bool(
+        "FRAGMENT_CACHE", app.config["APP_ENV"] == "production")
+
+    # Arquivamento das respostas antigas ("flask archive-responses"): as com
+    # mais de ARCHIVE_HORIZON_DAYS dias vão para o SQLite ARCHIVE_PATH, que
+    # precisa estar acessível a todos os workers
+    app.config["ARCHIVE_PATH"] = os.environ.get(
+        "ARCHIVE_PATH", os.path.join(app.instance_path, "response_archive.db"))
+    app.config["ARCHIVE_HORIZON_DAYS"] = int(
+        os.environ.get("ARCHIVE_HORIZON_DAYS", 365))
+
     # Inicializar o banco de dados com a aplicação
     db.init_app(app)
 
-    # Criar as tabelas dentro do contexto da aplicação
+    import hashing
+    hashing.init_app(app)
+
     with app.app_context():
-        from models import User, Response
-        db.create_all()
+        database.init_app(app, db)
+
+        # Em desenvolvimento, cria as tabelas e colunas novas a cada boot
+        if app.config["DB_AUTO_CREATE"]:
+            init_schema()
+
+    import fragments
+    fragments.init_app(app)
 
     # Importar e registrar os blueprints/rotas
     from routes import init_app
     init_app(app)
 
+    import submissions
+    submissions.init_app(app)
+
+    import metrics
+    metrics.init_app(app, db)
+
+    import profiling
+    profiling.init_app(app)
+
+    import assets
+    assets.init_app(app)
+
+    # Registrar os comandos de linha de comando (flask --app main ...)
+    from commands import init_app as init_commands
+    init_commands(app)
+
     return app
+
+
+def init_schema():
+    """Cria as tabelas e acrescenta as colunas e índices novos (no contexto da app)"""
+    from models import upgrade_schema
+    db.create_all()
+    upgrade_schema()
+
+
+def after_fork(app):
+    """
+    Prepara um worker criado por fork a partir de um processo que já criou a
+    aplicação (gunicorn --preload): as conexões do pool e os pools de hash
+    herdados do processo mestre não podem ser compartilhados.
+    """
+    with app.app_context():
+        # close=False: não fecha as conexões que ainda pertencem ao mestre
+        db.engine.dispose(close=False)
+
+    if app.config.get("PASSWORD_HASH_WORKERS"):
+        import hashing
+        hashing.init_app(app)
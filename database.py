@@ -0,0 +1,68 @@
+import os
+from sqlalchemy import event
+from settings import env_bool
+
+# Configuração do banco de dados a partir do ambiente.
+#
+# DATABASE_URL escolhe o banco (padrão: SQLite local). No SQLite cada conexão
+# usa WAL, synchronous=NORMAL, busy timeout e mmap, para que os workers do
+# gunicorn leiam enquanto outro grava em vez de falhar com "database is locked".
+# No PostgreSQL o pool de conexões é configurável.
+
+DEFAULT_DATABASE_URL = "sqlite:///burnout_prevention.db"
+
+
+def database_url():
+    """Retorna a URL do banco configurada no ambiente"""
+    url = os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL)
+    # Alguns provedores ainda usam o esquema antigo postgres://
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def engine_options(url):
+    """Opções do create_engine adequadas ao banco configurado"""
+    if url.startswith("sqlite"):
+        return {
+            # Tempo de espera do driver pelo lock de escrita, em segundos
+            'connect_args': {
+                'timeout': int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)) / 1000,
+            },
+        }
+    return {
+        'pool_size': int(os.environ.get("DB_POOL_SIZE", 5)),
+        'max_overflow': int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        'pool_timeout': int(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        'pool_recycle': int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+        'pool_pre_ping': env_bool("DB_POOL_PRE_PING", True),
+    }
+
+
+def sqlite_pragmas():
+    """PRAGMAs aplicados a cada nova conexão SQLite"""
+    return {
+        'journal_mode': os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        'synchronous': os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        'busy_timeout': int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        'mmap_size': int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    }
+
+
+def init_app(app, db):
+    """Aplica as configurações do banco na aplicação já ligada ao SQLAlchemy"""
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    # Conexões abertas antes do listener (ex.: durante a inicialização)
+    engine.dispose()
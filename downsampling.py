@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+# Redução do número de pontos das séries exibidas nos gráficos.
+#
+# As séries são listas de tuplas (x, y, ...) ordenadas por x, em que y é a
+# pontuação de Burnout; campos extras acompanham o ponto sem serem usados.
+
+
+def lttb(points, threshold):
+    """
+    Reduz a série a `threshold` pontos com o algoritmo Largest-Triangle-Three-Buckets,
+    que preserva o formato visual (picos e vales) da curva. Aqui x deve ser
+    numérico. O primeiro e o último ponto são sempre mantidos.
+    """
+    n_points = len(points)
+    if threshold >= n_points or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    # Tamanho dos baldes, descontando o primeiro e o último ponto
+    every = (n_points - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Média do próximo balde, usada como terceiro vértice do triângulo
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n_points)
+        next_bucket = points[next_start:next_end]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        # Ponto do balde atual que forma o maior triângulo
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = points[a][0], points[a][1]
+        max_area = -1
+        for j in range(start, end):
+            x, y = points[j][0], points[j][1]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        sampled.append(points[chosen])
+        a = chosen
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def weekly_means(points):
+    """
+    Agrega a série por semana (segunda a domingo), retornando a média de cada
+    semana com x igual ao início da semana. Aqui x deve ser um datetime.
+    """
+    weeks = []
+    for x, y, *_ in points:
+        week_start = (x - timedelta(days=x.weekday())).replace(
+            hour=0, minute=0, second=0, microsecond=0)
+        if weeks and weeks[-1][0] == week_start:
+            weeks[-1][1] += y
+            weeks[-1][2] += 1
+        else:
+            weeks.append([week_start, y, 1])
+    return [(week_start, total / count) for week_start, total, count in weeks]
@@ -0,0 +1,161 @@
+import csv
+import io
+import logging
+import time
+from sqlalchemy import select
+from models import User, Response
+from scoring import COMPILED_SPEC, QUESTION_COLUMNS, SUBSCORE_COLUMNS, decode_answer
+from archive import iter_archived_rows
+from create_app import db
+
+# Exportação das avaliações (Response + User) para relatórios institucionais.
+#
+# As linhas são lidas com cursor no servidor (yield_per), em blocos, e
+# convertidas bloco a bloco em CSV ou em lotes Parquet/Arrow. A memória usada
+# depende apenas do tamanho do bloco, não do tamanho da tabela. As respostas
+# arquivadas (archive.py) vêm depois, um bloco do arquivo por vez.
+
+EXPORT_COLUMNS = (
+    'response_id', 'user_id', 'name', 'email', 'timestamp', 'burnout_score',
+    'scoring_version', *SUBSCORE_COLUMNS, *QUESTION_COLUMNS,
+)
+
+# Colunas anteriores às respostas, lidas diretamente da consulta
+_HEAD_COLUMNS = len(EXPORT_COLUMNS) - len(QUESTION_COLUMNS)
+
+
+def _decode_row(row):
+    """Tupla na ordem de EXPORT_COLUMNS a partir das colunas lidas e dos códigos"""
+    answers_version = row[_HEAD_COLUMNS]
+    answers = []
+    for q, code in zip(QUESTION_COLUMNS, row[_HEAD_COLUMNS + 1:]):
+        # Respostas antigas guardavam apenas 1 nas questões textuais
+        if answers_version is None and q not in COMPILED_SPEC.dimension_of:
+            answers.append(None)
+        else:
+            answers.append(decode_answer(q, code))
+    return (*row[:_HEAD_COLUMNS], *answers)
+
+
+def _iter_archived_chunks(chunk_size):
+    """Respostas arquivadas (archive.py) no mesmo formato, com os dados dos usuários"""
+    for rows in iter_archived_rows(chunk_size):
+        users = {user_id: (name, email) for user_id, name, email in db.session.execute(
+            select(User.id, User.name, User.email)
+            .where(User.id.in_({row[1] for row in rows})))}
+        # ARCHIVE_COLUMNS segue a ordem da consulta de iter_export_chunks,
+        # sem o nome e o e-mail, inseridos depois de user_id
+        yield [_decode_row((*row[:2], *users.get(row[1], (None, None)), *row[2:]))
+               for row in rows]
+
+
+def iter_export_chunks(chunk_size=5000):
+    """
+    Percorre as avaliações em blocos de tuplas na ordem de EXPORT_COLUMNS:
+    as de Response e, em seguida, as arquivadas
+    """
+    query = (
+        select(Response.id, Response.user_id, User.name, User.email,
+               Response.timestamp, Response.burnout_score,
+               Response.scoring_version,
+               *[getattr(Response, column) for column in SUBSCORE_COLUMNS],
+               Response.answers_version,
+               *[getattr(Response, q) for q in QUESTION_COLUMNS])
+        .join(User, Response.user_id == User.id)
+        .order_by(Response.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for partition in db.session.execute(query).partitions():
+        yield [_decode_row(row) for row in partition]
+    yield from _iter_archived_chunks(chunk_size)
+
+
+class ExportStats:
+    """Contagem de linhas e taxa de uma exportação"""
+
+    def __init__(self):
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0
+
+    def log(self, label):
+        logging.info(f"Exportação {label}: {self.rows} linhas em "
+                     f"{self.seconds:.1f}s ({self.rows_per_second:,.0f} linhas/s)")
+
+
+def iter_csv(chunk_size=5000, stats=None):
+    """Gera o CSV das avaliações em pedaços de texto, um por bloco"""
+    stats = stats or ExportStats()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in iter_export_chunks(chunk_size):
+        writer.writerows(
+            (*row[:4], row[4].isoformat() if row[4] else '', *row[5:])
+            for row in chunk)
+        stats.rows += len(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+    stats.log('CSV')
+
+
+def _require_pyarrow():
+    """Importa o PyArrow sob demanda; apenas Parquet/Arrow dependem dele"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError(
+            "A exportação Parquet/Arrow requer o PyArrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _arrow_schema(pa):
+    answer_type = pa.string()
+    return pa.schema([
+        ('response_id', pa.int64()),
+        ('user_id', pa.int64()),
+        ('name', pa.string()),
+        ('email', pa.string()),
+        ('timestamp', pa.timestamp('us')),
+        ('burnout_score', pa.float64()),
+        ('scoring_version', pa.int32()),
+        ('ee_score', pa.int32()),
+        ('dp_score', pa.int32()),
+        ('pa_score', pa.int32()),
+        ('lifestyle_adjustment', pa.float64()),
+        *[(q, answer_type) for q in QUESTION_COLUMNS],
+    ])
+
+
+def write_columnar(path, file_format='parquet', chunk_size=10000, stats=None):
+    """Grava as avaliações em um arquivo Parquet ou Arrow (IPC), bloco a bloco"""
+    pa = _require_pyarrow()
+    stats = stats or ExportStats()
+    schema = _arrow_schema(pa)
+    if file_format == 'parquet':
+        writer = pa.parquet.ParquetWriter(path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    try:
+        for chunk in iter_export_chunks(chunk_size):
+            columns = list(zip(*chunk))
+            writer.write_batch(pa.record_batch(
+                [pa.array(column, type=field.type)
+                 for column, field in zip(columns, schema)],
+                schema=schema))
+            stats.rows += len(chunk)
+    finally:
+        writer.close()
+    stats.log(file_format)
+    return stats
@@ -0,0 +1,178 @@
+import hashlib
+import re
+import struct
+import threading
+import zlib
+from flask import (Response, current_app, g, render_template, render_template_string,
+                   request, session)
+
+# Cache de páginas pré-renderizadas.
+#
+# O questionário e as dicas são iguais para todos os usuários, exceto pelos
+# blocos de base.html que dependem da sessão (FRAGMENT_SLOTS: o nome do
+# usuário e as mensagens flash). A página é renderizada uma vez por processo
+# com marcadores no lugar desses blocos e guardada em pedaços, já comprimidos.
+# A cada requisição apenas os blocos do usuário são renderizados e emendados.
+#
+# Os pedaços fixos são comprimidos em deflate (nível 9) terminando com um
+# Z_SYNC_FLUSH, o que permite concatená-los a blocos deflate gerados na
+# requisição: a resposta gzip é montada com o cabeçalho, os pedaços e o
+# rodapé (CRC32 e tamanho), sem recomprimir a página inteira.
+
+# Blocos de base.html renderizados a cada requisição
+FRAGMENT_SLOTS = ('user_name', 'flashes')
+
+SLOT_MARKER = re.compile(r'<!--fragment-slot:(\w+)-->')
+
+# Cabeçalho gzip fixo (sem nome nem data, para respostas reproduzíveis)
+GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+
+# Bloco deflate final vazio, que encerra o fluxo
+DEFLATE_END = b'\x03\x00'
+
+
+def _deflate(data, level):
+    """Blocos deflate (sem cabeçalho) terminados em um ponto de concatenação"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class RenderedPage:
+    """Página pré-renderizada: pedaços fixos intercalados com blocos da sessão"""
+
+    __slots__ = ('parts', 'slots', 'digest')
+
+    def __init__(self, html):
+        pieces = SLOT_MARKER.split(html)
+        # Pedaços fixos: (bytes, deflate); entre eles, o nome de cada bloco
+        self.parts = [(text.encode('utf-8'), _deflate(text.encode('utf-8'), 9))
+                      for text in pieces[0::2]]
+        self.slots = pieces[1::2]
+        self.digest = hashlib.blake2b(html.encode('utf-8'), digest_size=8).hexdigest()
+
+    def assemble(self, values, compress):
+        """Corpo da resposta com os blocos do usuário (gzip se compress)"""
+        if not compress:
+            chunks = [self.parts[0][0]]
+            for slot, (raw, _) in zip(self.slots, self.parts[1:]):
+                chunks.append(values[slot])
+                chunks.append(raw)
+            return b''.join(chunks)
+
+        chunks = [GZIP_HEADER, self.parts[0][1]]
+        crc = zlib.crc32(self.parts[0][0])
+        size = len(self.parts[0][0])
+        for slot, (raw, deflated) in zip(self.slots, self.parts[1:]):
+            value = values[slot]
+            if value:
+                chunks.append(_deflate(value, 1))
+                crc = zlib.crc32(value, crc)
+                size += len(value)
+            chunks.append(deflated)
+            crc = zlib.crc32(raw, crc)
+            size += len(raw)
+        chunks.append(DEFLATE_END)
+        chunks.append(struct.pack('<II', crc, size & 0xffffffff))
+        return b''.join(chunks)
+
+
+class FragmentCache:
+    """Páginas pré-renderizadas por template, mantidas enquanto o processo viver"""
+
+    def __init__(self):
+        self._pages = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def page(self, template_name):
+        page = self._pages.get(template_name)
+        if page is not None:
+            self.hits += 1
+            return page
+        with self._lock:
+            page = self._pages.get(template_name)
+            if page is None:
+                self.misses += 1
+                page = self._pages[template_name] = RenderedPage(
+                    _render_with_markers(template_name))
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._pages)}
+
+
+def _render_with_markers(template_name):
+    """Renderiza o template com marcadores no lugar dos blocos do usuário"""
+    overrides = ''.join(
+        f"{{% block {slot} %}}<!--fragment-slot:{slot}-->{{% endblock %}}"
+        for slot in FRAGMENT_SLOTS)
+    # A sessão fixa mostra a navegação de usuário autenticado (as páginas
+    # cacheadas exigem login) sem depender de quem fez a primeira requisição
+    return render_template_string(
+        f"{{% extends fragment_template %}}{overrides}",
+        fragment_template=template_name, session={'user_id': True})
+
+
+def _render_slots():
+    """
+    Renderiza os blocos de base.html que dependem da sessão. Eles recebem só
+    as variáveis padrão do Flask (sem os context processors), o que basta
+    para o nome do usuário e as mensagens e evita o custo de montar o
+    contexto completo a cada requisição.
+    """
+    template = current_app.jinja_env.get_template('base.html')
+    context = template.new_context({'session': session, 'request': request, 'g': g})
+    return {slot: ''.join(template.blocks[slot](context)).strip().encode('utf-8')
+            for slot in FRAGMENT_SLOTS}
+
+
+def render_cached(template_name):
+    """
+    Resposta com a página pré-renderizada e os blocos do usuário atual, em
+    gzip se o navegador aceitar. O ETag combina a página e os blocos; páginas
+    com mensagens flash não recebem ETag (a mensagem é exibida uma única vez).
+    """
+    page = current_app.extensions['fragment_cache'].page(template_name)
+    # Verificado antes de renderizar: o bloco das mensagens as consome
+    has_flashes = '_flashes' in session
+    values = _render_slots()
+    compress = bool(request.accept_encodings['gzip'])
+    etag = None
+    if not has_flashes:
+        # ETags distintos por codificação, como exige o Vary
+        etag = (f"{page.digest}-"
+                + hashlib.blake2b(values['user_name'], digest_size=6).hexdigest()
+                + ('-gz' if compress else ''))
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Accept-Encoding')
+            return response
+
+    response = Response(page.assemble(values, compress), mimetype='text/html')
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    if etag is not None:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def render_page(template_name):
+    """Usa o cache de páginas quando ativo; senão, render_template"""
+    if 'fragment_cache' in current_app.extensions:
+        return render_cached(template_name)
+    return render_template(template_name)
+
+
+def init_app(app):
+    """Cria o cache de páginas conforme FRAGMENT_CACHE"""
+    if app.config.get('FRAGMENT_CACHE'):
+        app.extensions['fragment_cache'] = FragmentCache()
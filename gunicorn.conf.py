@@ -0,0 +1,32 @@
+import os
+
+# Configuração do gunicorn para produção (gunicorn -c gunicorn.conf.py main:app).
+#
+# O gunicorn carrega este arquivo sozinho em qualquer "gunicorn main:app"
+# executado nesta pasta (inclusive os comandos do .replit), então ele não
+# força o modo de produção: APP_ENV=production vem do ambiente (ver procfile
+# e o [deployment] do .replit), que também rodam "flask --app main init-db"
+# antes de subir os workers.
+#
+# Em produção, com preload_app o processo mestre importa e cria a aplicação
+# uma única vez e os workers são criados por fork, já com tudo carregado: o
+# boot de cada worker (inclusive ao escalar) fica restrito ao fork. O hook
+# post_fork descarta as conexões e pools herdados do mestre (ver
+# create_app.after_fork). Fora de produção o preload fica desligado, pois
+# com ele o --reload do ambiente de desenvolvimento não tem efeito.
+
+production = os.environ.get("APP_ENV", "development") == "production"
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+# Mesma leitura de settings.env_bool; este arquivo é carregado antes do
+# --chdir do gunicorn e não pode importar os módulos da aplicação
+preload_app = os.environ.get(
+    "GUNICORN_PRELOAD", "1" if production else "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from create_app import after_fork
+        from main import app
+        after_fork(app)
@@ -0,0 +1,86 @@
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Serviço de hash de senhas.
+#
+# O cálculo do hash (scrypt ou PBKDF2) é feito em um pool limitado de threads
+# ou processos, com parâmetros de custo configuráveis. As funções do hashlib
+# liberam o GIL, então um pool de threads já permite calcular vários hashes em
+# paralelo sem ocupar a thread que atende a requisição com trabalho em Python.
+
+# Método padrão do werkzeug, usado nas senhas já armazenadas
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class PasswordHasher:
+    """Calcula e verifica hashes de senha em um pool limitado"""
+
+    def __init__(self, method=DEFAULT_METHOD, workers=0, pool='thread', max_pending=64):
+        self.configure(method, workers, pool, max_pending)
+
+    def configure(self, method=DEFAULT_METHOD, workers=0, pool='thread', max_pending=64):
+        """(Re)configura o serviço; workers=0 calcula os hashes na própria thread"""
+        self.shutdown()
+        self.method = method
+        self._stored_method = None
+        self.workers = workers
+        if workers > 0:
+            executor_class = ProcessPoolExecutor if pool == 'process' else ThreadPoolExecutor
+            self._executor = executor_class(max_workers=workers)
+            # Limita as tarefas na fila para aplicar contrapressão
+            self._slots = threading.BoundedSemaphore(max_pending)
+        else:
+            self._executor = None
+            self._slots = None
+
+    def shutdown(self):
+        executor = getattr(self, '_executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run(self, function, *args):
+        if self._executor is None:
+            return function(*args)
+        with self._slots:
+            return self._executor.submit(function, *args).result()
+
+    def hash(self, password):
+        """Gera o hash da senha com o método configurado"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Verifica se a senha corresponde ao hash armazenado"""
+        return self._run(check_password_hash, password_hash, password)
+
+    @property
+    def stored_method(self):
+        """
+        Método como o werkzeug o grava no hash: as formas abreviadas são
+        expandidas com os parâmetros padrão ('scrypt' -> 'scrypt:32768:8:1',
+        'pbkdf2:sha256' -> 'pbkdf2:sha256:1000000'). Calculado uma vez.
+        """
+        if self._stored_method is None:
+            self._stored_method = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._stored_method
+
+    def needs_rehash(self, password_hash):
+        """Indica se o hash foi gerado com parâmetros diferentes dos atuais"""
+        return password_hash.split('$', 1)[0] != self.stored_method
+
+
+# Instância usada pelo modelo User; configurada em init_app
+hasher = PasswordHasher()
+
+
+def init_app(app):
+    """Configura o serviço de hash a partir das configurações da aplicação"""
+    hasher.configure(
+        method=app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 0),
+        pool=app.config.get('PASSWORD_HASH_POOL', 'thread'),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 64))
+    logging.info(
+        f"Hash de senhas: {hasher.method} ({hasher.workers} workers)")
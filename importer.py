@@ -0,0 +1,165 @@
+import csv
+import logging
+import time
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import select
+from models import User
+from scoring import (ANSWERS_VERSION, COMPILED_SPEC, MISSING_CODE, QUESTION_COLUMNS,
+                     SCORING_VERSION, encode_answer, evaluate_batch)
+from submissions import write_submissions
+from create_app import db
+
+# Importação em lote de questionários respondidos fora do sistema (papel,
+# formulários online).
+#
+# O CSV tem uma coluna "email", as colunas q1 a q25 com as respostas como no
+# formulário e, opcionalmente, "timestamp" (ISO 8601) com a data da avaliação.
+# As linhas são lidas em blocos: cada bloco é validado, pontuado de uma vez com
+# evaluate_batch e gravado com INSERTs em lote em uma transação. Linhas inválidas
+# vão para o arquivo de rejeitadas com o motivo, sem interromper a importação.
+
+# As questões do MBI são obrigatórias para calcular a pontuação
+REQUIRED_QUESTIONS = COMPILED_SPEC.numeric_questions
+
+
+class ImportStats:
+    """Contagem de linhas importadas e rejeitadas"""
+
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+
+def parse_row(row, now):
+    """
+    Valida uma linha do CSV. Retorna (email, códigos, timestamp) ou lança
+    ValueError com o motivo da rejeição.
+    """
+    email = (row.get('email') or '').strip().lower()
+    if not email or '@' not in email:
+        raise ValueError('e-mail ausente ou inválido')
+
+    codes = {}
+    for q in QUESTION_COLUMNS:
+        answer = (row.get(q) or '').strip()
+        if not answer:
+            if q in REQUIRED_QUESTIONS:
+                raise ValueError(f'{q} sem resposta')
+            codes[q] = None
+            continue
+        code = encode_answer(q, answer)
+        if code == MISSING_CODE or (q in REQUIRED_QUESTIONS
+                                    and code > COMPILED_SPEC.max_answer):
+            raise ValueError(f'{q}: resposta inválida "{answer}"')
+        codes[q] = code
+
+    timestamp = (row.get('timestamp') or '').strip()
+    try:
+        timestamp = datetime.fromisoformat(timestamp) if timestamp else now
+    except ValueError:
+        raise ValueError(f'timestamp inválido "{timestamp}"')
+    if timestamp.tzinfo is not None:
+        # Com fuso (ex.: ...Z ou -03:00): converte para o horário local sem
+        # fuso, como os gravados pela aplicação (datetime.now())
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return email, codes, timestamp
+
+
+def _import_chunk(rows, now, reject, pending):
+    """
+    Valida, pontua e grava um bloco de linhas. Retorna quantas foram gravadas.
+    `pending` recebe as linhas ainda não rejeitadas, que o chamador rejeita se
+    a gravação do bloco falhar.
+    """
+    parsed = []
+    for row in rows:
+        try:
+            parsed.append((row, *parse_row(row, now)))
+        except ValueError as e:
+            reject(row, str(e))
+    pending[:] = [row for row, _, _, _ in parsed]
+
+    # Uma consulta por bloco para encontrar os usuários
+    emails = {email for _, email, _, _ in parsed}
+    user_ids = dict(db.session.execute(
+        select(db.func.lower(User.email), User.id)
+        .where(db.func.lower(User.email).in_(emails))).all()) if emails else {}
+
+    valid = []
+    for row, email, codes, timestamp in parsed:
+        if email not in user_ids:
+            reject(row, 'usuário não cadastrado')
+        else:
+            valid.append((row, user_ids[email], codes, timestamp))
+    pending[:] = [row for row, _, _, _ in valid]
+    if not valid:
+        return 0
+
+    results = evaluate_batch({
+        q: [MISSING_CODE if codes[q] is None else codes[q] for _, _, codes, _ in valid]
+        for q in QUESTION_COLUMNS
+    })
+    fields = list(results)
+    results = zip(*(results[field].tolist() for field in fields))
+
+    write_submissions([
+        {
+            'user_id': user_id,
+            **dict(zip(fields, result)),
+            'timestamp': timestamp,
+            'scoring_version': SCORING_VERSION,
+            'answers_version': ANSWERS_VERSION,
+            **codes,
+        }
+        for (_, user_id, codes, timestamp), result in zip(valid, results)
+    ])
+    db.session.commit()
+    return len(valid)
+
+
+def import_responses(source, reject_file=None, chunk_size=5000):
+    """
+    Importa as avaliações do CSV `source` (objeto de arquivo). As linhas
+    rejeitadas são escritas em `reject_file` com a coluna "erro".
+    Deve ser chamada dentro do contexto da aplicação.
+    """
+    stats = ImportStats()
+    reader = csv.DictReader(source)
+    if 'email' not in (reader.fieldnames or []):
+        raise ValueError('O CSV precisa de uma coluna "email"')
+
+    reject_writer = None
+    if reject_file is not None:
+        reject_writer = csv.DictWriter(
+            reject_file, fieldnames=[*reader.fieldnames, 'erro'], extrasaction='ignore')
+        reject_writer.writeheader()
+
+    def reject(row, reason):
+        stats.rejected += 1
+        if reject_writer is not None:
+            reject_writer.writerow({**row, 'erro': reason})
+
+    now = datetime.now()
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            break
+        pending = []
+        try:
+            stats.imported += _import_chunk(rows, now, reject, pending)
+        except Exception as e:
+            # Falha de gravação do bloco: rejeita as linhas que ainda não
+            # tinham sido rejeitadas na validação e continua
+            db.session.rollback()
+            logging.error(f"Erro ao importar bloco de respostas: {e}")
+            for row in pending:
+                reject(row, f'erro ao gravar o bloco: {e}')
+        logging.info(f"Respostas importadas: {stats.imported}")
+
+    return stats
@@ -0,0 +1,308 @@
+import bisect
+import hmac
+import threading
+import time
+from functools import wraps
+from flask import (Response, abort, before_render_template, current_app, g,
+                   has_request_context, request, template_rendered)
+from sqlalchemy import event
+
+# Métricas de desempenho por requisição.
+#
+# Cada requisição acumula em `g` o tempo gasto em consultas SQL (eventos do
+# engine), na renderização de templates (sinais do Flask) e na pontuação do
+# questionário (decorador timed_scoring). Ao final, os valores vão para histogramas e
+# contadores por endpoint, expostos em /metrics no formato de texto do
+# Prometheus, e opcionalmente para o cabeçalho Server-Timing da resposta.
+#
+# Os valores são mantidos por processo: com vários workers do gunicorn, cada
+# coleta do /metrics vem do worker que atendeu a requisição.
+
+# Limites dos histogramas de latência, em segundos
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Histograma com limites fixos (contagens por faixa, soma e total)"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # Uma posição extra para os valores acima do último limite (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Pares (limite, contagem acumulada), como nos buckets do Prometheus"""
+        total = 0
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestTimings:
+    """Tempos acumulados durante uma requisição"""
+
+    __slots__ = ('start', 'db_queries', 'db_time', 'template_time',
+                 'template_start', 'scoring_time')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_start = None
+        self.scoring_time = 0.0
+
+
+class MetricsRegistry:
+    """Histogramas e contadores por endpoint, protegidos por um único lock"""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (endpoint, método) -> Histogram da latência total
+            self.latency = {}
+            # (endpoint, método, status) -> número de requisições
+            self.requests = {}
+            # endpoint -> [consultas, segundos em consultas]
+            self.db = {}
+            # endpoint -> Histogram do tempo de renderização
+            self.templates = {}
+            self.scoring = Histogram()
+
+    def observe_request(self, endpoint, method, status, timings, elapsed):
+        with self._lock:
+            histogram = self.latency.get((endpoint, method))
+            if histogram is None:
+                histogram = self.latency[(endpoint, method)] = Histogram()
+            histogram.observe(elapsed)
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if timings.db_queries:
+                db = self.db.setdefault(endpoint, [0, 0.0])
+                db[0] += timings.db_queries
+                db[1] += timings.db_time
+            if timings.template_time:
+                histogram = self.templates.get(endpoint)
+                if histogram is None:
+                    histogram = self.templates[endpoint] = Histogram()
+                histogram.observe(timings.template_time)
+
+    def observe_scoring(self, elapsed):
+        with self._lock:
+            self.scoring.observe(elapsed)
+
+    def render(self, extra=()):
+        """Texto no formato de exposição do Prometheus"""
+        lines = []
+        with self._lock:
+            lines += ['# HELP http_request_duration_seconds Latência das requisições.',
+                      '# TYPE http_request_duration_seconds histogram']
+            for (endpoint, method), histogram in sorted(self.latency.items()):
+                _histogram_lines(lines, 'http_request_duration_seconds', histogram,
+                                 f'endpoint="{endpoint}",method="{method}"')
+
+            lines += ['# HELP http_requests_total Requisições atendidas.',
+                      '# TYPE http_requests_total counter']
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",'
+                             f'method="{method}",status="{status}"}} {count}')
+
+            lines += ['# HELP db_queries_total Consultas SQL executadas.',
+                      '# TYPE db_queries_total counter']
+            for endpoint, (count, _) in sorted(self.db.items()):
+                lines.append(f'db_queries_total{{endpoint="{endpoint}"}} {count}')
+            lines += ['# HELP db_query_seconds_total Tempo gasto em consultas SQL.',
+                      '# TYPE db_query_seconds_total counter']
+            for endpoint, (_, seconds) in sorted(self.db.items()):
+                lines.append(f'db_query_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}')
+
+            lines += ['# HELP template_render_seconds Tempo de renderização dos templates.',
+                      '# TYPE template_render_seconds histogram']
+            for endpoint, histogram in sorted(self.templates.items()):
+                _histogram_lines(lines, 'template_render_seconds', histogram,
+                                 f'endpoint="{endpoint}"')
+
+            lines += ['# HELP scoring_duration_seconds Tempo de cálculo da pontuação.',
+                      '# TYPE scoring_duration_seconds histogram']
+            _histogram_lines(lines, 'scoring_duration_seconds', self.scoring, '')
+
+        for name, kind, help_text, samples in extra:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for labels, value in samples:
+                lines.append(f'{name}{{{labels}}} {value}' if labels else f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _histogram_lines(lines, name, histogram, labels):
+    separator = ',' if labels else ''
+    for bound, count in histogram.cumulative():
+        le = '+Inf' if bound == float('inf') else f'{bound:g}'
+        lines.append(f'{name}_bucket{{{labels}{separator}le="{le}"}} {count}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{suffix} {histogram.count}')
+
+
+# Registro usado pela aplicação (configurado em init_app)
+registry = MetricsRegistry()
+
+
+def _timings():
+    """Tempos da requisição atual (None fora de requisições ou sem métricas)"""
+    if has_request_context():
+        return g.get('_metrics_timings')
+    return None
+
+
+def timed_scoring(function):
+    """Decorador que mede o tempo de cálculo da pontuação do questionário"""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.observe_scoring(elapsed)
+            timings = _timings()
+            if timings is not None:
+                timings.scoring_time += elapsed
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+    timings = _timings()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_time += elapsed
+
+
+def _handle_error(context):
+    # A consulta que falhou não chega ao after_cursor_execute: descarta o
+    # início registrado, que ficaria na conexão do pool enquanto ela existir
+    connection = context.connection
+    if connection is None:
+        return
+    starts = connection.info.pop('metrics_query_start', None)
+    timings = _timings()
+    if starts and timings is not None:
+        timings.db_queries += 1
+        timings.db_time += time.perf_counter() - starts[-1]
+
+
+def _before_render(sender, template, context, **extra):
+    timings = _timings()
+    if timings is not None:
+        timings.template_start = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    timings = _timings()
+    if timings is not None and timings.template_start is not None:
+        timings.template_time += time.perf_counter() - timings.template_start
+        timings.template_start = None
+
+
+def server_timing(timings, elapsed):
+    """Valor do cabeçalho Server-Timing (durações em milissegundos)"""
+    return (f'db;dur={timings.db_time * 1000:.1f};desc="{timings.db_queries} consultas", '
+            f'tpl;dur={timings.template_time * 1000:.1f}, '
+            f'score;dur={timings.scoring_time * 1000:.1f}, '
+            f'total;dur={elapsed * 1000:.1f}')
+
+
+def _extra_metrics(app):
+    """Métricas de outros componentes (cache do dashboard e de páginas)"""
+    extra = []
+    cache = app.extensions.get('dashboard_cache')
+    if cache is not None:
+        stats = cache.stats()
+        for key in ('hits', 'misses', 'sets', 'invalidations', 'evictions'):
+            if key in stats:
+                extra.append((f'dashboard_cache_{key}_total', 'counter',
+                              f'Cache do dashboard: {key}.', [('', stats[key])]))
+        for key in ('entries', 'bytes'):
+            if key in stats:
+                extra.append((f'dashboard_cache_{key}', 'gauge',
+                              f'Cache do dashboard: {key}.', [('', stats[key])]))
+    fragments = app.extensions.get('fragment_cache')
+    if fragments is not None:
+        stats = fragments.stats()
+        for key in ('hits', 'misses'):
+            extra.append((f'fragment_cache_{key}_total', 'counter',
+                          f'Cache de páginas: {key}.', [('', stats[key])]))
+        extra.append(('fragment_cache_entries', 'gauge', 'Cache de páginas: entries.',
+                      [('', stats['entries'])]))
+    return extra
+
+
+def init_app(app, db):
+    """
+    Ativa a coleta conforme METRICS_ENABLED e registra o /metrics. Com
+    METRICS_TOKEN, o /metrics exige "Authorization: Bearer <token>"; sem ele,
+    apenas a equipe (ADMIN_EMAILS) tem acesso. METRICS_SERVER_TIMING inclui o
+    cabeçalho Server-Timing nas respostas.
+    """
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    registry.enabled = True
+    add_server_timing = app.config.get('METRICS_SERVER_TIMING', False)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(db.engine, 'handle_error', _handle_error)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_timings():
+        g._metrics_timings = RequestTimings()
+
+    @app.after_request
+    def record_timings(response):
+        timings = g.get('_metrics_timings')
+        if timings is None:
+            return response
+        elapsed = time.perf_counter() - timings.start
+        registry.observe_request(request.endpoint or 'unknown', request.method,
+                                 response.status_code, timings, elapsed)
+        if add_server_timing:
+            response.headers['Server-Timing'] = server_timing(timings, elapsed)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        token = current_app.config.get('METRICS_TOKEN')
+        if token:
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(supplied.encode(), token.encode()):
+                abort(403)
+        else:
+            from routes import is_admin
+            from flask_login import current_user
+            if not is_admin(current_user):
+                abort(403)
+        return Response(registry.render(_extra_metrics(current_app)),
+                        mimetype='text/plain; version=0.0.4')
@@ -1,7 +1,9 @@
 from datetime import datetime
+from sqlalchemy import inspect, text
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from create_app import db
+from hashing import hasher
+from scoring import COMPILED_SPEC, QUESTION_COLUMNS, decode_answers
 
 
 class User(db.Model, UserMixin):
@@ -13,17 +15,29 @@ class User(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, default=datetime.now)
     latest_burnout_score = db.Column(db.Float, nullable=True)
     last_assessment = db.Column(db.DateTime, nullable=True)
+    # Últimas pontuações do usuário, da mais antiga para a mais recente,
+    # separadas por vírgula (janela usada na detecção de risco, ver alerts.py).
+    # Texto sem limite: o tamanho depende de RISK_WINDOW_SIZE
+    recent_scores = db.Column(db.Text, nullable=True)
+    # Incrementado quando o histórico muda sem mover last_assessment para
+    # frente (respostas importadas com datas antigas, pontuações recalculadas);
+    # junto com last_assessment forma o ETag do histórico (ver routes.py)
+    history_version = db.Column(db.Integer, nullable=True)
 
     # Relação com as respostas do questionário
     responses = db.relationship('Response', backref='user', lazy=True)
 
     def set_password(self, password):
         """Define a senha criptografada do usuário"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password):
         """Verifica se a senha está correta"""
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """Indica se a senha foi criptografada com parâmetros antigos"""
+        return hasher.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f'<User {self.email}>'
@@ -31,12 +45,37 @@ class User(db.Model, UserMixin):
 
 class Response(db.Model):
     """Modelo para as respostas do questionário de burnout"""
+    __table_args__ = (
+        # Histórico de cada usuário em ordem cronológica (dashboard)
+        db.Index('ix_response_user_timestamp', 'user_id', 'timestamp'),
+        # Consultas por dimensão em um período ("exaustão alta neste mês")
+        db.Index('ix_response_ee_timestamp', 'ee_score', 'timestamp'),
+        db.Index('ix_response_dp_timestamp', 'dp_score', 'timestamp'),
+        db.Index('ix_response_pa_timestamp', 'pa_score', 'timestamp'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     burnout_score = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.now)
+    # Versão da fórmula de pontuação que gerou burnout_score
+    # (nula nas respostas antigas, cujas respostas de estilo de vida não foram guardadas)
+    scoring_version = db.Column(db.Integer, nullable=True, index=True)
+    # Versão da codificação das respostas (nula nas respostas antigas, que
+    # guardavam apenas 1 nas questões textuais)
+    answers_version = db.Column(db.Integer, nullable=True)
 
-    # Respostas do questionário (25 questões)
+    # Partes da pontuação (ver scoring.ScoreResult): somas brutas das dimensões
+    # do MBI (PA sem inversão) e ajuste de estilo de vida (nulo nas respostas
+    # antigas, que não guardaram as respostas de estilo de vida)
+    ee_score = db.Column(db.Integer, nullable=True)
+    dp_score = db.Column(db.Integer, nullable=True)
+    pa_score = db.Column(db.Integer, nullable=True)
+    lifestyle_adjustment = db.Column(db.Float, nullable=True)
+
+    # Respostas do questionário (25 questões), codificadas como inteiros:
+    # o próprio valor nas questões numéricas (Q5-Q15) e a posição da opção
+    # nas textuais (ver scoring.encode_answers)
     q1 = db.Column(db.Integer, nullable=True)
     q2 = db.Column(db.Integer, nullable=True)
     q3 = db.Column(db.Integer, nullable=True)
@@ -63,5 +102,124 @@ class Response(db.Model):
     q24 = db.Column(db.Integer, nullable=True)
     q25 = db.Column(db.Integer, nullable=True)
 
+    def decoded_answers(self):
+        """Retorna as respostas do formulário a partir dos códigos armazenados"""
+        codes = {q: getattr(self, q) for q in QUESTION_COLUMNS}
+        if self.answers_version is None:
+            # Nas respostas antigas apenas as questões numéricas são confiáveis
+            codes = {q: code for q, code in codes.items()
+                     if q in COMPILED_SPEC.dimension_of}
+        return decode_answers(codes)
+
     def __repr__(self):
         return f'<Response {self.id} - User {self.user_id}>'
+
+
+class CohortRollup(db.Model):
+    """Agregados semanais de todas as avaliações (mantidos a cada submissão)"""
+    week_start = db.Column(db.Date, primary_key=True)
+    responses = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    # Avaliações na faixa vermelha do gráfico (pontuação >= 70)
+    high_risk = db.Column(db.Integer, nullable=False, default=0)
+    # Somas brutas das dimensões do MBI
+    ee_sum = db.Column(db.Integer, nullable=False, default=0)
+    dp_sum = db.Column(db.Integer, nullable=False, default=0)
+    pa_sum = db.Column(db.Integer, nullable=False, default=0)
+    # Avaliações com cada dimensão preenchida (divisores das médias). Nulas
+    # nas semanas agregadas antes destas colunas, que usam `responses` até o
+    # próximo "flask rebuild-aggregates"
+    ee_count = db.Column(db.Integer, nullable=True)
+    dp_count = db.Column(db.Integer, nullable=True)
+    pa_count = db.Column(db.Integer, nullable=True)
+
+    def __repr__(self):
+        return f'<CohortRollup {self.week_start}>'
+
+
+class CohortHistogram(db.Model):
+    """Distribuição semanal das pontuações em faixas de 10 pontos"""
+    week_start = db.Column(db.Date, primary_key=True)
+    # Faixa da pontuação: 0 para 0-9.9, ..., 9 para 90-100
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    responses = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CohortHistogram {self.week_start} {self.bucket}>'
+
+
+class ResponseArchiveSummary(db.Model):
+    """Resumo das respostas de um usuário movidas para o arquivo (ver archive.py)"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True,
+                        autoincrement=False)
+    responses = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    min_score = db.Column(db.Float, nullable=False)
+    max_score = db.Column(db.Float, nullable=False)
+    first_assessment = db.Column(db.DateTime, nullable=False)
+    last_assessment = db.Column(db.DateTime, nullable=False)
+    # Último lote do arquivo com respostas do usuário; a leitura ignora os
+    # lotes posteriores, ainda não confirmados
+    last_batch = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<ResponseArchiveSummary User {self.user_id}>'
+
+
+class RiskAlert(db.Model):
+    """Alertas de risco aguardando envio à equipe (caixa de saída durável)"""
+    __table_args__ = (
+        # Alertas pendentes em ordem de criação (despachante)
+        db.Index('ix_risk_alert_pending', 'dispatched_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # 'threshold' (passou do limite de risco) ou 'worsening' (piora brusca)
+    kind = db.Column(db.String(20), nullable=False)
+    burnout_score = db.Column(db.Float, nullable=False)
+    previous_score = db.Column(db.Float, nullable=True)
+    # Média da janela de pontuações anteriores do usuário
+    window_mean = db.Column(db.Float, nullable=True)
+    assessed_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    # Preenchido quando o alerta é entregue
+    dispatched_at = db.Column(db.DateTime, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(500), nullable=True)
+
+    def __repr__(self):
+        return f'<RiskAlert {self.id} {self.kind} - User {self.user_id}>'
+
+
+def upgrade_schema():
+    """
+    Adiciona ao banco existente as colunas e índices novos dos modelos.
+
+    O db.create_all() só cria tabelas inexistentes; colunas acrescentadas depois
+    (sempre anuláveis) precisam de um ALTER TABLE nos bancos já criados. No
+    PostgreSQL, colunas de texto que passaram a aceitar textos maiores também
+    são alargadas (o SQLite não aplica o limite de tamanho).
+    """
+    inspector = inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    widen = db.engine.dialect.name == 'postgresql'
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name']: column['type']
+                        for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                if column.name in existing:
+                    current = getattr(existing[column.name], 'length', None)
+                    length = column.type.length if isinstance(column.type, db.String) else 0
+                    if widen and current is not None and (length is None or length > current):
+                        connection.execute(text(
+                            f"ALTER TABLE {preparer.quote(table.name)} "
+                            f"ALTER COLUMN {preparer.quote(column.name)} TYPE {column_type}"))
+                    continue
+                connection.execute(text(
+                    f"ALTER TABLE {preparer.quote(table.name)} "
+                    f"ADD COLUMN {preparer.quote(column.name)} {column_type}"))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
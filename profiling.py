@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from flask import g, request
+
+# Profiler por amostragem para diagnosticar requisições lentas em produção.
+#
+# Uma thread em segundo plano lê periodicamente (sys._current_frames) a pilha
+# das threads que estão atendendo requisições sorteadas para perfilamento e
+# conta as pilhas observadas. O custo fica restrito a essas requisições: as
+# demais pagam apenas o sorteio. Ao final, o perfil é gravado em PROFILE_DIR
+# como pilhas colapsadas (flamegraph.pl, speedscope) ou no formato JSON do
+# speedscope, mantendo apenas os PROFILE_MAX_FILES mais recentes.
+#
+# A taxa de amostragem e os endpoints habilitados podem ser alterados sem
+# reiniciar os workers com o comando "flask profiling", que grava o arquivo de
+# controle PROFILE_DIR/control.json, relido pelos workers a cada segundo.
+
+CONTROL_FILE = 'control.json'
+
+
+class StackSampler:
+    """Thread que amostra as pilhas das threads registradas"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._targets = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # A thread não sobrevive ao fork dos workers: inicia no processo atual
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='stack-sampler', daemon=True)
+            self._thread.start()
+
+    def start(self, thread_id):
+        """Começa a amostrar a thread; retorna o contador de pilhas"""
+        stacks = Counter()
+        with self._lock:
+            self._ensure_started()
+            self._targets[thread_id] = stacks
+        self._wakeup.set()
+        return stacks
+
+    def stop(self, thread_id):
+        with self._lock:
+            self._targets.pop(thread_id, None)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._wakeup.clear()
+            self._wakeup.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                targets = list(self._targets.items())
+            if not targets:
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in targets:
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.reverse()
+                stacks[tuple(stack)] += 1
+
+
+def _frame_name(frame, root):
+    name, filename, line = frame
+    if filename.startswith(root):
+        filename = os.path.relpath(filename, root)
+    return f"{name} ({filename}:{line})"
+
+
+def collapsed(stacks, root=''):
+    """Pilhas no formato colapsado: "a;b;c contagem" por linha"""
+    return ''.join(
+        ';'.join(_frame_name(frame, root) for frame in stack) + f' {count}\n'
+        for stack, count in stacks.most_common())
+
+
+def speedscope(stacks, name, interval, root=''):
+    """Perfil no formato de arquivo do speedscope (perfil amostrado)"""
+    frames = {}
+    samples = []
+    weights = []
+    for stack, count in stacks.most_common():
+        samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+        weights.append(count * interval * 1000)
+    shared = [
+        {'name': frame[0], 'file': os.path.relpath(frame[1], root)
+         if root and frame[1].startswith(root) else frame[1], 'line': frame[2]}
+        for frame in frames
+    ]
+    return json.dumps({
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'burnout-prevention',
+        'shared': {'frames': shared},
+        'profiles': [{
+            'type': 'sampled', 'name': name, 'unit': 'milliseconds',
+            'startValue': 0, 'endValue': sum(weights),
+            'samples': samples, 'weights': weights,
+        }],
+    })
+
+
+class ProfileStore:
+    """Buffer circular de perfis em disco (mantém os max_files mais recentes)"""
+
+    def __init__(self, directory, max_files=100):
+        self.directory = directory
+        self.max_files = max_files
+
+    def save(self, name, content, extension):
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"{time.time_ns()}-{os.getpid()}-{name}.{extension}"
+        path = os.path.join(self.directory, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self._trim()
+        return path
+
+    def _trim(self):
+        profiles = sorted(entry for entry in os.listdir(self.directory)
+                          if not entry.startswith(CONTROL_FILE))
+        for entry in profiles[:max(0, len(profiles) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, entry))
+            except FileNotFoundError:
+                # Removido por outro worker
+                pass
+
+
+def _split(value):
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class ProfilingSettings:
+    """
+    Taxa de amostragem e endpoints habilitados/desabilitados. Os valores da
+    configuração são sobrepostos pelo arquivo de controle, relido a cada
+    `reload_interval` segundos.
+    """
+
+    def __init__(self, config, directory, reload_interval=1.0):
+        self.defaults = {
+            'rate': config.get('PROFILE_SAMPLE_RATE', 0.0),
+            'endpoints': sorted(_split(config.get('PROFILE_ENDPOINTS', ''))),
+            'disabled': sorted(_split(config.get('PROFILE_DISABLED_ENDPOINTS', ''))),
+        }
+        self.path = os.path.join(directory, CONTROL_FILE)
+        self.reload_interval = reload_interval
+        self._checked = 0.0
+        self._mtime = None
+        self._apply(self.defaults)
+
+    def _apply(self, values):
+        self.rate = float(values.get('rate', 0.0))
+        self.endpoints = frozenset(values.get('endpoints', ()))
+        self.disabled = frozenset(values.get('disabled', ()))
+
+    def refresh(self):
+        now = time.monotonic()
+        if now - self._checked < self.reload_interval:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        values = dict(self.defaults)
+        if mtime is not None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    values.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logging.error(f"Arquivo de controle do profiler inválido: {e}")
+        self._apply(values)
+
+    def allows(self, endpoint):
+        """Indica se o endpoint pode ser perfilado"""
+        if endpoint in self.disabled:
+            return False
+        return not self.endpoints or endpoint in self.endpoints
+
+
+def read_control(directory):
+    """Valores gravados no arquivo de controle (vazio se não existir)"""
+    try:
+        with open(os.path.join(directory, CONTROL_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_control(directory, values):
+    """Grava o arquivo de controle de forma atômica"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, CONTROL_FILE)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(values, f, indent=2)
+    os.replace(temporary, path)
+
+
+def profile_directory(app):
+    return app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+
+
+def init_app(app):
+    """
+    Ativa o profiler conforme PROFILING_ENABLED. Uma requisição é perfilada
+    quando sorteada (PROFILE_SAMPLE_RATE) ou quando um usuário da equipe envia
+    o cabeçalho PROFILE_HEADER, desde que o endpoint esteja habilitado.
+    """
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+
+    directory = profile_directory(app)
+    interval = app.config.get('PROFILE_INTERVAL_MS', 5) / 1000
+    output_format = app.config.get('PROFILE_FORMAT', 'collapsed')
+    header = app.config.get('PROFILE_HEADER', 'X-Profile')
+    sampler = StackSampler(interval)
+    store = ProfileStore(directory, app.config.get('PROFILE_MAX_FILES', 100))
+    settings = ProfilingSettings(app.config, directory)
+    root = app.root_path
+    app.extensions['profiler'] = settings
+
+    def requested_by_admin():
+        if header not in request.headers:
+            return False
+        # Importado aqui: routes depende de módulos carregados depois deste
+        from routes import is_admin
+        from flask_login import current_user
+        return is_admin(current_user)
+
+    @app.before_request
+    def start_profile():
+        settings.refresh()
+        endpoint = request.endpoint
+        if endpoint is None or not settings.allows(endpoint):
+            return
+        if not ((settings.rate and random.random() < settings.rate)
+                or requested_by_admin()):
+            return
+        g._profile = (threading.get_ident(), time.perf_counter(),
+                      sampler.start(threading.get_ident()))
+
+    @app.teardown_request
+    def finish_profile(exc):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return
+        thread_id, started, stacks = profile
+        sampler.stop(thread_id)
+        elapsed = time.perf_counter() - started
+        if not stacks:
+            return
+        name = f"{request.endpoint}-{elapsed * 1000:.0f}ms"
+        try:
+            if output_format == 'speedscope':
+                content = speedscope(stacks, f"{request.method} {request.path}",
+                                     interval, root)
+                store.save(name, content, 'speedscope.json')
+            else:
+                store.save(name, collapsed(stacks, root), 'collapsed.txt')
+        except OSError as e:
+            logging.error(f"Erro ao gravar o perfil da requisição: {e}")
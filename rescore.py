@@ -0,0 +1,162 @@
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import bindparam, or_, select, update
+from models import User, Response
+from scoring import (COMPILED_SPEC, MISSING_CODE, SCORING_VERSION, SUBSCORE_COLUMNS,
+                     evaluate_batch)
+from create_app import db
+
+# Recalcula as pontuações armazenadas quando a versão da fórmula muda.
+#
+# As respostas são lidas em blocos por paginação de chave (id > último id),
+# pontuadas em um pool de processos e gravadas com UPDATEs em lote. Cada bloco
+# é confirmado junto com a versão da fórmula, então uma execução interrompida
+# retoma de onde parou: as linhas já atualizadas deixam de ser selecionadas.
+# Junto com a pontuação são gravadas as suas partes (ver scoring.ScoreResult).
+
+# Questões usadas na pontuação (q5 a q25)
+SCORED_QUESTIONS = tuple(f"q{i}" for i in range(5, 26))
+
+
+def _score_chunk(codes):
+    """
+    Pontua um bloco de respostas (executado nos processos do pool). Retorna
+    uma lista de dicionários com a pontuação e as suas partes.
+    """
+    columns = {q: [row[i] for row in codes]
+               for i, q in enumerate(SCORED_QUESTIONS)}
+    results = evaluate_batch(columns)
+    fields = list(results)
+    return [dict(zip(fields, values))
+            for values in zip(*(results[field].tolist() for field in fields))]
+
+
+def _iter_chunks(version, chunk_size):
+    """Percorre as respostas desatualizadas em blocos, sem carregar a tabela"""
+    columns = [getattr(Response, q) for q in SCORED_QUESTIONS]
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Response.id, Response.user_id, Response.timestamp, *columns)
+            .where(Response.id > last_id,
+                   Response.scoring_version.isnot(None),
+                   or_(Response.scoring_version != version,
+                       Response.ee_score.is_(None)))
+            .order_by(Response.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        keys = [tuple(row[:3]) for row in rows]
+        codes = [[MISSING_CODE if value is None else value for value in row[3:]]
+                 for row in rows]
+        yield keys, codes
+
+
+def _write_chunk(keys, results, version):
+    """Grava as novas pontuações do bloco e atualiza os usuários afetados"""
+    responses = Response.__table__
+    db.session.execute(
+        update(responses)
+        .where(responses.c.id == bindparam('response_id'))
+        .values(scoring_version=version,
+                **{field: bindparam(f'new_{field}')
+                   for field in ('burnout_score', *SUBSCORE_COLUMNS)}),
+        [{'response_id': response_id,
+          **{f'new_{field}': value for field, value in result.items()}}
+         for (response_id, _, _), result in zip(keys, results)])
+
+    # A resposta mais recente de cada usuário tem o mesmo timestamp gravado em
+    # User.last_assessment, o que evita procurá-la na tabela de respostas
+    users = User.__table__
+    db.session.execute(
+        update(users)
+        .where(users.c.id == bindparam('user_id'),
+               users.c.last_assessment == bindparam('timestamp'))
+        .values(latest_burnout_score=bindparam('score')),
+        [{'user_id': user_id, 'timestamp': timestamp, 'score': result['burnout_score']}
+         for (_, user_id, timestamp), result in zip(keys, results)
+         if timestamp is not None])
+
+    # As pontuações do histórico mudaram (ver User.history_version)
+    db.session.execute(
+        update(users)
+        .where(users.c.id.in_(sorted({user_id for _, user_id, _ in keys})))
+        .values(history_version=db.func.coalesce(users.c.history_version, 0) + 1))
+    db.session.commit()
+
+
+def backfill_legacy_subscores():
+    """
+    Preenche as somas das dimensões das respostas antigas (sem versão da
+    fórmula) com um único UPDATE: as questões do MBI foram guardadas, mas o
+    ajuste de estilo de vida não pode ser recuperado. Retorna as linhas
+    atualizadas.
+    """
+    sums = {}
+    for index, name in enumerate(COMPILED_SPEC.dimension_names):
+        terms = [db.func.coalesce(db.func.nullif(getattr(Response, q), MISSING_CODE), 0)
+                 for q in COMPILED_SPEC.numeric_questions
+                 if COMPILED_SPEC.dimension_of[q] == index]
+        sums[f'{name}_score'] = sum(terms[1:], terms[0])
+    result = db.session.execute(
+        update(Response)
+        .where(Response.scoring_version.is_(None), Response.ee_score.is_(None))
+        .values(**sums)
+        .execution_options(synchronize_session=False))
+    db.session.commit()
+    return result.rowcount
+
+
+def rescore_responses(chunk_size=5000, workers=None, version=SCORING_VERSION):
+    """
+    Recalcula Response.burnout_score (e as suas partes) e
+    User.latest_burnout_score das respostas pontuadas com outra versão da
+    fórmula ou ainda sem as partes da pontuação, e preenche as somas das
+    dimensões das respostas antigas. Deve ser chamada dentro do contexto da
+    aplicação. Retorna um dicionário com as estatísticas da execução.
+    """
+    if workers is None:
+        workers = min(4, os.cpu_count() or 1)
+
+    start = time.perf_counter()
+    rescored = 0
+    # Respostas antigas sem versão não guardaram as respostas de estilo de vida
+    skipped = db.session.scalar(
+        select(db.func.count(Response.id)).where(Response.scoring_version.is_(None)))
+    backfilled = backfill_legacy_subscores()
+
+    chunks = _iter_chunks(version, chunk_size)
+    if workers <= 1:
+        for keys, codes in chunks:
+            _write_chunk(keys, _score_chunk(codes), version)
+            rescored += len(keys)
+            logging.info(f"Respostas recalculadas: {rescored}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Limita os blocos em andamento para manter a memória constante
+            pending = deque()
+            for keys, codes in chunks:
+                pending.append((keys, pool.submit(_score_chunk, codes)))
+                while pending and (len(pending) >= workers * 2 or pending[0][1].done()):
+                    keys_done, future = pending.popleft()
+                    _write_chunk(keys_done, future.result(), version)
+                    rescored += len(keys_done)
+                    logging.info(f"Respostas recalculadas: {rescored}")
+            for keys_done, future in pending:
+                _write_chunk(keys_done, future.result(), version)
+                rescored += len(keys_done)
+                logging.info(f"Respostas recalculadas: {rescored}")
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rescored': rescored,
+        'skipped_legacy': skipped,
+        'backfilled_legacy': backfilled,
+        'version': version,
+        'seconds': elapsed,
+    }
@@ -1,18 +1,33 @@
+import heapq
 import os
 import logging
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask import render_template, request, redirect, url_for, flash, session, jsonify
+from functools import wraps
+from itertools import chain
+from flask import render_template, request, redirect, url_for, flash, session, jsonify, current_app, abort, Response as FlaskResponse, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from datetime import datetime
+from datetime import date, datetime
+from sqlalchemy import select, tuple_
 from models import User, Response
+from scoring import SCORING_VERSION, evaluate_responses
+from submissions import build_submission, write_submissions
+from export import ExportStats, iter_csv
+from aggregates import cohort_summary
 from create_app import db
+from downsampling import lttb, weekly_means
+from cache import create_cache
+from metrics import timed_scoring
+from fragments import render_page
+from archive import archived_history
+
+# Origem dos dias do histórico enviado ao gráfico
+EPOCH = date(1970, 1, 1)
 
-# Configura o registro de logs
-logging.basicConfig(level=logging.DEBUG)
 
 # Funções auxiliares
 
 
+@timed_scoring
 def calculate_burnout_score(responses):
     """
     Calcula a pontuação de burnout com base no Inventário de Burnout de Maslach (MBI) adaptado para estudantes.
@@ -28,182 +43,13 @@ def calculate_burnout_score(responses):
     A fórmula para calcular a pontuação final é:
     (EE + DP + (20 - PA)) / pontuação_max_total * 100
     Após a aplicação de ajustes baseados nos fatores de estilo de vida.
+
+    A avaliação é feita pelo motor de pontuação em scoring.py, que compila a
+    especificação do questionário em tabelas de consulta na importação.
+    Retorna um ScoreResult: a pontuação final (burnout_score) e as somas de
+    cada dimensão e o ajuste de estilo de vida, gravados junto com a resposta.
     """
-    try:
-        # Exaustão Emocional (EE) - Questões 5-9
-        ee_questions = [f"q{i}" for i in range(5, 10)]
-        ee_score = 0
-        for q in ee_questions:
-            if q in responses and responses[q].isdigit():
-                ee_score += int(responses[q])
-
-        # Despersonalização/Ceticismo (DP) - Questões 10-13
-        dp_questions = [f"q{i}" for i in range(10, 14)]
-        dp_score = 0
-        for q in dp_questions:
-            if q in responses and responses[q].isdigit():
-                dp_score += int(responses[q])
-
-        # Realização Pessoal (PA) - Questões 14-15 (pontuação invertida)
-        pa_questions = [f"q{i}" for i in range(14, 16)]
-        pa_score = 0
-        for q in pa_questions:
-            if q in responses and responses[q].isdigit():
-                pa_score += int(responses[q])
-
-        # Inverter a pontuação de PA (quanto maior PA, menor o burnout)
-        max_pa_score = 4 * len(pa_questions)
-        reversed_pa_score = max_pa_score - pa_score
-
-        # Ajustes com base no estilo de vida (Q16-Q25)
-        lifestyle_adjustment = 0
-
-        # Questionário Q16 - Horas de Estudo
-        if "q16" in responses:
-            study_response = responses.get("q16")
-            if study_response == "Menos de 2 horas por dia":
-                lifestyle_adjustment += 5
-            elif study_response == "2-4 horas por dia":
-                lifestyle_adjustment += 2.5
-            elif study_response == "4-6 horas por dia":
-                lifestyle_adjustment += 1
-            elif study_response == "6 horas ou mais por dia":
-                lifestyle_adjustment += 0
-
-        # Questionário Q17 - Tempo para Descanso
-        if "q17" in responses:
-            rest_response = responses.get("q17")
-            if rest_response == "Sim, sempre":
-                lifestyle_adjustment += 0
-            elif rest_response == "Às vezes":
-                lifestyle_adjustment += 1
-            elif rest_response == "Raramente":
-                lifestyle_adjustment += 2.5
-            elif rest_response == "Nunca":
-                lifestyle_adjustment += 5
-
-        # Questionário Q18 - Quantidade de Sono
-        if "q18" in responses:
-            sleep_response = responses.get("q18")
-            if sleep_response == "Mais de 8 horas":
-                lifestyle_adjustment += 0
-            elif sleep_response == "7-8 horas":
-                lifestyle_adjustment += 1
-            elif sleep_response == "5-6 horas":
-                lifestyle_adjustment += 2.5
-            elif sleep_response == "Menos de 5 horas":
-                lifestyle_adjustment += 5
-
-        # Questionário Q19 - Atividade Física
-        if "q19" in responses:
-            activity_response = responses.get("q19")
-            if activity_response == "Diariamente":
-                lifestyle_adjustment += 0
-            elif activity_response == "3-5 vezes por semana":
-                lifestyle_adjustment += 1
-            elif activity_response == "1-2 vezes por semana":
-                lifestyle_adjustment += 2.5
-            elif activity_response == "Raramente ou nunca":
-                lifestyle_adjustment += 5
-
-        # Questionário Q20 - Apoio Social
-        if "q20" in responses:
-            support_response = responses.get("q20")
-            if support_response == "Sim, muito apoio":
-                lifestyle_adjustment += 0
-            elif support_response == "Apoio moderado":
-                lifestyle_adjustment += 1
-            elif support_response == "Pouco apoio":
-                lifestyle_adjustment += 2.5
-            elif support_response == "Nenhum apoio":
-                lifestyle_adjustment += 5
-
-        # Questionário Q21 - Nutrição
-        if "q21" in responses:
-            diet_response = responses.get("q21")
-            if diet_response == "Muito boa":
-                lifestyle_adjustment += 0
-            elif diet_response == "Boa":
-                lifestyle_adjustment += 1
-            elif diet_response == "Regular":
-                lifestyle_adjustment += 2.5
-            elif diet_response == "Ruim":
-                lifestyle_adjustment += 5
-            elif diet_response == "Muito ruim":
-                lifestyle_adjustment += 5
-
-        # Questionário Q22 - Atividades de Lazer
-        if "q22" in responses:
-            leisure_response = responses.get("q22")
-            if leisure_response == "Regularmente (várias vezes por semana)":
-                lifestyle_adjustment += 0
-            elif leisure_response == "Ocasionalmente (uma vez por semana)":
-                lifestyle_adjustment += 1
-            elif leisure_response == "Raramente (poucas vezes por mês)":
-                lifestyle_adjustment += 2.5
-            elif leisure_response == "Quase nunca":
-                lifestyle_adjustment += 5
-
-        # Questionário Q23 - Perspectiva de Futuro
-        if "q23" in responses:
-            future_response = responses.get("q23")
-            if future_response == "Muito otimista":
-                lifestyle_adjustment += 0
-            elif future_response == "Otimista":
-                lifestyle_adjustment += 1
-            elif future_response == "Neutro":
-                lifestyle_adjustment += 2.5
-            elif future_response == "Pessimista":
-                lifestyle_adjustment += 5
-            elif future_response == "Muito pessimista":
-                lifestyle_adjustment += 5
-
-        # Questionário Q24 - Estratégias de Enfrentamento
-        if "q24" in responses:
-            coping_response = responses.get("q24")
-            if coping_response == "Técnicas de respiração/meditação":
-                lifestyle_adjustment += 0
-            elif coping_response == "Atividade física":
-                lifestyle_adjustment += 1
-            elif coping_response == "Conversar com amigos/família":
-                lifestyle_adjustment += 2.5
-            elif coping_response == "Atividades de lazer":
-                lifestyle_adjustment += 2.5
-            elif coping_response == "Não tenho estratégias específicas":
-                lifestyle_adjustment += 5
-
-        # Questionário Q25 - Procurar Ajuda
-        if "q25" in responses:
-            help_response = responses.get("q25")
-            if help_response == "Sim, regularmente":
-                lifestyle_adjustment += 0
-            elif help_response == "Sim, ocasionalmente":
-                lifestyle_adjustment += 1
-            elif help_response == "Apenas uma vez":
-                lifestyle_adjustment += 2.5
-            elif help_response == "Nunca, mas considero necessário":
-                lifestyle_adjustment += 3.5
-            elif help_response == "Nunca procurei":
-                lifestyle_adjustment += 5
-
-        # Limite de ajuste de estilo de vida
-        lifestyle_adjustment = min(lifestyle_adjustment, 15)
-
-        # Calcular pontuação total
-        total_score = ee_score + dp_score + reversed_pa_score
-        total_possible = 4 * (len(ee_questions) +
-                              len(dp_questions) + len(pa_questions))
-
-        # Calcular porcentagem de Burnout
-        burnout_percentage = (total_score / total_possible) * 100
-
-        # Aplicar ajuste de estilo de vida
-        adjusted_score = min(100, burnout_percentage + lifestyle_adjustment)
-
-        return round(adjusted_score, 1)
-    except Exception as e:
-        logging.error(f"Erro ao calcular a pontuação de burnout: {e}")
-        return 50.0
+    return evaluate_responses(responses)
 
 
 def is_authenticated():
@@ -211,10 +57,38 @@ def is_authenticated():
     return 'user_id' in session
 
 
+def is_admin(user):
+    """Verifica se o usuário pertence à equipe (e-mail listado em ADMIN_EMAILS)"""
+    return (user is not None and user.is_authenticated
+            and user.email.lower() in current_app.config.get('ADMIN_EMAILS', ()))
+
+
+def admin_required(view):
+    """Restringe a rota aos usuários da equipe"""
+    @wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if not is_admin(current_user):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def get_request_user(user_id):
+    """
+    Obtém o usuário sem repetir consultas na mesma requisição: reaproveita o
+    current_user já carregado pelo Flask-Login ou o mapa de identidade da
+    sessão do SQLAlchemy, que dura uma requisição.
+    """
+    if current_user and current_user.is_authenticated and current_user.id == user_id:
+        return current_user._get_current_object()
+    return db.session.get(User, user_id)
+
+
 def get_user_data(user_id):
     """Recupera os dados do usuário no banco de dados"""
     try:
-        user = User.query.get(user_id)
+        user = get_request_user(user_id)
         if not user:
             return None
 
@@ -222,55 +96,53 @@ def get_user_data(user_id):
             'name': user.name,
             'email': user.email,
             'latest_burnout_score': user.latest_burnout_score,
-            'last_assessment': user.last_assessment
+            'last_assessment': user.last_assessment,
+            'history_version': user.history_version,
         }
     except Exception as e:
         logging.error(f"Erro ao recuperar dados do usuário: {e}")
         return None
 
 
-def save_questionnaire_responses(user_id, responses, burnout_score):
-    """Salva as respostas do questionário no banco de dados"""
+def save_questionnaire_responses(user_id, responses, result):
+    """Salva as respostas do questionário e o ScoreResult no banco de dados"""
+    # Obtém o timestamp atual
+    timestamp = datetime.now()
     try:
-        # Obtém o timestamp atual
-        timestamp = datetime.now()
+        submission = build_submission(user_id, responses, result, timestamp)
+    except Exception as e:
+        logging.error(f"Erro ao preparar as respostas do questionário: {e}")
+        return False
+
+    # Gravação agrupada pela fila, quando ativada; em caso de falha usa a
+    # gravação direta abaixo
+    writer = current_app.extensions.get('submission_writer')
+    if writer is not None:
+        try:
+            writer.write(submission)
+            invalidate_dashboard(user_id)
+            return True
+        except Exception as e:
+            logging.error(
+                f"Erro na fila de gravação, usando a gravação direta: {e}")
 
-        # Obtém o usuário no banco de dados
-        user = User.query.get(user_id)
+    try:
+        # Obtém o usuário (já carregado nesta requisição pelo Flask-Login)
+        user = get_request_user(user_id)
 
         if not user:
             logging.error(
                 f"Usuário não encontrado no banco de dados: {user_id}")
             return False
 
-        # Cria uma nova resposta
-        new_response = Response(
-            user_id=user.id,
-            burnout_score=burnout_score,
-            timestamp=timestamp
-        )
-
-        # Adiciona as respostas individuais das questões
-        for q, answer in responses.items():
-            if hasattr(new_response, q):  # Verifica se o campo da questão existe
-                # Trata as respostas numéricas (para questões de cálculo de Burnout)
-                if q in [f"q{i}" for i in range(5, 16)] and answer.isdigit():
-                    setattr(new_response, q, int(answer))
-                # Trata as questões demográficas e de estilo de vida com valores textuais
-                elif q in [f"q{i}" for i in range(1, 5)] or q in [f"q{i}" for i in range(16, 26)]:
-                    # Armazena o valor 1 para indicar que a resposta foi fornecida
-                    # As respostas textuais são usadas no cálculo de Burnout,
-                    # mas não precisam ser armazenadas nos campos inteiros
-                    setattr(new_response, q, 1)
-
-        # Atualiza a pontuação mais recente do usuário
-        user.latest_burnout_score = burnout_score
-        user.last_assessment = timestamp
-
-        # Adiciona ao banco de dados
-        db.session.add(new_response)
+        # Grava a resposta e atualiza a pontuação mais recente do usuário
+        write_submissions([submission])
         db.session.commit()
 
+        # Os dados do dashboard do usuário mudaram (usa user_id: após o
+        # commit, acessar user.id recarregaria o usuário do banco)
+        invalidate_dashboard(user_id)
+
         return True
     except Exception as e:
         db.session.rollback()
@@ -278,27 +150,157 @@ def save_questionnaire_responses(user_id, responses, burnout_score):
         return False
 
 
-def get_burnout_history(user_id):
-    """Obtém o histórico de Burnout do usuário"""
+def _iter_recent_history(user_id, page_size, since):
+    """
+    Percorre as avaliações do usuário em Response em ordem cronológica, em
+    páginas por chave (timestamp, id), usando o índice (user_id, timestamp).
+    Retorna tuplas (timestamp, id, pontuação).
+    """
+    last_key = None
+    while True:
+        query = (
+            select(Response.timestamp, Response.id, Response.burnout_score)
+            # Respostas sem data não podem ser posicionadas no gráfico
+            .where(Response.user_id == user_id, Response.timestamp.isnot(None))
+            .order_by(Response.timestamp, Response.id)
+            .limit(page_size)
+        )
+        if since is not None:
+            query = query.where(Response.timestamp > since)
+        if last_key is not None:
+            query = query.where(
+                tuple_(Response.timestamp, Response.id) > tuple_(*last_key))
+
+        rows = db.session.execute(query).all()
+        for row in rows:
+            yield tuple(row)
+        if len(rows) < page_size:
+            return
+        last_key = rows[-1][:2]
+
+
+def iter_burnout_history(user_id, page_size=500, since=None):
+    """
+    Percorre o histórico do usuário em ordem cronológica: as avaliações
+    arquivadas (archive.py) intercaladas com as de Response. Retorna pares
+    (timestamp, pontuação), opcionalmente só os posteriores a `since`.
+    """
+    recent = _iter_recent_history(user_id, page_size, since)
+    archived = archived_history(user_id, since)
+    if archived:
+        first = next(recent, None)
+        if first is None or archived[-1] < first:
+            # Caso comum: tudo o que foi arquivado é anterior ao que ficou
+            recent = chain(archived, [first] if first else [], recent)
+        else:
+            # Respostas importadas com datas antigas depois do arquivamento
+            recent = heapq.merge(archived, chain([first], recent))
+    for timestamp, _, score in recent:
+        yield timestamp, score
+
+
+def get_burnout_history(user_id, max_points=None, mode=None, since=None):
+    """
+    Obtém o histórico de Burnout do usuário em colunas paralelas: 'days' (dias
+    desde 01/01/1970) e 'scores'. O histórico é reduzido a no máximo
+    `max_points` pontos para o gráfico; `mode` pode ser 'lttb' (mantém o
+    formato da curva), 'week' (média semanal) ou 'none', e por padrão vêm da
+    configuração HISTORY_MAX_POINTS e HISTORY_DOWNSAMPLING. Com `since`, traz
+    apenas as avaliações posteriores, sem redução.
+    """
     try:
-        # Obtém as respostas do banco de dados
-        responses = Response.query.filter_by(
-            user_id=user_id).order_by(Response.timestamp).all()
-
-        history = []
-        for response in responses:
-            history.append({
-                'score': response.burnout_score,
-                'timestamp': response.timestamp.strftime('%d/%m/%Y') if response.timestamp else 'Desconhecido'
-            })
+        if max_points is None:
+            max_points = current_app.config.get('HISTORY_MAX_POINTS', 120)
+        if mode is None:
+            mode = current_app.config.get('HISTORY_DOWNSAMPLING', 'lttb')
+        if since is not None:
+            mode = 'none'
+
+        points = [(timestamp.timestamp(), score, timestamp)
+                  for timestamp, score in iter_burnout_history(user_id, since=since)]
+
+        if mode == 'week':
+            points = [(week.timestamp(), round(score, 1), week)
+                      for week, score in weekly_means(
+                          [(timestamp, score) for _, score, timestamp in points])]
+        if mode in ('lttb', 'week') and max_points:
+            points = lttb(points, max_points)
 
-        return history
+        return {
+            'days': [(timestamp.date() - EPOCH).days for _, _, timestamp in points],
+            'scores': [score for _, score, _ in points],
+        }
     except Exception as e:
         logging.error(f"Erro ao recuperar o histórico de burnout: {e}")
-        return []
+        return {'days': [], 'scores': []}
+
+
+def history_etag(user, last=None):
+    """
+    ETag do histórico do usuário: muda quando ele envia uma nova avaliação
+    (User.last_assessment), quando o histórico muda sem movê-la
+    (User.history_version) ou quando muda a forma de calcular ou reduzir o
+    histórico. Com `last`, retorna o ETag que a mesma versão do histórico
+    tinha quando a avaliação mais recente era `last`.
+    """
+    config = current_app.config
+    if last is None:
+        last = user.last_assessment
+    last = last.isoformat() if last else 'none'
+    return (f"h{user.id}-{last}-r{user.history_version or 0}-v{SCORING_VERSION}-"
+            f"{config.get('HISTORY_DOWNSAMPLING')}{config.get('HISTORY_MAX_POINTS')}")
+
+
+def get_dashboard_cache():
+    """Retorna o cache do dashboard da aplicação atual (None se desativado)"""
+    return current_app.extensions.get('dashboard_cache')
+
+
+def get_dashboard_data(user_id):
+    """
+    Obtém os dados exibidos no dashboard do usuário, usando o cache quando
+    disponível. Só mudam quando o usuário envia o questionário.
+
+    O cache em memória é de cada processo e a invalidação só alcança o worker
+    que recebeu a submissão: por isso a entrada guarda o User.last_assessment
+    e o User.history_version com que foi montada e só é usada se eles ainda
+    forem os do usuário (já carregado pelo Flask-Login, sem consulta extra).
+    """
+    user_data = get_user_data(user_id)
+    if not user_data:
+        return None
+
+    cache = get_dashboard_cache()
+    key = f"dashboard:{user_id}"
+    if cache is not None:
+        data = cache.get(key)
+        if (data is not None
+                and data.get('last_assessment') == user_data['last_assessment']
+                and data.get('history_version') == user_data['history_version']):
+            return data
+
+    data = {
+        'user_name': user_data.get('name'),
+        'latest_score': user_data.get('latest_burnout_score'),
+        'last_assessment': user_data['last_assessment'],
+        'history_version': user_data['history_version'],
+    }
+    if cache is not None:
+        cache.set(key, data)
+    return data
+
+
+def invalidate_dashboard(user_id):
+    """Remove do cache os dados do dashboard do usuário"""
+    cache = get_dashboard_cache()
+    if cache is not None:
+        cache.delete(f"dashboard:{user_id}")
 
 
 def init_app(app):
+    # Cache dos dados do dashboard
+    app.extensions['dashboard_cache'] = create_cache(app.config)
+
     # Configura o Flask-Login
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -306,7 +308,9 @@ def init_app(app):
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Única consulta à tabela de usuários por requisição; as demais
+        # funções reaproveitam este objeto (ver get_request_user)
+        return db.session.get(User, int(user_id))
 
     # Rotas
     @app.route('/')
@@ -379,6 +383,15 @@ def init_app(app):
                     flash('Email ou senha inválidos', 'error')
                     return redirect(url_for('login'))
 
+                # Atualiza o hash se os parâmetros de custo mudaram
+                if user.password_needs_rehash():
+                    try:
+                        user.set_password(password)
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        logging.error(f"Erro ao atualizar o hash da senha: {e}")
+
                 # Configura a sessão
                 session['user_id'] = user.id
                 session['user_name'] = user.name
@@ -407,29 +420,67 @@ def init_app(app):
     @login_required
     def dashboard():
         user_id = current_user.id  # Usando o current_user do Flask-Login
-        user_data = get_user_data(user_id)
+        dashboard_data = get_dashboard_data(user_id)
 
-        if not user_data:
+        if not dashboard_data:
             flash('Erro ao carregar dados do usuário', 'error')
             return redirect(url_for('index'))
 
-        # Obtém o histórico de Burnout
-        burnout_history = get_burnout_history(user_id)
-
         # Obtém a última pontuação de Burnout
-        latest_score = user_data.get('latest_burnout_score')
+        latest_score = dashboard_data['latest_score']
 
         # Verifica se o usuário completou o questionário
         has_completed_questionnaire = latest_score is not None
 
         return render_template(
             'dashboard.html',
-            user_name=user_data.get('name'),
+            user_name=dashboard_data['user_name'],
             latest_score=latest_score,
-            burnout_history=burnout_history,
             has_completed_questionnaire=has_completed_questionnaire
         )
 
+    @app.route('/api/history')
+    @login_required
+    def api_history():
+        """
+        Histórico do usuário para o gráfico do dashboard, em colunas paralelas.
+        O ETag depende só de User.last_assessment e User.history_version (já
+        carregados pelo Flask-Login), então o 304 é respondido sem consultar
+        as respostas. Com ?since=<until da resposta anterior> retorna apenas os
+        pontos novos, desde que o If-None-Match seja o ETag daquela resposta
+        para a versão atual do histórico e da configuração; senão (histórico
+        alterado por uma importação, nova fórmula, outra redução) retorna o
+        histórico completo, que o navegador usa no lugar do guardado.
+        """
+        etag = history_etag(current_user)
+        last = current_user.last_assessment
+        if request.if_none_match.contains(etag):
+            response = FlaskResponse(status=304)
+        else:
+            since = request.args.get('since')
+            if since:
+                try:
+                    since = datetime.fromisoformat(since)
+                except ValueError:
+                    abort(400)
+            if (since and current_app.config.get('HISTORY_DOWNSAMPLING') != 'week'
+                    and request.if_none_match.contains(history_etag(current_user, since))):
+                history = get_burnout_history(current_user.id, since=since)
+            else:
+                # Histórico completo (as médias semanais não podem ser
+                # completadas incrementalmente)
+                since = None
+                history = get_burnout_history(current_user.id)
+            response = jsonify({
+                **history,
+                'since': since.isoformat() if since else None,
+                'until': last.isoformat() if last else None,
+            })
+        response.set_etag(etag)
+        # O navegador sempre revalida; os dados são do usuário
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
     @app.route('/questionnaire', methods=['GET', 'POST'])
     @login_required
     def questionnaire():
@@ -441,22 +492,41 @@ def init_app(app):
                 key) for key in request.form if key.startswith('q')}
 
             # Calcula a pontuação de Burnout
-            burnout_score = calculate_burnout_score(responses)
+            result = calculate_burnout_score(responses)
 
             # Salva as respostas no banco de dados
-            if save_questionnaire_responses(user_id, responses, burnout_score):
+            if save_questionnaire_responses(user_id, responses, result):
                 flash('Questionário enviado com sucesso!', 'success')
             else:
                 flash('Erro ao salvar respostas. Tente novamente.', 'error')
 
             return redirect(url_for('dashboard'))
 
-        return render_template('questionnaire.html')
+        # Página pré-renderizada (ver fragments.py)
+        return render_page('questionnaire.html')
 
     @app.route('/tips')
     @login_required
     def tips():
-        return render_template('tips.html')
+        return render_page('tips.html')
+
+    @app.route('/admin/export.csv')
+    @admin_required
+    def export_csv():
+        # Exportação em streaming: o CSV é enviado bloco a bloco
+        chunk_size = request.args.get('chunk_size', 5000, type=int)
+        stats = ExportStats()
+        return FlaskResponse(
+            stream_with_context(iter_csv(chunk_size, stats)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=avaliacoes.csv'})
+
+    @app.route('/admin/cohort.json')
+    @admin_required
+    def cohort_json():
+        # Resumo institucional lido apenas dos agregados semanais
+        weeks = request.args.get('weeks', type=int)
+        return jsonify(cohort_summary(weeks))
 
     # Tratadores de erro
     @app.errorhandler(404)
@@ -0,0 +1,469 @@
+import logging
+from typing import NamedTuple
+
+# Motor de pontuação de Burnout declarado como dados.
+#
+# A especificação abaixo descreve o questionário (dimensões do MBI e pesos das
+# respostas de estilo de vida) e é compilada uma única vez, na importação do
+# módulo, em tabelas de consulta. Calcular a pontuação de uma resposta passa a
+# ser apenas uma sequência de consultas a dicionários.
+#
+# Qualquer alteração em pesos ou dimensões deve incrementar "version", pois as
+# pontuações já armazenadas deixam de corresponder à fórmula atual.
+#
+# As respostas textuais são armazenadas como a posição da opção na
+# especificação; por isso novas opções só podem ser acrescentadas ao final.
+
+SCORING_SPEC = {
+    'version': 1,
+    # Valor máximo de cada questão numérica (escala de 0 a 4)
+    'max_answer': 4,
+    # Dimensões do MBI: questões e se a pontuação é invertida
+    'dimensions': {
+        'ee': {'questions': [f"q{i}" for i in range(5, 10)], 'reversed': False},
+        'dp': {'questions': [f"q{i}" for i in range(10, 14)], 'reversed': False},
+        'pa': {'questions': [f"q{i}" for i in range(14, 16)], 'reversed': True},
+    },
+    # Respostas de estilo de vida (Q16-Q25) e o ajuste somado a cada uma.
+    # A ordem das opções segue a ordem do formulário.
+    'lifestyle': {
+        # Horas de Estudo
+        'q16': (
+            ('Menos de 2 horas por dia', 5),
+            ('2-4 horas por dia', 2.5),
+            ('4-6 horas por dia', 1),
+            ('6 horas ou mais por dia', 0),
+        ),
+        # Tempo para Descanso
+        'q17': (
+            ('Sim, sempre', 0),
+            ('Às vezes', 1),
+            ('Raramente', 2.5),
+            ('Nunca', 5),
+        ),
+        # Quantidade de Sono
+        'q18': (
+            ('Menos de 5 horas', 5),
+            ('5-6 horas', 2.5),
+            ('7-8 horas', 1),
+            ('Mais de 8 horas', 0),
+        ),
+        # Atividade Física
+        'q19': (
+            ('Diariamente', 0),
+            ('3-5 vezes por semana', 1),
+            ('1-2 vezes por semana', 2.5),
+            ('Raramente ou nunca', 5),
+        ),
+        # Apoio Social
+        'q20': (
+            ('Sim, muito apoio', 0),
+            ('Apoio moderado', 1),
+            ('Pouco apoio', 2.5),
+            ('Nenhum apoio', 5),
+        ),
+        # Nutrição
+        'q21': (
+            ('Muito boa', 0),
+            ('Boa', 1),
+            ('Regular', 2.5),
+            ('Ruim', 5),
+            ('Muito ruim', 5),
+        ),
+        # Atividades de Lazer
+        'q22': (
+            ('Regularmente (várias vezes por semana)', 0),
+            ('Ocasionalmente (uma vez por semana)', 1),
+            ('Raramente (poucas vezes por mês)', 2.5),
+            ('Quase nunca', 5),
+        ),
+        # Perspectiva de Futuro
+        'q23': (
+            ('Muito otimista', 0),
+            ('Otimista', 1),
+            ('Neutro', 2.5),
+            ('Pessimista', 5),
+            ('Muito pessimista', 5),
+        ),
+        # Estratégias de Enfrentamento
+        'q24': (
+            ('Técnicas de respiração/meditação', 0),
+            ('Atividade física', 1),
+            ('Conversar com amigos/família', 2.5),
+            ('Atividades de lazer', 2.5),
+            ('Não tenho estratégias específicas', 5),
+        ),
+        # Procurar Ajuda
+        'q25': (
+            ('Sim, regularmente', 0),
+            ('Sim, ocasionalmente', 1),
+            ('Apenas uma vez', 2.5),
+            ('Nunca, mas considero necessário', 3.5),
+            ('Nunca procurei', 5),
+        ),
+    },
+    # Opções das questões demográficas (Q1-Q4), que não entram na pontuação
+    'demographics': {
+        # Idade
+        'q1': ('Menos de 17 anos', '17-20 anos', '21-25 anos', '26-30 anos',
+               '31 anos ou mais'),
+        # Gênero
+        'q2': ('Masculino', 'Feminino', 'Prefiro não dizer', 'Outro'),
+        # Ano do curso
+        'q3': ('1º ano', '2º ano', '3º ano', '4º ano ou mais'),
+        # Área de estudo
+        'q4': ('Ciências Exatas', 'Ciências Humanas', 'Ciências Biológicas',
+               'Saúde', 'Engenharias', 'Outros'),
+    },
+    # Limite do ajuste de estilo de vida
+    'lifestyle_cap': 15,
+    # Pontuação máxima final (porcentagem)
+    'max_score': 100,
+}
+
+# Pontuação usada quando a resposta não pode ser avaliada
+FALLBACK_SCORE = 50.0
+
+# Código usado nas matrizes de respostas para questões não respondidas
+MISSING_CODE = -1
+
+# Ordem das colunas nas matrizes de respostas (q1 a q25)
+QUESTION_COLUMNS = tuple(f"q{i}" for i in range(1, 26))
+
+# Versão da codificação das respostas armazenadas em Response
+ANSWERS_VERSION = 1
+
+
+class CompiledSpec:
+    """Tabelas de consulta geradas a partir de uma especificação de pontuação"""
+
+    def __init__(self, spec):
+        self.version = spec['version']
+        self.max_answer = spec['max_answer']
+        self.lifestyle_cap = spec['lifestyle_cap']
+        self.max_score = spec['max_score']
+        self.dimension_names = tuple(spec['dimensions'])
+
+        # Questões numéricas na ordem de avaliação e o índice da dimensão
+        self.numeric_questions = tuple(
+            q for dim in spec['dimensions'].values() for q in dim['questions'])
+        self.dimension_of = {
+            q: index
+            for index, dim in enumerate(spec['dimensions'].values())
+            for q in dim['questions']
+        }
+        self.dimension_sizes = tuple(
+            len(dim['questions']) for dim in spec['dimensions'].values())
+        # Constante somada às dimensões invertidas (máximo possível da dimensão)
+        self.reversed_offsets = tuple(
+            self.max_answer * len(dim['questions']) if dim['reversed'] else 0
+            for dim in spec['dimensions'].values())
+        self.dimension_signs = tuple(
+            -1 if dim['reversed'] else 1 for dim in spec['dimensions'].values())
+        self.total_possible = self.max_answer * len(self.numeric_questions)
+
+        # Valores das respostas numéricas mais comuns, evitando int() por questão
+        self.digit_values = {str(v): v for v in range(self.max_answer + 1)}
+
+        # Peso de cada resposta de estilo de vida
+        self.lifestyle_questions = tuple(spec['lifestyle'])
+        self.lifestyle_weights = {
+            q: dict(options) for q, options in spec['lifestyle'].items()
+        }
+
+        # Código de cada opção (posição no formulário) e pesos indexados pelo
+        # código, com uma posição extra ao final para MISSING_CODE (-1)
+        self.lifestyle_options = {
+            q: tuple(answer for answer, _ in options)
+            for q, options in spec['lifestyle'].items()
+        }
+        self.lifestyle_codes = {
+            q: {answer: code for code, answer in enumerate(answers)}
+            for q, answers in self.lifestyle_options.items()
+        }
+        self.lifestyle_weight_table = {
+            q: tuple(weight for _, weight in options) + (0,)
+            for q, options in spec['lifestyle'].items()
+        }
+
+        # Opções e códigos de todas as questões textuais (demográficas e de
+        # estilo de vida); as numéricas são codificadas pelo próprio valor
+        self.answer_options = {**spec['demographics'], **self.lifestyle_options}
+        self.answer_codes = {
+            q: {answer: code for code, answer in enumerate(answers)}
+            for q, answers in self.answer_options.items()
+        }
+
+
+def compile_spec(spec):
+    """Compila uma especificação de pontuação em tabelas de consulta"""
+    return CompiledSpec(spec)
+
+
+COMPILED_SPEC = compile_spec(SCORING_SPEC)
+SCORING_VERSION = COMPILED_SPEC.version
+
+
+def _numeric_value(answer, compiled):
+    """
+    Converte uma resposta numérica do formulário; None se não for numérica ou
+    estiver fora da escala (0 a max_answer), como uma questão não respondida.
+    Usa isdecimal: isdigit aceita dígitos como '²', que int() rejeita.
+    """
+    value = compiled.digit_values.get(answer)
+    if value is None and answer.isdecimal():
+        value = int(answer)
+        if value > compiled.max_answer:
+            return None
+    return value
+
+
+def dimension_scores(responses, compiled=COMPILED_SPEC):
+    """Retorna a soma bruta de cada dimensão do MBI, na ordem da especificação"""
+    sums = [0] * len(compiled.dimension_names)
+    dimension_of = compiled.dimension_of
+    for q in compiled.numeric_questions:
+        answer = responses.get(q)
+        if answer is None:
+            continue
+        value = _numeric_value(answer, compiled)
+        if value is not None:
+            sums[dimension_of[q]] += value
+    return sums
+
+
+def lifestyle_adjustment(responses, compiled=COMPILED_SPEC):
+    """Retorna o ajuste de estilo de vida (Q16-Q25), já limitado"""
+    adjustment = 0
+    for q in compiled.lifestyle_questions:
+        answer = responses.get(q)
+        if answer is not None:
+            adjustment += compiled.lifestyle_weights[q].get(answer, 0)
+    return min(adjustment, compiled.lifestyle_cap)
+
+
+class ScoreResult(NamedTuple):
+    """
+    Resultado da avaliação de uma resposta: a pontuação final e as partes que
+    a compõem. As dimensões são as somas brutas das respostas (PA sem a
+    inversão: valores altos indicam maior realização pessoal).
+    """
+    burnout_score: float
+    ee_score: int = None
+    dp_score: int = None
+    pa_score: int = None
+    lifestyle_adjustment: float = None
+
+
+# Colunas de Response que guardam as partes da pontuação
+SUBSCORE_COLUMNS = ScoreResult._fields[1:]
+
+
+def evaluate_responses(responses, compiled=COMPILED_SPEC):
+    """
+    Avalia um conjunto de respostas do formulário e retorna um ScoreResult.
+
+    As somas das dimensões são combinadas como EE + DP + (máximo de PA - PA),
+    convertidas em porcentagem do total possível e acrescidas do ajuste de
+    estilo de vida, limitando o resultado a 100.
+    """
+    try:
+        sums = dimension_scores(responses, compiled)
+        total_score = 0
+        for value, sign, offset in zip(sums, compiled.dimension_signs,
+                                       compiled.reversed_offsets):
+            total_score += offset + sign * value
+
+        adjustment = lifestyle_adjustment(responses, compiled)
+        burnout_percentage = (total_score / compiled.total_possible) * 100
+        adjusted_score = min(compiled.max_score, burnout_percentage + adjustment)
+
+        return ScoreResult(round(adjusted_score, 1), *sums, adjustment)
+    except Exception as e:
+        logging.error(f"Erro ao calcular a pontuação de burnout: {e}")
+        return ScoreResult(FALLBACK_SCORE)
+
+
+def score_responses(responses, compiled=COMPILED_SPEC):
+    """Calcula apenas a pontuação de Burnout (ver evaluate_responses)"""
+    return evaluate_responses(responses, compiled).burnout_score
+
+
+# Codificação das respostas
+
+
+def encode_answer(question, answer, compiled=COMPILED_SPEC):
+    """Converte uma resposta do formulário no seu código inteiro"""
+    if answer is None:
+        return MISSING_CODE
+    if question in compiled.answer_codes:
+        return compiled.answer_codes[question].get(answer, MISSING_CODE)
+    value = _numeric_value(answer, compiled)
+    return MISSING_CODE if value is None else value
+
+
+def decode_answer(question, code, compiled=COMPILED_SPEC):
+    """Converte um código armazenado de volta na resposta do formulário"""
+    if code is None or code == MISSING_CODE:
+        return None
+    options = compiled.answer_options.get(question)
+    if options is None:
+        return str(code)
+    return options[code] if 0 <= code < len(options) else None
+
+
+def encode_answers(responses, compiled=COMPILED_SPEC):
+    """
+    Codifica as respostas do formulário como {questão: código} para q1 a q25.
+    Questões sem resposta (ou com resposta desconhecida) recebem None.
+    """
+    codes = {}
+    for q in QUESTION_COLUMNS:
+        code = encode_answer(q, responses.get(q), compiled)
+        codes[q] = None if code == MISSING_CODE else code
+    return codes
+
+
+def decode_answers(codes, compiled=COMPILED_SPEC):
+    """
+    Reconstrói as respostas do formulário a partir dos códigos armazenados.
+    Aceita um dicionário {questão: código} ou uma sequência na ordem de
+    QUESTION_COLUMNS; questões sem resposta são omitidas.
+    """
+    if not isinstance(codes, dict):
+        codes = dict(zip(QUESTION_COLUMNS, codes))
+    answers = {}
+    for q, code in codes.items():
+        answer = decode_answer(q, code, compiled)
+        if answer is not None:
+            answers[q] = answer
+    return answers
+
+
+# Pontuação em lote (vetorizada)
+
+
+def _require_numpy():
+    """Importa o NumPy sob demanda; apenas a pontuação em lote depende dele"""
+    try:
+        import numpy
+    except ImportError as e:
+        raise RuntimeError(
+            "A pontuação em lote requer o NumPy (pip install numpy)") from e
+    return numpy
+
+
+def _column_codes(np, question, column, n_rows, compiled):
+    """Normaliza uma coluna (códigos inteiros ou textos) para um array de códigos"""
+    if column is None:
+        return np.full(n_rows, MISSING_CODE, dtype=np.int64)
+    column = np.asarray(column)
+    if column.dtype.kind in 'iu':
+        return column.astype(np.int64, copy=False)
+    # Colunas textuais: cada valor distinto é convertido uma única vez
+    lookup = {}
+    codes = np.empty(len(column), dtype=np.int64)
+    for i, answer in enumerate(column.tolist()):
+        code = lookup.get(answer)
+        if code is None:
+            code = lookup[answer] = encode_answer(question, answer, compiled)
+        codes[i] = code
+    return codes
+
+
+def _batch_components(answers, compiled):
+    """Somas das dimensões e ajuste de estilo de vida (em meios pontos) em lote"""
+    np = _require_numpy()
+
+    if isinstance(answers, dict):
+        columns = answers
+        n_rows = next(
+            (len(col) for col in columns.values() if col is not None), 0)
+    else:
+        matrix = np.asarray(answers)
+        if matrix.ndim != 2 or matrix.shape[1] != len(QUESTION_COLUMNS):
+            raise ValueError(
+                f"Esperada uma matriz (n, {len(QUESTION_COLUMNS)}) de códigos")
+        columns = {q: matrix[:, i] for i, q in enumerate(QUESTION_COLUMNS)}
+        n_rows = matrix.shape[0]
+
+    # Somas brutas das dimensões do MBI; códigos fora da escala (gravados
+    # antes de encode_answer limitá-los) contam como não respondidos
+    sums = np.zeros((len(compiled.dimension_names), n_rows), dtype=np.int64)
+    for q in compiled.numeric_questions:
+        codes = _column_codes(np, q, columns.get(q), n_rows, compiled)
+        sums[compiled.dimension_of[q]] += np.where(
+            (codes < 0) | (codes > compiled.max_answer), 0, codes)
+
+    # Ajuste de estilo de vida em meios pontos, para manter a soma inteira
+    adjustment2 = np.zeros(n_rows, dtype=np.int64)
+    for q in compiled.lifestyle_questions:
+        codes = _column_codes(np, q, columns.get(q), n_rows, compiled)
+        weights2 = np.array(
+            [int(w * 2) for w in compiled.lifestyle_weight_table[q]], dtype=np.int64)
+        # Códigos desconhecidos valem zero, assim como MISSING_CODE
+        codes = np.where((codes < 0) | (codes >= len(weights2) - 1),
+                         len(weights2) - 1, codes)
+        adjustment2 += weights2[codes]
+    adjustment2 = np.minimum(adjustment2, compiled.lifestyle_cap * 2)
+    return np, sums, adjustment2
+
+
+def _batch_scores(np, sums, adjustment2, compiled):
+    """Pontuações finais a partir das partes calculadas em _batch_components"""
+    n_rows = len(adjustment2)
+    if n_rows == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    # Soma das dimensões, já com as dimensões invertidas aplicadas
+    total = np.zeros(n_rows, dtype=np.int64)
+    for dimension, sign in enumerate(compiled.dimension_signs):
+        total += sign * sums[dimension]
+    total += sum(compiled.reversed_offsets)
+
+    # As pontuações possíveis são poucas: calcula cada combinação distinta de
+    # (total, ajuste) presente no bloco com a mesma aritmética de
+    # score_responses (incluindo o arredondamento do Python) e distribui o
+    # resultado por consulta
+    total_min = int(total.min())
+    width = int(adjustment2.max()) + 1
+    keys, positions = np.unique((total - total_min) * width + adjustment2,
+                                return_inverse=True)
+    table = np.empty(len(keys), dtype=np.float64)
+    for index, key in enumerate(keys.tolist()):
+        total_score = total_min + key // width
+        burnout_percentage = (total_score / compiled.total_possible) * 100
+        table[index] = round(min(compiled.max_score,
+                                 burnout_percentage + (key % width) / 2), 1)
+    return table[positions]
+
+
+def score_batch(answers, compiled=COMPILED_SPEC):
+    """
+    Calcula as pontuações de Burnout de muitas respostas de uma só vez.
+
+    `answers` pode ser um array NumPy de códigos com uma coluna por questão
+    (q1 a q25, na ordem de QUESTION_COLUMNS) ou um dicionário {questão: array}
+    com códigos inteiros ou as respostas textuais do formulário. Questões
+    ausentes ou com MISSING_CODE não contribuem para a pontuação.
+
+    Nas questões numéricas o código é o próprio valor respondido; nas de estilo
+    de vida é a posição da opção na especificação. O resultado é idêntico,
+    linha a linha, ao de score_responses.
+    """
+    np, sums, adjustment2 = _batch_components(answers, compiled)
+    return _batch_scores(np, sums, adjustment2, compiled)
+
+
+def evaluate_batch(answers, compiled=COMPILED_SPEC):
+    """
+    Como score_batch, mas retorna um dicionário de arrays com os campos de
+    ScoreResult (burnout_score e as partes da pontuação), linha a linha iguais
+    aos de evaluate_responses.
+    """
+    np, sums, adjustment2 = _batch_components(answers, compiled)
+    result = {'burnout_score': _batch_scores(np, sums, adjustment2, compiled)}
+    for name, dimension in zip(SUBSCORE_COLUMNS, sums):
+        result[name] = dimension
+    result['lifestyle_adjustment'] = adjustment2 / 2
+    return result
@@ -0,0 +1,13 @@
+import os
+
+# Leitura das configurações do ambiente compartilhada pelos módulos.
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def env_bool(name, default):
+    """Valor booleano da variável de ambiente `name` ('1', 'true', 'yes' ou 'on')"""
+    value = os.environ.get(name)
+    if value is None:
+        return bool(default)
+    return value.strip().lower() in TRUE_VALUES
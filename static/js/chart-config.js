@@ -71,14 +71,78 @@ function createBurnoutScoreChart(canvasId, burnoutScore) {
   chartContainer.appendChild(centerText);
 }
 
+/**
+ * Carrega o histórico de burnout de /api/history, guardando-o na sessão do
+ * navegador. Com um histórico já guardado, pede apenas os pontos novos
+ * (since=) e recebe 304 quando nada mudou.
+ * @param {string} url - Endereço da API de histórico
+ * @param {string} storageKey - Chave do histórico no sessionStorage
+ * @returns {Promise<Object>} Histórico em colunas ({days, scores})
+ */
+async function loadBurnoutHistory(url, storageKey) {
+  let cached = null;
+  try {
+    cached = JSON.parse(sessionStorage.getItem(storageKey));
+  } catch (e) {
+    cached = null;
+  }
+
+  const headers = {};
+  let requestUrl = url;
+  if (cached && cached.etag) {
+    headers['If-None-Match'] = cached.etag;
+    if (cached.until) {
+      requestUrl += `?since=${encodeURIComponent(cached.until)}`;
+    }
+  }
+
+  const response = await fetch(requestUrl, { headers: headers, credentials: 'same-origin' });
+  if (response.status === 304 && cached) {
+    return cached;
+  }
+  if (!response.ok) {
+    return cached || { days: [], scores: [] };
+  }
+
+  const data = await response.json();
+  let history;
+  if (data.since && cached) {
+    // Resposta incremental: acrescenta os pontos novos aos já guardados
+    history = {
+      days: cached.days.concat(data.days),
+      scores: cached.scores.concat(data.scores)
+    };
+  } else {
+    history = { days: data.days, scores: data.scores };
+  }
+  history.until = data.until;
+  history.etag = response.headers.get('ETag');
+
+  try {
+    sessionStorage.setItem(storageKey, JSON.stringify(history));
+  } catch (e) {
+    // Armazenamento indisponível ou cheio: o histórico só não fica guardado
+  }
+  return history;
+}
+
+/**
+ * Converte dias desde 01/01/1970 em uma data no formato dd/mm/aaaa
+ * @param {number} day - Dias desde 01/01/1970
+ */
+function formatEpochDay(day) {
+  return new Date(day * 86400000).toLocaleDateString('pt-BR', { timeZone: 'UTC' });
+}
+
 /**
  * Cria um gráfico de linha para exibir o histórico de burnout
  * @param {string} canvasId - O ID do elemento canvas
- * @param {Array} historyData - Array de objetos com timestamp e score
+ * @param {Object} historyData - Histórico em colunas: days (dias desde
+ *   01/01/1970) e scores
  */
 function createBurnoutHistoryChart(canvasId, historyData) {
   // Lida com dados vazios
-  if (!historyData || historyData.length === 0) {
+  if (!historyData || !historyData.days || historyData.days.length === 0) {
     const container = document.getElementById(canvasId).parentNode;
     const message = document.createElement('div');
     message.className = 'text-center text-muted p-4';
@@ -91,8 +155,8 @@ function createBurnoutHistoryChart(canvasId, historyData) {
   const ctx = document.getElementById(canvasId).getContext('2d');
   
   // Extrai datas e pontuações
-  const labels = historyData.map(item => item.timestamp);
-  const scores = historyData.map(item => item.score);
+  const labels = historyData.days.map(formatEpochDay);
+  const scores = historyData.scores;
   
   // Cria o gradiente
   const gradient = ctx.createLinearGradient(0, 0, 0, 400);
@@ -0,0 +1,178 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from sqlalchemy import bindparam, insert, or_, update
+from models import User, Response
+from aggregates import update_rollups
+from alerts import detect_risk_events
+from scoring import ANSWERS_VERSION, SCORING_VERSION, encode_answers
+from create_app import db
+
+# Gravação das submissões do questionário.
+#
+# write_submissions grava um lote de submissões (INSERT em lote das respostas e
+# UPDATE dos usuários) na transação atual. A gravação pode ser direta, uma
+# transação por submissão, ou passar pelo SubmissionWriter: uma fila de
+# gravação em segundo plano que agrupa as submissões que chegam em uma pequena
+# janela de tempo/tamanho em uma única transação. Quem envia só recebe a
+# confirmação depois do commit do lote, então a resposta continua durável
+# antes do redirecionamento.
+
+
+def build_submission(user_id, responses, result, timestamp):
+    """
+    Monta a linha de Response de uma submissão do questionário a partir do
+    ScoreResult calculado para as respostas
+    """
+    return {
+        'user_id': user_id,
+        # Pontuação final e suas partes (EE, DP, PA e estilo de vida)
+        **result._asdict(),
+        'timestamp': timestamp,
+        'scoring_version': SCORING_VERSION,
+        'answers_version': ANSWERS_VERSION,
+        # Respostas codificadas como inteiros pequenos (valor numérico ou
+        # posição da opção textual)
+        **encode_answers(responses),
+    }
+
+
+def write_submissions(submissions):
+    """Grava um lote de submissões na sessão atual, sem fazer commit"""
+    # INSERT do Core: um único executemany, sem o agrupamento por linha que o
+    # INSERT em lote do ORM faz quando as colunas nulas variam
+    db.session.execute(insert(Response.__table__), submissions)
+
+    # Cada usuário fica com a pontuação da sua submissão mais recente do lote
+    latest = {}
+    for submission in submissions:
+        current = latest.get(submission['user_id'])
+        if current is None or submission['timestamp'] >= current['timestamp']:
+            latest[submission['user_id']] = submission
+
+    # Alertas de risco, a partir do estado anterior dos usuários (antes do
+    # UPDATE abaixo); retorna a nova janela de pontuações de cada usuário
+    windows = detect_risk_events(submissions)
+
+    # Respostas com data igual ou anterior à avaliação atual entram no meio do
+    # histórico sem mudar last_assessment: marca o histórico como alterado
+    # (antes do UPDATE abaixo, que pode mover last_assessment)
+    earliest = {}
+    for submission in submissions:
+        current = earliest.get(submission['user_id'])
+        if current is None or submission['timestamp'] < current:
+            earliest[submission['user_id']] = submission['timestamp']
+    users = User.__table__
+    db.session.execute(
+        update(users)
+        .where(users.c.id == bindparam('target_id'),
+               users.c.last_assessment >= bindparam('earliest'))
+        .values(history_version=db.func.coalesce(users.c.history_version, 0) + 1),
+        [{'target_id': user_id, 'earliest': timestamp}
+         for user_id, timestamp in earliest.items()])
+
+    # Não sobrescreve uma avaliação mais recente já gravada (ex.: importações
+    # de respostas antigas)
+    db.session.execute(
+        update(users)
+        .where(users.c.id == bindparam('target_id'),
+               or_(users.c.last_assessment.is_(None),
+                   users.c.last_assessment <= bindparam('assessed_at')))
+        .values(latest_burnout_score=bindparam('score'),
+                last_assessment=bindparam('assessed_at'),
+                recent_scores=bindparam('window')),
+        [{'target_id': s['user_id'], 'score': s['burnout_score'],
+          'assessed_at': s['timestamp'], 'window': windows[s['user_id']]}
+         for s in latest.values()])
+
+    # Agregados institucionais, na mesma transação
+    update_rollups(submissions)
+
+
+class SubmissionWriter:
+    """Fila de gravação que agrupa submissões em transações únicas"""
+
+    def __init__(self, app, max_batch=100, max_wait=0.02, timeout=5.0):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # A thread é criada sob demanda e recriada após um fork (ex.: gunicorn --preload)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='submission-writer', daemon=True)
+                self._thread.start()
+
+    def write(self, submission):
+        """Enfileira a submissão e espera o commit do seu lote"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((submission, future))
+        try:
+            # Propaga a exceção do lote, para que o chamador use a gravação direta
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # Só desiste se o lote ainda não começou a ser gravado; caso
+            # contrário a gravação direta duplicaria a submissão
+            if future.cancel():
+                raise
+            return future.result()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Descarta as submissões canceladas por tempo de espera
+            batch = [(submission, future) for submission, future in self._next_batch()
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            with self.app.app_context():
+                try:
+                    write_submissions([submission for submission, _ in batch])
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Erro ao gravar o lote de submissões: {e}")
+                    for _, future in batch:
+                        future.set_exception(e)
+                    continue
+            for _, future in batch:
+                future.set_result(True)
+
+
+def init_app(app):
+    """Cria a fila de gravação se SUBMISSION_QUEUE estiver ativado"""
+    if not app.config.get('SUBMISSION_QUEUE'):
+        app.extensions['submission_writer'] = None
+        return
+    app.extensions['submission_writer'] = SubmissionWriter(
+        app,
+        max_batch=app.config.get('SUBMISSION_QUEUE_MAX_BATCH', 100),
+        max_wait=app.config.get('SUBMISSION_QUEUE_MAX_WAIT_MS', 20) / 1000,
+        timeout=app.config.get('SUBMISSION_QUEUE_TIMEOUT', 5.0))
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos da aplicação ficam na raiz do repositório
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'senha-de-teste'
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Aplicação com um SQLite temporário e o esquema criado no boot"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'teste.db'}")
+    monkeypatch.setenv('DB_AUTO_CREATE', '1')
+    monkeypatch.setenv('ARCHIVE_PATH', str(tmp_path / 'arquivo.db'))
+    monkeypatch.setenv('LOG_LEVEL', 'WARNING')
+    from create_app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def user(app):
+    """Usuário cadastrado; retorna o e-mail"""
+    from create_app import db
+    from hashing import hasher
+    from models import User
+    email = 'teste@exemplo.com'
+    with app.app_context():
+        db.session.add(User(name='Teste', email=email, password_hash=hasher.hash(PASSWORD)))
+        db.session.commit()
+    return email
+
+
+@pytest.fixture
+def client(app, user):
+    """Cliente de testes com o usuário autenticado"""
+    client = app.test_client()
+    response = client.post('/login', data={'email': user, 'password': PASSWORD})
+    assert response.status_code == 302
+    return client
@@ -0,0 +1,65 @@
+import sqlite3
+from datetime import datetime
+
+from sqlalchemy import select
+
+import aggregates
+from aggregates import cohort_summary, rebuild_rollups
+from create_app import db
+from models import CohortRollup, User
+from submissions import write_submissions
+
+
+def submission(user_id, timestamp, score, ee=10, dp=8, pa=4):
+    return {'user_id': user_id, 'timestamp': timestamp, 'burnout_score': score,
+            'ee_score': ee, 'dp_score': dp, 'pa_score': pa}
+
+
+def user_id(email):
+    return db.session.scalar(select(User.id).where(User.email == email))
+
+
+def test_rebuild_does_not_block_concurrent_writes(app, user, monkeypatch):
+    with app.app_context():
+        uid = user_id(user)
+        write_submissions([submission(uid, datetime(2024, 3, 4, 10), 40.0)])
+        db.session.commit()
+        path = db.engine.url.database
+
+        scan = aggregates.iter_archived_rows
+
+        def write_during_scan(chunk_size):
+            # Outro processo grava uma submissão enquanto a reconstrução lê
+            connection = sqlite3.connect(path, timeout=0.2)
+            with connection:
+                connection.execute(
+                    "INSERT INTO response (user_id, burnout_score, timestamp, ee_score, "
+                    "dp_score, pa_score) VALUES (?, 80, '2024-03-05 10:00:00.000000', 12, 9, 2)",
+                    (uid,))
+            connection.close()
+            return scan(chunk_size)
+
+        monkeypatch.setattr(aggregates, 'iter_archived_rows', write_during_scan)
+        assert rebuild_rollups() == 2
+        rollup = db.session.get(CohortRollup, datetime(2024, 3, 4).date())
+        assert (rollup.responses, rollup.score_sum) == (2, 120.0)
+        assert cohort_summary()['responses'] == 2
+
+
+def test_dimension_means_ignore_missing_subscores(app, user):
+    with app.app_context():
+        uid = user_id(user)
+        monday = datetime(2024, 3, 4, 10)
+        write_submissions([
+            submission(uid, monday, 60.0, ee=20, dp=16, pa=8),
+            # Resposta antiga (ou com o valor de falha) sem as somas das dimensões
+            submission(uid, monday, 50.0, ee=None, dp=None, pa=None),
+        ])
+        db.session.commit()
+        week, = cohort_summary()['weeks']
+        assert week['responses'] == 2
+        assert (week['ee_mean'], week['dp_mean'], week['pa_mean']) == (4.0, 4.0, 4.0)
+
+        rebuild_rollups()
+        week, = cohort_summary()['weeks']
+        assert (week['ee_mean'], week['dp_mean'], week['pa_mean']) == (4.0, 4.0, 4.0)
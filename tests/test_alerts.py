@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+import submissions
+from alerts import THRESHOLD, dispatch_alerts
+from create_app import db
+from models import Response, RiskAlert, User
+from submissions import write_submissions
+
+
+def submission(user_id, timestamp, score):
+    return {'user_id': user_id, 'timestamp': timestamp, 'burnout_score': score,
+            'ee_score': 30, 'dp_score': 20, 'pa_score': 5}
+
+
+def count(model):
+    return db.session.scalar(select(func.count()).select_from(model))
+
+
+def write_high_score(email):
+    uid = db.session.scalar(select(User.id).where(User.email == email))
+    write_submissions([submission(uid, datetime(2024, 3, 4, 10), 85.0)])
+    return uid
+
+
+def test_alert_is_written_in_the_submission_transaction(app, user, monkeypatch):
+    with app.app_context():
+        # Falha depois de gravar a resposta e o alerta: nenhum dos dois fica
+        def fail(rows):
+            raise RuntimeError('falha na gravação')
+
+        monkeypatch.setattr(submissions, 'update_rollups', fail)
+        with pytest.raises(RuntimeError):
+            write_high_score(user)
+        db.session.rollback()
+        assert (count(Response), count(RiskAlert)) == (0, 0)
+
+        monkeypatch.undo()
+        uid = write_high_score(user)
+        db.session.commit()
+        assert count(Response) == 1
+        alert, = db.session.scalars(select(RiskAlert)).all()
+        assert (alert.user_id, alert.kind, alert.burnout_score) == (uid, THRESHOLD, 85.0)
+        assert alert.dispatched_at is None
+
+
+def test_dispatch_is_idempotent(app, user):
+    with app.app_context():
+        write_high_score(user)
+        db.session.commit()
+
+        delivered = []
+        assert dispatch_alerts(delivered.extend) == (1, 0)
+        # Alertas já despachados não são enviados de novo
+        assert dispatch_alerts(delivered.extend) == (0, 0)
+        assert [alert['kind'] for alert in delivered] == [THRESHOLD]
+
+        alert = db.session.scalars(select(RiskAlert)).one()
+        assert alert.dispatched_at is not None
+        assert alert.attempts == 1
+
+
+def test_dispatch_retries_failed_batches(app, user):
+    with app.app_context():
+        write_high_score(user)
+        db.session.commit()
+
+        def unavailable(alerts):
+            raise ConnectionError('webhook indisponível')
+
+        assert dispatch_alerts(unavailable) == (0, 1)
+        alert = db.session.scalars(select(RiskAlert)).one()
+        assert alert.dispatched_at is None
+        assert (alert.attempts, alert.last_error) == (1, 'webhook indisponível')
+
+        delivered = []
+        assert dispatch_alerts(delivered.extend) == (1, 0)
+        assert len(delivered) == 1
+        db.session.refresh(alert)
+        assert alert.dispatched_at is not None
+        assert alert.attempts == 2
+
+
+def test_dispatch_gives_up_after_max_attempts(app, user):
+    with app.app_context():
+        write_high_score(user)
+        db.session.commit()
+
+        def unavailable(alerts):
+            raise ConnectionError('webhook indisponível')
+
+        for _ in range(3):
+            dispatch_alerts(unavailable, max_attempts=3)
+        delivered = []
+        assert dispatch_alerts(delivered.extend, max_attempts=3) == (0, 0)
+        assert delivered == []
+        assert db.session.scalars(select(RiskAlert)).one().attempts == 3
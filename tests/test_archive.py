@@ -0,0 +1,138 @@
+import csv
+import io
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+import archive
+from archive import archive_responses
+from create_app import db
+from export import iter_csv
+from models import Response, User
+from scoring import evaluate_responses
+from submissions import build_submission, write_submissions
+
+ANSWERS = {**{f"q{i}": '2' for i in range(5, 16)}, 'q18': '7-8 horas'}
+
+# Avaliações com mais de um ano (arquivadas) e recentes (ficam em Response)
+OLD_DAYS = (900, 800, 700, 600, 500)
+RECENT_DAYS = (30, 10)
+
+
+@pytest.fixture
+def assessments(app, user):
+    """Grava as avaliações antigas e recentes do usuário de teste"""
+    with app.app_context():
+        uid = db.session.scalar(select(User.id).where(User.email == user))
+        now = datetime.now().replace(microsecond=0)
+        submissions = []
+        for index, days in enumerate(OLD_DAYS + RECENT_DAYS):
+            answers = {**ANSWERS, 'q5': str(index % 5)}
+            submissions.append(build_submission(
+                uid, answers, evaluate_responses(answers), now - timedelta(days=days)))
+        write_submissions(submissions)
+        db.session.commit()
+    return uid
+
+
+def history(client):
+    response = client.get('/api/history')
+    assert response.status_code == 200
+    return {key: response.json[key] for key in ('days', 'scores', 'until')}
+
+
+def export_rows(app):
+    with app.app_context():
+        text = ''.join(iter_csv(chunk_size=2))
+    return sorted(list(csv.DictReader(io.StringIO(text))),
+                  key=lambda row: int(row['response_id']))
+
+
+def pending_batches(app):
+    connection = sqlite3.connect(app.config['ARCHIVE_PATH'])
+    try:
+        return connection.execute(
+            'SELECT COUNT(*) FROM archive_batch WHERE committed = 0').fetchone()[0]
+    finally:
+        connection.close()
+
+
+def response_count(app):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(Response))
+
+
+def test_history_is_identical_after_archiving(app, client, assessments):
+    before = history(client)
+    assert len(before['scores']) == len(OLD_DAYS + RECENT_DAYS)
+
+    with app.app_context():
+        stats = archive_responses(horizon_days=365, chunk_size=2)
+    assert stats['archived'] == len(OLD_DAYS)
+    assert stats['batches'] == 3
+    assert response_count(app) == len(RECENT_DAYS)
+    assert history(client) == before
+
+
+def test_export_includes_archived_rows(app, client, assessments):
+    before = export_rows(app)
+    assert len(before) == len(OLD_DAYS + RECENT_DAYS)
+
+    with app.app_context():
+        archive_responses(horizon_days=365, chunk_size=2)
+    assert export_rows(app) == before
+
+
+def test_crash_before_retire_is_discarded(app, client, assessments, monkeypatch):
+    before_history, before_export = history(client), export_rows(app)
+
+    def crash(rows, batch_id):
+        raise RuntimeError('processo interrompido')
+
+    monkeypatch.setattr(archive, '_retire', crash)
+    with app.app_context(), pytest.raises(RuntimeError):
+        archive_responses(horizon_days=365, chunk_size=2)
+    # O lote foi gravado no arquivo, mas as respostas continuam em Response
+    assert pending_batches(app) == 1
+    assert response_count(app) == len(OLD_DAYS + RECENT_DAYS)
+    assert history(client) == before_history
+    assert export_rows(app) == before_export
+
+    monkeypatch.undo()
+    with app.app_context():
+        stats = archive_responses(horizon_days=365, chunk_size=2)
+    assert stats['reconciled'] == 1
+    assert stats['archived'] == len(OLD_DAYS)
+    assert pending_batches(app) == 0
+    assert history(client) == before_history
+    assert export_rows(app) == before_export
+
+
+def test_crash_after_retire_is_confirmed(app, client, assessments, monkeypatch):
+    before_history, before_export = history(client), export_rows(app)
+    retire = archive._retire
+
+    def crash(rows, batch_id):
+        retire(rows, batch_id)
+        raise RuntimeError('processo interrompido')
+
+    monkeypatch.setattr(archive, '_retire', crash)
+    with app.app_context(), pytest.raises(RuntimeError):
+        archive_responses(horizon_days=365, chunk_size=2)
+    # As respostas já saíram de Response, mas o lote não foi confirmado
+    assert pending_batches(app) == 1
+    assert response_count(app) == len(OLD_DAYS + RECENT_DAYS) - 2
+    assert history(client) == before_history
+    assert export_rows(app) == before_export
+
+    monkeypatch.undo()
+    with app.app_context():
+        stats = archive_responses(horizon_days=365, chunk_size=2)
+    assert stats['reconciled'] == 1
+    assert stats['archived'] == len(OLD_DAYS) - 2
+    assert pending_batches(app) == 0
+    assert response_count(app) == len(RECENT_DAYS)
+    assert history(client) == before_history
+    assert export_rows(app) == before_export
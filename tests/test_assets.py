@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import queue
+
+from flask import Flask, url_for
+
+import assets
+from assets import DIST_DIR, build_assets, ensure_assets, is_stale, load_manifest
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+
+
+def static_folder(tmp_path):
+    static = tmp_path / 'static'
+    write(static / 'css' / 'style.css', 'body { color: black; }')
+    write(static / 'js' / 'app.js', 'console.log(1);')
+    return str(static)
+
+
+def create_app(static):
+    app = Flask(__name__, static_folder=static)
+    app.config.update(ASSETS_FINGERPRINT=True, SERVER_NAME='localhost')
+    assets.init_app(app)
+    return app
+
+
+def test_stale_manifest_is_rebuilt_on_startup(tmp_path):
+    static = static_folder(tmp_path)
+    old = build_assets(static)
+
+    # Deploy que atualizou a fonte sem rodar "flask build-assets"
+    write(tmp_path / 'static' / 'js' / 'app.js', 'console.log(2);')
+    assert is_stale(static, old)
+
+    app = create_app(static)
+    manifest = app.extensions['asset_manifest']
+    assert manifest['js/app.js'] != old['js/app.js']
+    assert manifest == load_manifest(static)
+    assert not is_stale(static, manifest)
+    with app.app_context():
+        assert url_for('static', filename='js/app.js').endswith(manifest['js/app.js'])
+
+
+def test_missing_dist_file_makes_manifest_stale(tmp_path):
+    static = static_folder(tmp_path)
+    manifest = build_assets(static)
+    assert not is_stale(static, manifest)
+    os.remove(os.path.join(static, DIST_DIR, manifest['css/style.css']))
+    assert is_stale(static, manifest)
+    assert ensure_assets(static) == manifest
+    assert os.path.exists(os.path.join(static, DIST_DIR, manifest['css/style.css']))
+
+
+def build_in_worker(static, barrier, results):
+    barrier.wait()
+    results.put(ensure_assets(static))
+
+
+def test_concurrent_workers_build_once(tmp_path, monkeypatch):
+    static = static_folder(tmp_path)
+    builds = multiprocessing.get_context('fork').Queue()
+    build = assets._build_assets
+
+    def counted_build(folder):
+        builds.put(os.getpid())
+        return build(folder)
+
+    monkeypatch.setattr(assets, '_build_assets', counted_build)
+
+    # Workers sem preload sobem juntos sem manifesto
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(4)
+    results = context.Queue()
+    workers = [context.Process(target=build_in_worker, args=(static, barrier, results))
+               for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    manifests = [results.get(timeout=30) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    pids = []
+    while True:
+        try:
+            pids.append(builds.get(timeout=0.5))
+        except queue.Empty:
+            break
+    assert len(pids) == 1
+    assert all(manifest == manifests[0] for manifest in manifests)
+    assert not is_stale(static, manifests[0])
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+
+import pytest
+from sqlalchemy import func, select
+
+from create_app import db
+from models import Response, User
+
+# Submissões do questionário em paralelo, de vários processos (como os workers
+# do gunicorn) contra o mesmo banco: nenhuma pode falhar nem se perder. Roda
+# no SQLite temporário e, se TEST_POSTGRES_URL estiver definida, no PostgreSQL.
+
+PROCESSES = 4
+SUBMISSIONS = 15
+
+FORM = {**{f"q{i}": str(i % 5) for i in range(5, 16)},
+        'q17': 'Raramente', 'q18': '5-6 horas', 'q25': 'Nunca procurei'}
+
+BACKENDS = ['sqlite']
+if os.environ.get('TEST_POSTGRES_URL'):
+    BACKENDS.append('postgresql')
+
+
+def submit(index, barrier, results):
+    """Processo filho: cadastra um usuário e envia o questionário várias vezes"""
+    from create_app import create_app
+    app = create_app()
+    client = app.test_client()
+    email = f"paralelo-{index}@exemplo.com"
+    client.post('/register', data={'name': 'Paralelo', 'email': email, 'password': 'senha'})
+    client.post('/login', data={'email': email, 'password': 'senha'})
+    barrier.wait(timeout=60)
+    failures = 0
+    for _ in range(SUBMISSIONS):
+        response = client.post('/questionnaire', data=FORM, follow_redirects=True)
+        if response.status_code != 200 or 'Erro ao salvar' in response.get_data(as_text=True):
+            failures += 1
+    results.put(failures)
+
+
+@pytest.fixture(params=BACKENDS)
+def database(request, tmp_path, monkeypatch):
+    if request.param == 'postgresql':
+        monkeypatch.setenv('DATABASE_URL', os.environ['TEST_POSTGRES_URL'])
+    else:
+        monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'paralelo.db'}")
+    monkeypatch.setenv('DB_AUTO_CREATE', '1')
+    monkeypatch.setenv('LOG_LEVEL', 'WARNING')
+    # Senhas baratas: o foco aqui é o banco, não o hash
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    from create_app import create_app
+    app = create_app()
+    with app.app_context():
+        # Parte de um banco limpo (o PostgreSQL de testes é reaproveitado)
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def test_parallel_submissions(database):
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(PROCESSES)
+    results = context.Queue()
+    processes = [context.Process(target=submit, args=(i, barrier, results))
+                 for i in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    failures = sum(results.get(timeout=120) for _ in processes)
+    for process in processes:
+        process.join(timeout=30)
+
+    assert failures == 0
+    with database.app_context():
+        db.session.remove()
+        assert db.session.scalar(select(func.count(User.id))) == PROCESSES
+        assert db.session.scalar(select(func.count(Response.id))) == PROCESSES * SUBMISSIONS
+        counts = db.session.execute(
+            select(Response.user_id, func.count()).group_by(Response.user_id)).all()
+        assert sorted(count for _, count in counts) == [SUBMISSIONS] * PROCESSES
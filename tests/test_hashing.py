@@ -0,0 +1,18 @@
+import pytest
+
+from hashing import PasswordHasher
+
+
+@pytest.mark.parametrize('method', ['scrypt', 'scrypt:32768:8:1', 'pbkdf2',
+                                    'pbkdf2:sha256', 'pbkdf2:sha256:1000'])
+def test_fresh_hash_does_not_need_rehash(method):
+    hasher = PasswordHasher(method=method)
+    password_hash = hasher.hash('senha')
+    assert hasher.verify(password_hash, 'senha')
+    assert not hasher.needs_rehash(password_hash)
+
+
+def test_changed_method_needs_rehash():
+    old = PasswordHasher(method='pbkdf2:sha256:1000').hash('senha')
+    assert PasswordHasher(method='scrypt').needs_rehash(old)
+    assert PasswordHasher(method='pbkdf2:sha256:2000').needs_rehash(old)
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from create_app import db
+from models import User
+from submissions import write_submissions
+
+# O navegador guarda o histórico com o ETag e o "until" da última resposta e
+# pede só os pontos novos (?since=until) com If-None-Match.
+
+
+def add_assessment(email, timestamp, score):
+    uid = db.session.scalar(select(User.id).where(User.email == email))
+    write_submissions([{'user_id': uid, 'timestamp': timestamp, 'burnout_score': score,
+                        'ee_score': 10, 'dp_score': 8, 'pa_score': 4}])
+    db.session.commit()
+
+
+def fetch(client, previous=None):
+    """Pede o histórico como o navegador, a partir da resposta anterior"""
+    if previous is None:
+        return client.get('/api/history')
+    return client.get('/api/history', query_string={'since': previous.json['until']},
+                      headers={'If-None-Match': previous.headers['ETag']})
+
+
+def test_new_assessment_is_sent_incrementally(app, client, user):
+    with app.app_context():
+        add_assessment(user, datetime(2024, 3, 4, 10), 40.0)
+    first = fetch(client)
+    assert first.json['scores'] == [40.0]
+    assert fetch(client, first).status_code == 304
+
+    with app.app_context():
+        add_assessment(user, datetime(2024, 3, 11, 10), 55.0)
+    second = fetch(client, first)
+    assert second.status_code == 200
+    assert second.json['since'] == first.json['until']
+    assert second.json['scores'] == [55.0]
+
+
+def test_older_import_changes_etag_and_resends_full_history(app, client, user):
+    with app.app_context():
+        add_assessment(user, datetime(2024, 3, 11, 10), 55.0)
+    first = fetch(client)
+
+    # Importação de uma avaliação antiga: last_assessment não muda
+    with app.app_context():
+        add_assessment(user, datetime(2024, 3, 4, 10), 40.0)
+    second = fetch(client, first)
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.json['since'] is None
+    assert second.json['scores'] == [40.0, 55.0]
+
+
+def test_etag_from_other_config_gets_full_history(app, client, user):
+    with app.app_context():
+        add_assessment(user, datetime(2024, 3, 4, 10), 40.0)
+    first = fetch(client)
+
+    app.config['HISTORY_MAX_POINTS'] = 60
+    with app.app_context():
+        add_assessment(user, datetime(2024, 3, 11, 10), 55.0)
+    second = fetch(client, first)
+    assert second.json['since'] is None
+    assert second.json['scores'] == [40.0, 55.0]
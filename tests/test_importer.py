@@ -0,0 +1,56 @@
+import csv
+import io
+
+from sqlalchemy import func, select
+
+from create_app import db
+from importer import import_responses
+from models import Response
+
+ANSWERS = {f"q{i}": '2' for i in range(5, 16)}
+
+
+def make_csv(rows):
+    source = io.StringIO()
+    writer = csv.DictWriter(source, fieldnames=['email', *ANSWERS, 'timestamp'])
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+    source.seek(0)
+    return source
+
+
+def test_timestamps_with_offset(app, user):
+    source = make_csv([
+        {'email': user, **ANSWERS, 'timestamp': '2024-03-01T12:00:00Z'},
+        {'email': user, **ANSWERS, 'timestamp': '2024-03-02T12:00:00-03:00'},
+        {'email': user, **ANSWERS, 'timestamp': '2024-03-03T12:00:00'},
+    ])
+    with app.app_context():
+        stats = import_responses(source)
+        assert (stats.imported, stats.rejected) == (3, 0)
+        timestamps = db.session.scalars(select(Response.timestamp)).all()
+        assert all(timestamp.tzinfo is None for timestamp in timestamps)
+
+
+def test_failed_chunk_rejects_each_row_once(app, user, monkeypatch):
+    import importer
+
+    def fail(submissions):
+        raise RuntimeError('banco indisponível')
+
+    monkeypatch.setattr(importer, 'write_submissions', fail)
+    source = make_csv([
+        {'email': user, **ANSWERS},
+        {'email': 'outro@exemplo.com', **ANSWERS},
+        {'email': user, **ANSWERS, 'q5': 'x'},
+    ])
+    rejects = io.StringIO()
+    with app.app_context():
+        stats = import_responses(source, rejects)
+        assert (stats.imported, stats.rejected) == (0, 3)
+        assert db.session.scalar(select(func.count(Response.id))) == 0
+    rejected = list(csv.DictReader(io.StringIO(rejects.getvalue())))
+    assert len(rejected) == 3
+    assert [row['erro'].split(':')[0] for row in rejected] == [
+        'q5', 'usuário não cadastrado', 'erro ao gravar o bloco']
@@ -0,0 +1,22 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from create_app import db
+
+
+@pytest.fixture
+def metrics_app(app, monkeypatch):
+    monkeypatch.setenv('METRICS_ENABLED', '1')
+    from create_app import create_app
+    return create_app()
+
+
+def test_failed_queries_do_not_leak_start_times(metrics_app):
+    with metrics_app.app_context():
+        with db.engine.connect() as connection:
+            for _ in range(5):
+                with pytest.raises(OperationalError):
+                    connection.execute(text('SELECT * FROM tabela_inexistente'))
+            connection.execute(text('SELECT 1'))
+            assert not connection.info.get('metrics_query_start')
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from create_app import db
+
+# Cada requisição autenticada consulta a tabela de usuários no máximo uma vez
+# (o user_loader do Flask-Login); as demais funções reaproveitam o objeto.
+
+USER_SELECT = re.compile(r'^\s*SELECT\b.*\bFROM\s+"?user"?(\s|$)', re.IGNORECASE | re.DOTALL)
+
+ANSWERS = {**{f"q{i}": '2' for i in range(5, 16)}, 'q18': '7-8 horas'}
+
+
+@pytest.fixture
+def user_selects(app):
+    """Lista das consultas à tabela de usuários feitas durante o teste"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if USER_SELECT.match(statement):
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.mark.parametrize('method, path, data', [
+    ('get', '/dashboard', None),
+    ('get', '/tips', None),
+    ('get', '/questionnaire', None),
+    ('post', '/questionnaire', ANSWERS),
+])
+def test_user_loaded_once_per_request(client, user_selects, method, path, data):
+    # Uma submissão anterior, para o dashboard ter histórico e pontuação
+    client.post('/questionnaire', data=ANSWERS)
+    client.get('/dashboard')
+    user_selects.clear()
+
+    response = getattr(client, method)(path, data=data)
+    assert response.status_code in (200, 302)
+    assert len(user_selects) <= 1, user_selects
+
+
+def test_dashboard_after_submission(client, user_selects):
+    """O redirecionamento após a submissão também carrega o usuário uma vez"""
+    client.post('/questionnaire', data=ANSWERS)
+    user_selects.clear()
+    response = client.get('/dashboard')
+    assert response.status_code == 200
+    assert len(user_selects) == 1, user_selects
+
@@ -0,0 +1,13 @@
+from create_app import db
+from models import Response
+
+ANSWERS = {**{f"q{i}": '2' for i in range(5, 16)}, 'q18': '7-8 horas'}
+
+
+def test_non_decimal_digit_answer_is_saved(app, client):
+    """'²'.isdigit() é verdadeiro, mas int('²') falha: conta como não respondida"""
+    response = client.post('/questionnaire', data={**ANSWERS, 'q5': '²'})
+    assert response.status_code == 302
+    with app.app_context():
+        saved = db.session.scalars(db.select(Response)).one()
+        assert saved.q5 is None
@@ -0,0 +1,359 @@
+import itertools
+import logging
+import random
+
+import pytest
+
+from scoring import QUESTION_COLUMNS, evaluate_responses, score_responses
+
+# Equivalência entre o motor de pontuação (scoring.py) e a função if/elif que
+# ele substituiu, copiada abaixo sem alterações. As opções de estilo de vida
+# vêm da cópia antiga, não da especificação, para que um erro de digitação ou
+# de peso na especificação seja detectado. A única diferença intencional:
+# respostas numéricas fora da escala (maiores que 4) ou com dígitos que não
+# são decimais ('²'), que o formulário não oferece, contam como não
+# respondidas (ver expected_score); a função antiga falhava com '²'.
+
+def legacy_burnout_score(responses):
+    """Cópia congelada de routes.calculate_burnout_score antes do motor (5ffb198^)"""
+    try:
+        # Exaustão Emocional (EE) - Questões 5-9
+        ee_questions = [f"q{i}" for i in range(5, 10)]
+        ee_score = 0
+        for q in ee_questions:
+            if q in responses and responses[q].isdigit():
+                ee_score += int(responses[q])
+
+        # Despersonalização/Ceticismo (DP) - Questões 10-13
+        dp_questions = [f"q{i}" for i in range(10, 14)]
+        dp_score = 0
+        for q in dp_questions:
+            if q in responses and responses[q].isdigit():
+                dp_score += int(responses[q])
+
+        # Realização Pessoal (PA) - Questões 14-15 (pontuação invertida)
+        pa_questions = [f"q{i}" for i in range(14, 16)]
+        pa_score = 0
+        for q in pa_questions:
+            if q in responses and responses[q].isdigit():
+                pa_score += int(responses[q])
+
+        # Inverter a pontuação de PA (quanto maior PA, menor o burnout)
+        max_pa_score = 4 * len(pa_questions)
+        reversed_pa_score = max_pa_score - pa_score
+
+        # Ajustes com base no estilo de vida (Q16-Q25)
+        lifestyle_adjustment = 0
+
+        # Questionário Q16 - Horas de Estudo
+        if "q16" in responses:
+            study_response = responses.get("q16")
+            if study_response == "Menos de 2 horas por dia":
+                lifestyle_adjustment += 5
+            elif study_response == "2-4 horas por dia":
+                lifestyle_adjustment += 2.5
+            elif study_response == "4-6 horas por dia":
+                lifestyle_adjustment += 1
+            elif study_response == "6 horas ou mais por dia":
+                lifestyle_adjustment += 0
+
+        # Questionário Q17 - Tempo para Descanso
+        if "q17" in responses:
+            rest_response = responses.get("q17")
+            if rest_response == "Sim, sempre":
+                lifestyle_adjustment += 0
+            elif rest_response == "Às vezes":
+                lifestyle_adjustment += 1
+            elif rest_response == "Raramente":
+                lifestyle_adjustment += 2.5
+            elif rest_response == "Nunca":
+                lifestyle_adjustment += 5
+
+        # Questionário Q18 - Quantidade de Sono
+        if "q18" in responses:
+            sleep_response = responses.get("q18")
+            if sleep_response == "Mais de 8 horas":
+                lifestyle_adjustment += 0
+            elif sleep_response == "7-8 horas":
+                lifestyle_adjustment += 1
+            elif sleep_response == "5-6 horas":
+                lifestyle_adjustment += 2.5
+            elif sleep_response == "Menos de 5 horas":
+                lifestyle_adjustment += 5
+
+        # Questionário Q19 - Atividade Física
+        if "q19" in responses:
+            activity_response = responses.get("q19")
+            if activity_response == "Diariamente":
+                lifestyle_adjustment += 0
+            elif activity_response == "3-5 vezes por semana":
+                lifestyle_adjustment += 1
+            elif activity_response == "1-2 vezes por semana":
+                lifestyle_adjustment += 2.5
+            elif activity_response == "Raramente ou nunca":
+                lifestyle_adjustment += 5
+
+        # Questionário Q20 - Apoio Social
+        if "q20" in responses:
+            support_response = responses.get("q20")
+            if support_response == "Sim, muito apoio":
+                lifestyle_adjustment += 0
+            elif support_response == "Apoio moderado":
+                lifestyle_adjustment += 1
+            elif support_response == "Pouco apoio":
+                lifestyle_adjustment += 2.5
+            elif support_response == "Nenhum apoio":
+                lifestyle_adjustment += 5
+
+        # Questionário Q21 - Nutrição
+        if "q21" in responses:
+            diet_response = responses.get("q21")
+            if diet_response == "Muito boa":
+                lifestyle_adjustment += 0
+            elif diet_response == "Boa":
+                lifestyle_adjustment += 1
+            elif diet_response == "Regular":
+                lifestyle_adjustment += 2.5
+            elif diet_response == "Ruim":
+                lifestyle_adjustment += 5
+            elif diet_response == "Muito ruim":
+                lifestyle_adjustment += 5
+
+        # Questionário Q22 - Atividades de Lazer
+        if "q22" in responses:
+            leisure_response = responses.get("q22")
+            if leisure_response == "Regularmente (várias vezes por semana)":
+                lifestyle_adjustment += 0
+            elif leisure_response == "Ocasionalmente (uma vez por semana)":
+                lifestyle_adjustment += 1
+            elif leisure_response == "Raramente (poucas vezes por mês)":
+                lifestyle_adjustment += 2.5
+            elif leisure_response == "Quase nunca":
+                lifestyle_adjustment += 5
+
+        # Questionário Q23 - Perspectiva de Futuro
+        if "q23" in responses:
+            future_response = responses.get("q23")
+            if future_response == "Muito otimista":
+                lifestyle_adjustment += 0
+            elif future_response == "Otimista":
+                lifestyle_adjustment += 1
+            elif future_response == "Neutro":
+                lifestyle_adjustment += 2.5
+            elif future_response == "Pessimista":
+                lifestyle_adjustment += 5
+            elif future_response == "Muito pessimista":
+                lifestyle_adjustment += 5
+
+        # Questionário Q24 - Estratégias de Enfrentamento
+        if "q24" in responses:
+            coping_response = responses.get("q24")
+            if coping_response == "Técnicas de respiração/meditação":
+                lifestyle_adjustment += 0
+            elif coping_response == "Atividade física":
+                lifestyle_adjustment += 1
+            elif coping_response == "Conversar com amigos/família":
+                lifestyle_adjustment += 2.5
+            elif coping_response == "Atividades de lazer":
+                lifestyle_adjustment += 2.5
+            elif coping_response == "Não tenho estratégias específicas":
+                lifestyle_adjustment += 5
+
+        # Questionário Q25 - Procurar Ajuda
+        if "q25" in responses:
+            help_response = responses.get("q25")
+            if help_response == "Sim, regularmente":
+                lifestyle_adjustment += 0
+            elif help_response == "Sim, ocasionalmente":
+                lifestyle_adjustment += 1
+            elif help_response == "Apenas uma vez":
+                lifestyle_adjustment += 2.5
+            elif help_response == "Nunca, mas considero necessário":
+                lifestyle_adjustment += 3.5
+            elif help_response == "Nunca procurei":
+                lifestyle_adjustment += 5
+
+        # Limite de ajuste de estilo de vida
+        lifestyle_adjustment = min(lifestyle_adjustment, 15)
+
+        # Calcular pontuação total
+        total_score = ee_score + dp_score + reversed_pa_score
+        total_possible = 4 * (len(ee_questions) +
+                              len(dp_questions) + len(pa_questions))
+
+        # Calcular porcentagem de Burnout
+        burnout_percentage = (total_score / total_possible) * 100
+
+        # Aplicar ajuste de estilo de vida
+        adjusted_score = min(100, burnout_percentage + lifestyle_adjustment)
+
+        return round(adjusted_score, 1)
+    except Exception as e:
+        logging.error(f"Erro ao calcular a pontuação de burnout: {e}")
+        return 50.0
+
+
+# Questões numéricas de cada dimensão e opções de estilo de vida da função antiga
+DIMENSIONS = {
+    'ee': [f"q{i}" for i in range(5, 10)],
+    'dp': [f"q{i}" for i in range(10, 14)],
+    'pa': [f"q{i}" for i in range(14, 16)],
+}
+LEGACY_OPTIONS = {
+    'q16': {"Menos de 2 horas por dia": 5, "2-4 horas por dia": 2.5,
+            "4-6 horas por dia": 1, "6 horas ou mais por dia": 0},
+    'q17': {"Sim, sempre": 0, "Às vezes": 1, "Raramente": 2.5, "Nunca": 5},
+    'q18': {"Mais de 8 horas": 0, "7-8 horas": 1, "5-6 horas": 2.5,
+            "Menos de 5 horas": 5},
+    'q19': {"Diariamente": 0, "3-5 vezes por semana": 1, "1-2 vezes por semana": 2.5,
+            "Raramente ou nunca": 5},
+    'q20': {"Sim, muito apoio": 0, "Apoio moderado": 1, "Pouco apoio": 2.5,
+            "Nenhum apoio": 5},
+    'q21': {"Muito boa": 0, "Boa": 1, "Regular": 2.5, "Ruim": 5, "Muito ruim": 5},
+    'q22': {"Regularmente (várias vezes por semana)": 0,
+            "Ocasionalmente (uma vez por semana)": 1,
+            "Raramente (poucas vezes por mês)": 2.5, "Quase nunca": 5},
+    'q23': {"Muito otimista": 0, "Otimista": 1, "Neutro": 2.5, "Pessimista": 5,
+            "Muito pessimista": 5},
+    'q24': {"Técnicas de respiração/meditação": 0, "Atividade física": 1,
+            "Conversar com amigos/família": 2.5, "Atividades de lazer": 2.5,
+            "Não tenho estratégias específicas": 5},
+    'q25': {"Sim, regularmente": 0, "Sim, ocasionalmente": 1, "Apenas uma vez": 2.5,
+            "Nunca, mas considero necessário": 3.5, "Nunca procurei": 5},
+}
+
+# Respostas numéricas fora do formulário
+ODD_NUMERIC = ['', ' 3', '3 ', '-1', '+2', '2.5', 'abc', '5', '10', '007', '004', '٣',
+               '3000000', '²']
+NUMERIC_QUESTIONS = {q for questions in DIMENSIONS.values() for q in questions}
+
+
+def expected_score(responses):
+    """
+    Pontuação esperada: a da função antiga, sem as respostas numéricas fora
+    da escala, que o motor trata como não respondidas
+    """
+    return legacy_burnout_score({
+        q: answer for q, answer in responses.items()
+        if not (q in NUMERIC_QUESTIONS and answer.isdigit()
+                and (not answer.isdecimal() or int(answer) > 4))})
+
+
+def split_sum(total, questions):
+    """Respostas de 0 a 4 nas questões cuja soma é `total`"""
+    answers = {}
+    for q in questions:
+        value = min(4, total)
+        answers[q] = str(value)
+        total -= value
+    assert total == 0
+    return answers
+
+
+def lifestyle_combinations():
+    """
+    Uma combinação de respostas de estilo de vida para cada ajuste total
+    possível (antes do limite), percorrendo todos os pesos de cada questão
+    """
+    combinations = {0: {}}
+    for q, options in LEGACY_OPTIONS.items():
+        step = {}
+        for total, answers in combinations.items():
+            for answer, weight in options.items():
+                step.setdefault(total + weight, {**answers, q: answer})
+        combinations = step
+    return combinations
+
+
+def exhaustive_responses():
+    """Todas as somas de EE, DP e PA com todos os ajustes totais possíveis"""
+    lifestyle = list(lifestyle_combinations().values())
+    ranges = [range(4 * len(questions) + 1) for questions in DIMENSIONS.values()]
+    for sums in itertools.product(*ranges):
+        numeric = {}
+        for total, questions in zip(sums, DIMENSIONS.values()):
+            numeric.update(split_sum(total, questions))
+        for answers in lifestyle:
+            yield {**numeric, **answers}
+
+
+def test_every_dimension_sum_and_adjustment():
+    mismatches = [responses for responses in exhaustive_responses()
+                  if score_responses(responses) != expected_score(responses)]
+    assert mismatches == []
+
+
+def test_every_answer_of_every_question():
+    """Cada opção (e respostas ausentes ou fora do formulário) de cada questão"""
+    rng = random.Random(1)
+    for _ in range(50):
+        base = {q: str(rng.randint(0, 4)) for q in sorted(NUMERIC_QUESTIONS)}
+        base.update({q: rng.choice(list(options)) for q, options in LEGACY_OPTIONS.items()})
+        for q in QUESTION_COLUMNS:
+            if q in LEGACY_OPTIONS:
+                answers = [*LEGACY_OPTIONS[q], '', 'Outra resposta', 'nunca']
+            elif q in NUMERIC_QUESTIONS:
+                answers = [str(value) for value in range(5)] + ODD_NUMERIC
+            else:
+                answers = ['Outro', '']
+            variants = [{**base, q: answer} for answer in answers]
+            variants.append({key: value for key, value in base.items() if key != q})
+            for responses in variants:
+                assert score_responses(responses) == expected_score(responses), responses
+
+
+def test_empty_and_random_responses():
+    rng = random.Random(2)
+    choices = {q: [*LEGACY_OPTIONS.get(q, ()), *map(str, range(5)), *ODD_NUMERIC]
+               for q in QUESTION_COLUMNS}
+    assert score_responses({}) == expected_score({})
+    for _ in range(20000):
+        responses = {q: rng.choice(options) for q, options in choices.items()
+                     if rng.random() < 0.9}
+        assert score_responses(responses) == expected_score(responses), responses
+
+
+def test_score_result_parts():
+    for responses in itertools.islice(exhaustive_responses(), 0, None, 97):
+        result = evaluate_responses(responses)
+        assert result.burnout_score == expected_score(responses)
+        for name, questions in DIMENSIONS.items():
+            assert getattr(result, f"{name}_score") == sum(int(responses[q]) for q in questions)
+        weights = sum(LEGACY_OPTIONS[q][responses[q]] for q in LEGACY_OPTIONS)
+        assert result.lifestyle_adjustment == min(weights, 15)
+
+
+def test_batch_matches_scalar():
+    np = pytest.importorskip('numpy')
+    from scoring import encode_answers, score_batch
+
+    rows = list(itertools.islice(exhaustive_responses(), 0, None, 7))
+    expected = np.array([expected_score(responses) for responses in rows])
+
+    # Respostas textuais
+    columns = {q: [responses.get(q) for responses in rows] for q in QUESTION_COLUMNS}
+    assert np.array_equal(score_batch(columns), expected)
+
+    # Códigos inteiros, como armazenados em Response
+    codes = [encode_answers(responses) for responses in rows]
+    matrix = np.array([[-1 if row[q] is None else row[q] for q in QUESTION_COLUMNS]
+                       for row in codes])
+    assert np.array_equal(score_batch(matrix), expected)
+
+
+def test_out_of_scale_answers_are_unanswered():
+    np = pytest.importorskip('numpy')
+    from scoring import MISSING_CODE, decode_answers, encode_answer, score_batch
+
+    assert encode_answer('q5', '5') == MISSING_CODE
+    assert encode_answer('q5', '004') == 4
+    assert encode_answer('q5', '²') == MISSING_CODE
+    responses = {'q5': '3000000', 'q6': '4'}
+    assert score_responses(responses) == score_responses({'q6': '4'})
+
+    # Códigos fora da escala já gravados: nem lentidão nem tabela gigante
+    matrix = np.zeros((3, len(QUESTION_COLUMNS)), dtype=np.int64)
+    matrix[1, 4] = 3000000
+    matrix[2, 4] = 10 ** 12
+    scores = score_batch(matrix)
+    assert scores.tolist() == [score_responses(decode_answers(matrix[0].tolist()))] * 3